@@ -1,28 +1,65 @@
 import logging
 
-from TexSoup import TexSoup
-from TexSoup.data import OArg
-
-from bib2glossary.shared.parsing import (raise_IOError, parse_bib, write_bib,
-                                         extract_required_val,
-                                         extract_parameters,
-                                         create_msg_error,
-                                         create_msg_duplicates)
+from bib2glossary.shared.parsing import raise_IOError
+from bib2glossary.shared.converter import BaseConverter
+from bib2glossary.shared.macros import ABBREVIATION_P2F
 from bib2glossary.shared.execution import (run_tex_to_bib_shared,
                                            run_bib_to_tex_shared)
 
 logger = logging.getLogger(__name__)
 
-_DEFAULTP2F = (("abbreviation", "shorttitle"),
-               ("longname", "journal"),
-               ("description", "abstract"),
-               ("plural", "series"),
-               ("longplural", "isbn"),
-               ("firstplural", "address"))
+_DEFAULTP2F = ABBREVIATION_P2F
+
+
+class AcronymConverter(BaseConverter):
+    """convert between bib entries and tex newacronym definitions
+
+    Parameters
+    ----------
+    param2field: None or dict
+        mapping of abbreviation parameter to bib field
+        (will override the defaults)
+    entry_type: None or str
+        the entry type for each bib item, and to filter bib items by
+    limits: None or bib2glossary.shared.limits.ParseLimits
+        resource limits for parsing tex (default is ParseLimits())
+    diagnostics: None or func
+        function taking a warning message (default is a new Diagnostics)
+    parser_config: None or dict
+        keyword arguments for the BibTexParser
+    writer_config: None or dict
+        attributes of the BibTexWriter
+
+    """
+    macro = "newacronym"
+    default_param2field = _DEFAULTP2F
+    required_params = ("abbreviation", "longname")
+    lint_params = ("abbreviation", "longname", "description")
+    sort_params = ("sort", "abbreviation")
+
+    def compile_options(self, param2field):
+        """return the sorted (param, field) pairs formatted as options"""
+        return tuple(sorted((param, field)
+                            for param, field in param2field.items()
+                            if param not in self.required_params))
+
+    def format_entry(self, key, fields):
+        """format an entry as a tex newacronym string"""
+        abbrev_field, name_field = self._required_fields
+        body = "{{{key}}}{{{abbreviation}}}{{{name}}}".format(
+            key=key,
+            abbreviation=fields[abbrev_field],
+            name=fields[name_field])
+        options = ["{0}={{{1}}}".format(param, fields[field])
+                   for param, field in self._options if field in fields]
+        if options:
+            body = "[" + ",".join(options) + "]" + body
+        return "\\newacronym" + body
 
 
 def bib_to_tex(text_str, entry_type='misc',
-               param2field=None):
+               param2field=None, entry_filter=None, collation=None,
+               progress=None, references=False):
     """create a list of tex newacronym strings
 
     Parameters
@@ -33,60 +70,74 @@ def bib_to_tex(text_str, entry_type='misc',
         if given, filter by entry_type
     param2field: None or dict
         mapping of abbreviation parameter to bib field
+    entry_filter: None or str or func
+        if given, filter by a filter expression
+        (see bib2glossary.shared.filtering) or a function entry -> bool
+    collation: None or func
+        if given, a function value -> key (see
+        bib2glossary.shared.collation.make_collation_key),
+        to sort by the effective sort value (with letter group comments),
+        otherwise sort by key
+    progress: None or bib2glossary.shared.progress.Progress
+        if given, count the emitted and skipped entries
+    references: bool
+        also select the entries (transitively) referenced by the
+        parent and see parameters of the selected entries
 
     Returns
     -------
     acronyms: a list of string
 
     """
-    param2field_default = dict(_DEFAULTP2F)
-    if param2field is not None:
-        param2field_default.update(param2field)
-    param2field = param2field_default.copy()
-
-    assert "abbreviation" in param2field
-    assert "longname" in param2field
-    abbrev_field = param2field.pop("abbreviation")
-    name_field = param2field.pop("longname")
-
-    entries = parse_bib(text_str)
-
-    acronyms = []
-    for key in sorted(entries.keys()):
+    converter = AcronymConverter(param2field, entry_type=entry_type)
+    return converter.bib_to_tex(text_str, entry_filter=entry_filter,
+                                warning_handler=logger.warn,
+                                collation=collation, progress=progress,
+                                references=references)
 
-        fields = entries.get(key)
 
-        if entry_type and entry_type != (fields.get('ENTRYTYPE', '')):
-            continue
-
-        if abbrev_field not in fields:
-            logger.warn("Skipping {0}: No {1} key found".format(
-                key, abbrev_field))
-            continue
-        if name_field not in fields:
-            logger.warn(
-                "Skipping {0}: No {1} key found".format(key, name_field))
-            continue
+def entries_to_tex(entries, entry_type='misc',
+                   param2field=None, entry_filter=None, collation=None,
+                   progress=None, references=False):
+    """create a list of tex newacronym strings
 
-        body = "{{{key}}}{{{abbreviation}}}{{{name}}}".format(
-            key=key,
-            abbreviation=fields[abbrev_field],
-            name=fields[name_field])
-        options = []
-        for param in sorted(param2field.keys()):
-            field = param2field[param]
-            if field in fields:
-                options.append("{0}={{{1}}}".format(param, fields[field]))
-        if options:
-            body = "[" + ",".join(options) + "]" + body
+    Parameters
+    ----------
+    entries: iterable of dict
+        bib entries {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+    entry_type: None or str
+        if given, filter by entry_type
+    param2field: None or dict
+        mapping of abbreviation parameter to bib field
+    entry_filter: None or str or func
+        if given, filter by a filter expression
+        (see bib2glossary.shared.filtering) or a function entry -> bool
+    collation: None or func
+        if given, a function value -> key (see
+        bib2glossary.shared.collation.make_collation_key),
+        to sort by the effective sort value (with letter group comments),
+        otherwise sort by key
+    progress: None or bib2glossary.shared.progress.Progress
+        if given, count the emitted and skipped entries
+    references: bool
+        also select the entries (transitively) referenced by the
+        parent and see parameters of the selected entries
 
-        acronyms.append("\\newacronym"+body)
+    Returns
+    -------
+    acronyms: a list of string
 
-    return acronyms
+    """
+    converter = AcronymConverter(param2field, entry_type=entry_type)
+    return converter.entries_to_tex(entries, entry_filter=entry_filter,
+                                    warning_handler=logger.warn,
+                                    collation=collation, progress=progress,
+                                    references=references)
 
 
 def tex_to_dict(text_str, entry_type='misc',
-                param2field=None, warning_handler=None):
+                param2field=None, warning_handler=None, limits=None,
+                progress=None):
     """create a dictionary of bib entries
 
     Parameters
@@ -99,6 +150,10 @@ def tex_to_dict(text_str, entry_type='misc',
         mapping of abbreviation parameter to bib field
     warning_handler: func
         function taking a warning message (default is to raise IOError)
+    limits: None or bib2glossary.shared.limits.ParseLimits
+        resource limits for parsing (default is ParseLimits())
+    progress: None or bib2glossary.shared.progress.Progress
+        if given, count the parsed and skipped definitions
 
     Returns
     -------
@@ -106,89 +161,15 @@ def tex_to_dict(text_str, entry_type='misc',
     duplicates: dict {<key>: [row, ...]}
 
     """
-    if warning_handler is None:
-        warning_handler = raise_IOError
-
-    param2field_default = dict(_DEFAULTP2F)
-    if param2field is not None:
-        param2field_default.update(param2field)
-    param2field = param2field_default.copy()
-    assert "abbreviation" in param2field
-    assert "longname" in param2field
-
-    abbrev_field = param2field.pop("abbreviation")
-    name_field = param2field.pop("longname")
-
-    entries = []
-    keys = []
-    duplicates = {}
-
-    latex_tree = TexSoup(text_str)
-
-    for acronym in latex_tree.find_all("newacronym"):
-
-        row = None  # TODO get first row (for error reporting)
-        arguments = list(acronym.args)
-        entry = {'ENTRYTYPE': entry_type}
-
-        if len(arguments) < 3:
-            msg = create_msg_error(
-                "could not parse acronym (too few arguments)", acronym, row)
-            warning_handler(msg)
-            continue
-        if len(arguments) > 4:
-            msg = create_msg_error(
-                "could not parse acronym (too many arguments)", acronym, row)
-            warning_handler(msg)
-            continue
-
-        key = extract_required_val(arguments[-3])
-        if key in keys:
-            duplicates[key] = duplicates.get(key, []) + [row]
-            continue
-
-        entry['ID'] = key
-        entry[abbrev_field] = extract_required_val(arguments[-2])
-        entry[name_field] = extract_required_val(arguments[-1])
-
-        if len(arguments) == 4:
-            options = arguments[0]
-
-            if not isinstance(options, OArg):
-                msg = create_msg_error(
-                    "expected first argument to be 'optional",
-                    acronym, row)
-                warning_handler(msg)
-                continue
-
-            opt_params, errors = extract_parameters(options)
-
-            for error in errors:
-                msg = create_msg_error(
-                    "error reading 'optional' block: {}".format(error),
-                    acronym, row)
-                warning_handler(msg)
-
-            for opt_name, opt_value in opt_params.items():
-                if opt_name not in param2field:
-                    warning_handler(
-                        "option '{0}' in key '{1}' not recognised".format(
-                            opt_name, key))
-                    continue
-                if param2field[opt_name] in entry:
-                    warning_handler(
-                        "duplicate parameter '{0}' in key '{1}'".format(
-                            opt_name, key))
-                    continue
-                entry[param2field[opt_name]] = opt_value
-
-        entries.append(entry)
-
-    return entries, duplicates
+    converter = AcronymConverter(param2field, entry_type=entry_type,
+                                 limits=limits)
+    return converter.tex_to_dict(
+        text_str, warning_handler=warning_handler or raise_IOError,
+        progress=progress)
 
 
 def tex_to_bib(text_str, entry_type="misc",
-               param2field=_DEFAULTP2F, warning_handler=None):
+               param2field=_DEFAULTP2F, warning_handler=None, limits=None):
     """create a bib file string
 
     Parameters
@@ -201,40 +182,117 @@ def tex_to_bib(text_str, entry_type="misc",
         mapping of abbreviation parameter to bib field
     warning_handler: func
         function taking a warning message (default is to raise IOError)
+    limits: None or bib2glossary.shared.limits.ParseLimits
+        resource limits for parsing (default is ParseLimits())
 
     Returns
     -------
     bib_file: str
 
     """
-    if warning_handler is None:
-        warning_handler = raise_IOError
+    converter = AcronymConverter(param2field, entry_type=entry_type,
+                                 limits=limits)
+    return converter.tex_to_bib(
+        text_str, warning_handler=warning_handler or raise_IOError)
 
-    entries, duplicates = tex_to_dict(text_str,
-                                      entry_type=entry_type,
-                                      param2field=param2field,
-                                      warning_handler=warning_handler)
 
-    if duplicates:
-        msg = create_msg_duplicates(duplicates)
-        warning_handler(msg)
+def verify_tex_bib(tex_str, bib_str, entry_type="misc",
+                   param2field=None, warning_handler=None, limits=None):
+    """compare the newacronym definitions of a tex file,
+    with the entries of a bib file
 
-    bibtex_str = write_bib(entries)
+    Parameters
+    ----------
+    tex_str: str
+        the .tex file string
+    bib_str: str
+        the .bib file string
+    entry_type: None or str
+        if given, only compare bib entries of this entry type
+    param2field: None or dict
+        mapping of abbreviation parameter to bib field
+    warning_handler: func
+        function taking a warning message (default is to raise IOError)
+    limits: None or bib2glossary.shared.limits.ParseLimits
+        resource limits for parsing (default is ParseLimits())
+
+    Returns
+    -------
+    mismatches: dict {<key>: <reason>}
+
+    """
+    converter = AcronymConverter(param2field, entry_type=entry_type,
+                                 limits=limits)
+    return converter.verify_tex_bib(
+        tex_str, bib_str, warning_handler=warning_handler or raise_IOError)
+
+
+def lint_entries(entries, param2field=None, duplicates=None):
+    """find newacronym collisions and conflicts between entries
+
+    Parameters
+    ----------
+    entries: iterable of dict
+        bib entries {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+    param2field: None or dict
+        mapping of abbreviation parameter to bib field
+    duplicates: None or dict
+        {<key>: [row, ...]} of keys defined more than once
 
-    return bibtex_str
+    Returns
+    -------
+    issues: list of dict
+        {"kind": <kind>, "param": <param>, "value": <value>,
+         "keys": [<key>, ...]}
+    count: int
+        the number of entries linted
+
+    """
+    converter = AcronymConverter(param2field)
+    return converter.lint(entries, duplicates=duplicates)
+
+
+def check_entries(definitions, param2field=None, warning_handler=None):
+    """validate newacronym entries, without converting them,
+    reporting duplicate keys, missing required fields,
+    and undefined or cyclic parent/see references
+
+    Parameters
+    ----------
+    definitions: iterable of tuple
+        (entry, row) pairs, where row may be None
+    param2field: None or dict
+        mapping of abbreviation parameter to bib field
+    warning_handler: func
+        function taking a warning message (default is to raise IOError)
+
+    Returns
+    -------
+    count: int
+        the number of entries checked
+
+    """
+    converter = AcronymConverter(param2field)
+    return converter.check(definitions,
+                           warning_handler=warning_handler or raise_IOError)
 
 
 def run_tex_to_bib(sys_args):
     """ """
     return run_tex_to_bib_shared(sys_args,
                                  "newacronym",
-                                 tex_to_bib,
-                                 logger)
+                                 logger,
+                                 verify_func=verify_tex_bib,
+                                 lint_func=lint_entries,
+                                 check_func=check_entries)
 
 
 def run_bib_to_tex(sys_args):
     """ """
     return run_bib_to_tex_shared(sys_args,
                                  "newacronym",
-                                 bib_to_tex,
-                                 logger)
+                                 entries_to_tex,
+                                 logger,
+                                 lint_func=lint_entries,
+                                 check_func=check_entries,
+                                 converter_class=AcronymConverter)
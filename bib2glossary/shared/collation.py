@@ -0,0 +1,119 @@
+"""collation of glossary entries, into their final (letter grouped) order
+
+This mirrors the sorting done by makeindex/xindy in a LaTeX build,
+so that the definitions can be written in their final order,
+and the glossaries ``sort=def`` (or ``sort=none``) mode used instead
+(with ``\\makenoidxglossaries``, so that makeindex/xindy is not run).
+Each entry is sorted by its effective sort value
+(the ``sort`` parameter, falling back to the name, or abbreviation),
+with LaTeX commands and braces removed,
+and assigned to a letter group by its first character
+(written only as a comment in the output).
+
+Collation by a named locale needs the process-wide ``LC_COLLATE`` setting,
+so it is only switched (under a lock) while keys are computed,
+and then restored, rather than left changed for the rest of the process.
+"""
+import contextlib
+import functools
+import locale
+import re
+import threading
+import unicodedata
+
+DEFAULT_CACHE_SIZE = 65536
+# the group labels used by the glossaries package
+NUMBERS_GROUP = "glsnumbers"
+SYMBOLS_GROUP = "glssymbols"
+
+_CONTROL = re.compile(r"\\(?:[A-Za-z@]+\s*|.)")
+_BRACES = re.compile(r"[{}]")
+_LOCALE_LOCK = threading.Lock()
+
+
+def plain_text(value):
+    """remove LaTeX commands and braces from a value"""
+    return " ".join(_BRACES.sub("", _CONTROL.sub("", value)).split())
+
+
+def strip_accents(value):
+    """remove combining accents from a value"""
+    return "".join(char for char in unicodedata.normalize("NFKD", value)
+                   if not unicodedata.combining(char))
+
+
+def letter_group(value):
+    """return the letter group of a (sort) value"""
+    value = strip_accents(plain_text(value))
+    if not value:
+        return SYMBOLS_GROUP
+    if value[0].isalpha():
+        return value[0].upper()
+    if value[0].isdigit():
+        return NUMBERS_GROUP
+    return SYMBOLS_GROUP
+
+
+@contextlib.contextmanager
+def collation_locale(locale_name):
+    """temporarily set the process-wide collation locale
+
+    Raises
+    ------
+    ValueError
+        if the locale is not available
+
+    """
+    with _LOCALE_LOCK:
+        previous = locale.setlocale(locale.LC_COLLATE)
+        try:
+            locale.setlocale(locale.LC_COLLATE, locale_name)
+        except locale.Error:
+            raise ValueError(
+                "collation locale not available: {}".format(locale_name))
+        try:
+            yield
+        finally:
+            locale.setlocale(locale.LC_COLLATE, previous)
+
+
+def make_collation_key(locale_name=None, cache_size=DEFAULT_CACHE_SIZE):
+    """create a (memoized) function, to compute the collation key of a value
+
+    Parameters
+    ----------
+    locale_name: None or str
+        if given, collate with the rules of this locale (e.g. 'de_DE.UTF-8'),
+        otherwise collate case and accent insensitively by code point
+    cache_size: None or int
+        the maximum number of keys to cache (None for unbounded)
+
+    Returns
+    -------
+    func: str -> key
+
+    Raises
+    ------
+    ValueError
+        if the locale is not available
+
+    """
+    if locale_name is not None:
+        # check the locale is available
+        with collation_locale(locale_name):
+            pass
+
+        @functools.lru_cache(maxsize=cache_size)
+        def collation_key(value):
+            text = plain_text(value)
+            with collation_locale(locale_name):
+                return (locale.strxfrm(text), text)
+
+    else:
+
+        @functools.lru_cache(maxsize=cache_size)
+        def collation_key(value):
+            text = plain_text(value)
+            return (strip_accents(text).casefold(), text)
+
+    return collation_key
@@ -0,0 +1,404 @@
+"""reusable converter objects, for embedding in long-running services
+
+A converter compiles its configuration once, on creation,
+and holds no per-conversion state,
+so a single instance can be shared across threads.
+"""
+import threading
+from collections import deque
+from operator import itemgetter
+
+from bib2glossary.shared.parsing import (parse_bib, write_bib,
+                                         create_msg_duplicates,
+                                         create_msg_error)
+from bib2glossary.shared.filtering import get_filter
+from bib2glossary.shared.macros import extract_definitions
+from bib2glossary.shared.verify import verify_entries
+from bib2glossary.shared.lint import lint_entries
+from bib2glossary.shared.collation import letter_group
+from bib2glossary.shared.graph import ReferenceGraph
+
+
+class Diagnostics(object):
+    """a thread-safe sink for diagnostic messages
+
+    Parameters
+    ----------
+    maxlen: None or int
+        the maximum number of messages to retain (the oldest are discarded)
+
+    """
+
+    def __init__(self, maxlen=None):
+        self._lock = threading.Lock()
+        self._messages = deque(maxlen=maxlen)
+
+    def __call__(self, msg):
+        self.warn(msg)
+
+    def warn(self, msg):
+        """record a warning message"""
+        with self._lock:
+            self._messages.append(str(msg))
+
+    @property
+    def messages(self):
+        """a list of the recorded messages"""
+        with self._lock:
+            return list(self._messages)
+
+    def clear(self):
+        """remove, and return, the recorded messages"""
+        with self._lock:
+            messages = list(self._messages)
+            self._messages.clear()
+        return messages
+
+
+class BaseConverter(object):
+    """convert between bib entries and tex definitions
+
+    Parameters
+    ----------
+    param2field: None or dict
+        mapping of glossaries parameter to bib field
+        (will override the defaults)
+    entry_type: None or str
+        the entry type for each bib item, and to filter bib items by
+    limits: None or bib2glossary.shared.limits.ParseLimits
+        resource limits for parsing tex (default is ParseLimits())
+    diagnostics: None or func
+        function taking a warning message (default is a new Diagnostics)
+    parser_config: None or dict
+        keyword arguments for the BibTexParser
+    writer_config: None or dict
+        attributes of the BibTexWriter
+
+    """
+    #: the tex macro
+    macro = None
+    #: default mapping of glossaries parameter to bib field
+    default_param2field = ()
+    #: parameters which must be present in the mapping and in each entry
+    required_params = ()
+    #: parameters to lint, the first two being the primary and secondary
+    lint_params = ()
+    #: parameters giving the effective sort value, in order of precedence
+    sort_params = ()
+
+    def __init__(self, param2field=None, entry_type='misc', limits=None,
+                 diagnostics=None, parser_config=None, writer_config=None):
+        mapping = dict(self.default_param2field)
+        if param2field is not None:
+            mapping.update(param2field)
+        for param in self.required_params:
+            assert param in mapping
+        self._param2field = mapping
+        self._required_fields = tuple(
+            mapping[param] for param in self.required_params)
+        self._options = self.compile_options(mapping)
+        self._sort_fields = tuple(
+            mapping[param] for param in self.sort_params if param in mapping)
+
+        self.entry_type = entry_type
+        self.limits = limits
+        self.diagnostics = Diagnostics() if diagnostics is None \
+            else diagnostics
+        self.parser_config = tuple(sorted((parser_config or {}).items()))
+        self.writer_config = tuple(sorted((writer_config or {}).items())) \
+            or None
+
+    @property
+    def param2field(self):
+        """a copy of the mapping of glossaries parameter to bib field"""
+        return dict(self._param2field)
+
+    def compile_options(self, param2field):
+        """return the sorted (param, field) pairs formatted as options"""
+        return tuple(sorted(param2field.items()))
+
+    def format_entry(self, key, fields):
+        """format an entry as a tex definition string"""
+        raise NotImplementedError
+
+    def sort_value(self, fields):
+        """return the effective sort value of an entry"""
+        for field in self._sort_fields:
+            if field in fields:
+                return fields[field]
+        return fields['ID']
+
+    def collate(self, entries, collation, graph=None):
+        """create a list of tex definition strings, sorted by the collation
+        key of their effective sort value,
+        with a ``% group: <group>`` comment before each letter group
+        (if a reference graph is given, children are placed after,
+        and in the same group as, their parent)"""
+        keyed = sorted((((collation(self.sort_value(fields)), fields['ID']),
+                         fields) for fields in entries), key=itemgetter(0))
+        entries = [fields for _, fields in keyed]
+        parents = {}
+        if graph is not None and graph.parents:
+            entries = graph.order(entries)
+            parents = graph.parents
+        definitions = []
+        groups = {}
+        group = None
+        for fields in entries:
+            entry_group = groups.get(parents.get(fields['ID'], None), None) \
+                or letter_group(self.sort_value(fields))
+            groups.setdefault(fields['ID'], entry_group)
+            if entry_group != group:
+                group = entry_group
+                definitions.append("% group: {}".format(group))
+            definitions.append(self.format_entry(fields['ID'], fields))
+        return definitions
+
+    def _check_required(self, key, fields, warning_handler, progress=None):
+        """test whether an entry has the required fields
+        (warning if not), and count it as emitted or skipped"""
+        missing = [field for field in self._required_fields
+                   if field not in fields]
+        if missing:
+            warning_handler("Skipping {0}: No {1} key found".format(
+                key, missing[0]))
+            if progress is not None:
+                progress.update(skipped=1)
+            return False
+        if progress is not None:
+            progress.update(entries=1)
+        return True
+
+    def entries_to_tex(self, entries, entry_filter=None,
+                       warning_handler=None, collation=None, progress=None,
+                       references=False):
+        """create a list of tex definition strings
+
+        Parameters
+        ----------
+        entries: iterable of dict
+            bib entries {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>}
+        entry_filter: None or str or func
+            if given, filter by a filter expression
+            (see bib2glossary.shared.filtering) or a function entry -> bool
+        warning_handler: None or func
+            function taking a warning message (default is the diagnostics)
+        collation: None or func
+            if given, a function value -> key (see
+            bib2glossary.shared.collation.make_collation_key),
+            to sort by the effective sort value (with letter group comments),
+            otherwise sort by key
+        progress: None or bib2glossary.shared.progress.Progress
+            if given, count the emitted and skipped entries
+        references: bool
+            also select the entries (transitively) referenced by the
+            parent and see parameters of the selected entries
+
+        Returns
+        -------
+        definitions: list of str
+
+        """
+        warning_handler = warning_handler or self.diagnostics
+        entry_filter = get_filter(entry_filter)
+        entry_type = self.entry_type
+        if collation is None:
+            entries = sorted(entries, key=itemgetter('ID'))
+
+        def is_selected(fields):
+            if entry_type and entry_type != (fields.get('ENTRYTYPE', '')):
+                return False
+            return entry_filter is None or entry_filter(fields)
+
+        graph = ReferenceGraph(self._param2field)
+        if references and graph.params:
+            entries = list(entries)
+            for fields in entries:
+                graph.add(fields)
+            keys = graph.closure(fields['ID'] for fields in entries
+                                 if is_selected(fields))
+
+            def is_selected(fields):
+                return fields['ID'] in keys
+
+        selected = []
+        for fields in entries:
+
+            key = fields['ID']
+
+            if not is_selected(fields):
+                continue
+
+            if not self._check_required(key, fields, warning_handler,
+                                        progress):
+                continue
+
+            selected.append(fields)
+
+        if graph.params:
+            keys = set()
+            for fields in selected:
+                graph.add(fields)
+                keys.add(fields['ID'])
+            for key, param, target in graph.dangling(keys):
+                warning_handler(
+                    "Entry {0} refers to undefined {1}: {2}".format(
+                        key, param, target))
+
+        if collation is not None:
+            return self.collate(selected, collation, graph)
+        if graph.parents:
+            selected = graph.order(selected)
+        return [self.format_entry(fields['ID'], fields)
+                for fields in selected]
+
+    def iter_entries_to_tex(self, entries, warning_handler=None,
+                            progress=None):
+        """iterate over tex definition strings,
+        converting each entry as soon as it is read (e.g. to stream output)
+
+        Unlike entries_to_tex, the entries are neither filtered nor sorted.
+        If the parent or see parameters are mapped, a single reference graph
+        is kept across all the entries: a child is held back until its
+        parent has been converted, and references to undefined entries
+        are only reported once all the entries have been read.
+
+        Parameters
+        ----------
+        entries: iterable of dict
+            bib entries {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>}
+        warning_handler: None or func
+            function taking a warning message (default is the diagnostics)
+        progress: None or bib2glossary.shared.progress.Progress
+            if given, count the emitted and skipped entries
+
+        Yields
+        ------
+        definition: str
+
+        """
+        warning_handler = warning_handler or self.diagnostics
+        entries = (fields for fields in entries
+                   if self._check_required(fields['ID'], fields,
+                                           warning_handler, progress))
+        graph = ReferenceGraph(self._param2field)
+        if graph.params:
+            entries = graph.iter_order(entries)
+        for fields in entries:
+            yield self.format_entry(fields['ID'], fields)
+        for key, param, target in graph.dangling():
+            warning_handler(
+                "Entry {0} refers to undefined {1}: {2}".format(
+                    key, param, target))
+
+    def bib_to_tex(self, text_str, entry_filter=None, warning_handler=None,
+                   collation=None, progress=None, references=False):
+        """create a list of tex definition strings from a .bib file string
+        (see entries_to_tex)"""
+        entries = parse_bib(text_str, self.parser_config)
+        return self.entries_to_tex(entries.values(),
+                                   entry_filter=entry_filter,
+                                   warning_handler=warning_handler,
+                                   collation=collation, progress=progress,
+                                   references=references)
+
+    def tex_to_dict(self, text_str, warning_handler=None, progress=None):
+        """create a list of bib entries from a .tex file string
+
+        Returns
+        -------
+        entries: list [{<field>: <value>, ...}, ...]
+        duplicates: dict {<key>: [row, ...]}
+
+        """
+        entries, duplicates = extract_definitions(
+            text_str, [self.macro],
+            entry_type=self.entry_type or 'misc',
+            param2field=self._param2field,
+            warning_handler=warning_handler or self.diagnostics,
+            limits=self.limits, progress=progress)
+        return entries[self.macro], duplicates
+
+    def tex_to_bib(self, text_str, warning_handler=None):
+        """create a bib file string from a .tex file string"""
+        warning_handler = warning_handler or self.diagnostics
+        entries, duplicates = self.tex_to_dict(
+            text_str, warning_handler=warning_handler)
+        if duplicates:
+            warning_handler(create_msg_duplicates(duplicates))
+        return write_bib(entries, self.writer_config)
+
+    def verify_tex_bib(self, tex_str, bib_str, warning_handler=None):
+        """compare the definitions of a .tex file string,
+        with the entries of a .bib file string
+
+        Returns
+        -------
+        mismatches: dict {<key>: <reason>}
+
+        """
+        tex_entries, duplicates = self.tex_to_dict(
+            tex_str, warning_handler=warning_handler)
+        bib_entries = parse_bib(bib_str, self.parser_config).values()
+        return verify_entries(tex_entries, bib_entries, self._param2field,
+                              duplicates=duplicates,
+                              entry_type=self.entry_type)
+
+    def lint(self, entries, duplicates=None):
+        """find collisions and conflicts between entries
+        (see bib2glossary.shared.lint)
+
+        Returns
+        -------
+        issues: list of dict
+        count: int
+
+        """
+        return lint_entries(entries, self._param2field, self.lint_params,
+                            duplicates=duplicates)
+
+    def check(self, definitions, warning_handler=None):
+        """validate entries, without converting them,
+        reporting duplicate keys, missing required fields,
+        and undefined or cyclic parent/see references
+
+        Parameters
+        ----------
+        definitions: iterable of tuple
+            (entry, row) pairs, where row may be None
+        warning_handler: None or func
+            function taking a warning message (default is the diagnostics)
+
+        Returns
+        -------
+        count: int
+            the number of entries checked
+
+        """
+        warning_handler = warning_handler or self.diagnostics
+        graph = ReferenceGraph(self._param2field)
+        keys = set()
+        count = 0
+        for fields, row in definitions:
+            count += 1
+            key = fields['ID']
+            if key in keys:
+                warning_handler(create_msg_error(
+                    "duplicate key '{}'".format(key), row=row))
+            keys.add(key)
+            for field in self._required_fields:
+                if field not in fields:
+                    warning_handler(create_msg_error(
+                        "no {0} field found for key '{1}'".format(
+                            field, key), row=row))
+            graph.add(fields, row)
+
+        for key, param, target in graph.dangling():
+            warning_handler(create_msg_error(
+                "undefined {0} '{1}' referenced by key '{2}'".format(
+                    param, target, key), row=graph.rows[key]))
+        for cycle in graph.cycles():
+            warning_handler(create_msg_error(
+                "parent cycle: {}".format(" -> ".join(cycle + cycle[:1])),
+                row=graph.rows[cycle[0]]))
+        return count
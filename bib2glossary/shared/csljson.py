@@ -0,0 +1,316 @@
+"""CSL-JSON and Better BibTeX JSON entry input
+
+Reference managers such as Zotero can export a library as either:
+
+- CSL-JSON: a JSON array of items, with CSL variable names
+  (e.g. ``container-title``, ``title-short``), or
+- Better BibTeX JSON: a JSON object, with an ``items`` array of items
+  with Zotero field names (e.g. ``dictionaryTitle``, ``shortTitle``).
+
+The export is parsed incrementally, one item at a time,
+so that the whole array is never held in memory,
+and each item is mapped onto the bib fields used by the
+Zotero ``Dictionary Entry`` defaults (see ``param2field``).
+Item fields without a bib field equivalent are ignored.
+"""
+import json
+import re
+
+JSON_EXTENSIONS = (".json",)
+
+# CSL variable -> bib field
+CSL_FIELDS = {
+    "container-title": "journal",
+    "title-short": "shorttitle",
+    "shortTitle": "shorttitle",
+    "abstract": "abstract",
+    "collection-title": "series",
+    "ISBN": "isbn",
+    "publisher-place": "address",
+    "volume": "volume",
+    "edition": "edition",
+    "publisher": "publisher",
+    "title": "title",
+    "note": "note",
+    "URL": "url",
+    "DOI": "doi",
+}
+# CSL type -> bib entry type
+CSL_TYPES = {
+    "article-journal": "article",
+    "book": "book",
+    "chapter": "incollection",
+    "paper-conference": "inproceedings",
+    "report": "techreport",
+    "thesis": "phdthesis",
+}
+# Zotero field -> bib field
+ZOTERO_FIELDS = {
+    "dictionaryTitle": "journal",
+    "encyclopediaTitle": "journal",
+    "publicationTitle": "journal",
+    "shortTitle": "shorttitle",
+    "abstractNote": "abstract",
+    "series": "series",
+    "ISBN": "isbn",
+    "place": "address",
+    "volume": "volume",
+    "edition": "edition",
+    "publisher": "publisher",
+    "title": "title",
+    "extra": "note",
+    "url": "url",
+    "DOI": "doi",
+}
+# Zotero item type -> bib entry type
+ZOTERO_TYPES = {
+    "journalArticle": "article",
+    "book": "book",
+    "bookSection": "incollection",
+    "conferencePaper": "inproceedings",
+    "report": "techreport",
+    "thesis": "phdthesis",
+}
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_YEAR = re.compile(r"\b(\d{4})\b")
+
+
+class _JSONStream(object):
+    """incremental decoding of JSON values from chunks of text"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.text = ""
+        self.pos = 0
+        self.final = False
+
+    def fill(self, min_size=1):
+        """discard the consumed text, and read at least min_size characters
+        (unless the end of the input is reached)"""
+        parts = [self.text[self.pos:]]
+        self.pos = 0
+        size = 0
+        while size < min_size:
+            chunk = next(self.chunks, "")
+            if not chunk:
+                self.final = True
+                break
+            parts.append(chunk)
+            size += len(chunk)
+        self.text = "".join(parts)
+
+    def peek(self):
+        """return the next non-whitespace character, or '' at the end"""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if self.final:
+                return ""
+            self.fill()
+
+    def expect(self, char):
+        """consume the next non-whitespace character"""
+        found = self.peek()
+        if found != char:
+            raise ValueError("expected '{0}' but found '{1}'".format(
+                char, found or "end of input"))
+        self.pos += 1
+
+    def decode(self):
+        """decode the next JSON value"""
+        while True:
+            self.peek()
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.final:
+                    raise
+                # double the buffer, so a large value is re-tried
+                # only a logarithmic number of times
+                self.fill(len(self.text) - self.pos)
+                continue
+            if end == len(self.text) and not self.final:
+                # e.g. a number may continue in the next chunk
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self):
+        """iterate over the values of a JSON array"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            self.expect(",")
+
+
+def iter_json_items(chunks):
+    """iterate over the items of a CSL-JSON array,
+    or the ``items`` array of a Better BibTeX JSON object,
+    parsing incrementally
+
+    Parameters
+    ----------
+    chunks: iterable of str
+        the .json file text, in consecutive chunks
+
+    Yields
+    ------
+    item: dict
+
+    """
+    stream = _JSONStream(chunks)
+    start = stream.peek()
+    if start == "[":
+        for item in stream.iter_array():
+            yield item
+        return
+    if start != "{":
+        raise ValueError("expected a JSON array or object")
+
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        name = stream.decode()
+        stream.expect(":")
+        if name == "items":
+            for item in stream.iter_array():
+                yield item
+        else:
+            stream.decode()
+        if stream.peek() == "}":
+            return
+        stream.expect(",")
+
+
+def _csl_names(names):
+    """convert a list of CSL names to a bibtex name list"""
+    formatted = []
+    for name in names:
+        if "literal" in name:
+            formatted.append(str(name["literal"]))
+        elif "given" in name:
+            formatted.append("{0}, {1}".format(name.get("family", ""),
+                                               name["given"]))
+        else:
+            formatted.append(str(name.get("family", "")))
+    return " and ".join(formatted)
+
+
+def _zotero_names(creators):
+    """convert a list of Zotero (author) creators to a bibtex name list"""
+    formatted = []
+    for creator in creators:
+        if creator.get("creatorType", "author") != "author":
+            continue
+        if "name" in creator:
+            formatted.append(str(creator["name"]))
+        elif "firstName" in creator:
+            formatted.append("{0}, {1}".format(creator.get("lastName", ""),
+                                               creator["firstName"]))
+        else:
+            formatted.append(str(creator.get("lastName", "")))
+    return " and ".join(formatted)
+
+
+def _csl_year(date):
+    """extract the year from a CSL date"""
+    try:
+        return str(date["date-parts"][0][0])
+    except (KeyError, IndexError, TypeError):
+        pass
+    match = _YEAR.search(str(date.get("raw", date.get("literal", ""))))
+    return match.group(1) if match else None
+
+
+def item_to_entry(item):
+    """convert a CSL-JSON or Better BibTeX JSON item to a bib entry dict
+
+    Parameters
+    ----------
+    item: dict
+
+    Returns
+    -------
+    entry: dict or None
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...},
+        or None if no citation key is found
+
+    """
+    if not isinstance(item, dict):
+        raise ValueError("expected a JSON object")
+
+    if "itemType" in item:
+        key = item.get("citationKey", item.get("citekey", None))
+        entry = {"ENTRYTYPE": ZOTERO_TYPES.get(item["itemType"], "misc")}
+        field_map = ZOTERO_FIELDS
+        authors = _zotero_names(item.get("creators", []))
+        match = _YEAR.search(str(item.get("date", "")))
+        year = match.group(1) if match else None
+    else:
+        key = item.get("citation-key", item.get("id", None))
+        entry = {"ENTRYTYPE": CSL_TYPES.get(item.get("type", ""), "misc")}
+        field_map = CSL_FIELDS
+        authors = _csl_names(item.get("author", []))
+        year = _csl_year(item["issued"]) if "issued" in item else None
+
+    if key is None:
+        return None
+    entry["ID"] = str(key)
+
+    for name, value in item.items():
+        if name in field_map and isinstance(value, (str, int)):
+            entry[field_map[name]] = str(value)
+    if authors:
+        entry["author"] = authors
+    if year:
+        entry["year"] = year
+
+    return entry
+
+
+def iter_json_entries(chunks, warning_handler=None):
+    """iterate over the bib entries of a CSL-JSON or Better BibTeX JSON
+    export, parsing incrementally
+
+    Parameters
+    ----------
+    chunks: iterable of str
+        the .json file text, in consecutive chunks
+    warning_handler: None or func
+        function taking a warning message, for items without a citation key
+        (default is to ignore them)
+
+    Yields
+    ------
+    entry: dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+
+    """
+    for index, item in enumerate(iter_json_items(chunks), 1):
+        try:
+            entry = item_to_entry(item)
+        except ValueError as err:
+            raise ValueError(
+                "(item {0}) could not read JSON item: {1}".format(index, err))
+        if entry is None:
+            if warning_handler is not None:
+                warning_handler(
+                    "Skipping item {0}: No citation key found".format(index))
+            continue
+        yield entry
+
+
+def is_json_path(path):
+    """test whether a file path has a JSON extension"""
+    return path.lower().endswith(JSON_EXTENSIONS)
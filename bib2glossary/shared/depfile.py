@@ -0,0 +1,63 @@
+"""dependency files, for integration with build systems
+
+A conversion records the paths of the inputs it reads,
+and the outputs it writes, which can then be written as a Make rule
+(also understood by Ninja and latexmk), e.g.::
+
+    glossary.tex: path/to/file.bib path/to/p2f.json
+
+so that the build system only re-runs the conversion
+when one of its inputs changes.
+"""
+from bib2glossary.shared.fileio import STDIO_PATH, write_output
+
+
+def escape_path(path):
+    """escape a path for a Make rule"""
+    return path.replace("$", "$$").replace("#", "\\#").replace(" ", "\\ ")
+
+
+def format_depfile(outputs, inputs):
+    """format a Make rule, with the outputs depending on the inputs"""
+    return "{0}: {1}\n".format(
+        " ".join(escape_path(path) for path in outputs),
+        " ".join(escape_path(path) for path in inputs)).replace(" \n", "\n")
+
+
+class Dependencies(object):
+    """record the input and output paths of a conversion
+
+    Parameters
+    ----------
+    targets: sequence of str
+        additional output paths (e.g. the file that stdout is redirected to)
+
+    """
+
+    def __init__(self, targets=()):
+        self.inputs = []
+        self.outputs = []
+        for path in targets:
+            self.add_output(path)
+
+    @staticmethod
+    def _add(paths, path):
+        if path is not None and path != STDIO_PATH and path not in paths:
+            paths.append(path)
+
+    def add_input(self, path):
+        """record a path that was read (stdin is ignored)"""
+        self._add(self.inputs, path)
+
+    def add_output(self, path):
+        """record a path that was written (stdout is ignored)"""
+        self._add(self.outputs, path)
+
+    def format(self):
+        """format the dependencies as a Make rule"""
+        return format_depfile(self.outputs, self.inputs)
+
+    def write(self, path):
+        """write the dependencies as a Make rule
+        (only replacing the file if its content changed)"""
+        write_output(path, self.format())
@@ -6,6 +6,33 @@ import json
 
 from six import ensure_str
 
+from bib2glossary.shared.parsing import (iter_parse_bib,
+                                         write_bib, create_msg_duplicates)
+from bib2glossary.shared.fileio import (resolve_path, input_exists,
+                                        open_input, open_output, iter_chunks,
+                                        write_output, discard_stdout,
+                                        strip_compression, path_compression,
+                                        STDIO_PATH)
+from bib2glossary.shared.filtering import compile_filter, FILTER_HELP
+from bib2glossary.shared.partition import (partition_entries,
+                                           partition_func, partition_paths,
+                                           PARTITION_HELP)
+from bib2glossary.shared.macros import (iter_definitions,
+                                        iter_unique_definitions, MACROS)
+from bib2glossary.shared.limits import ParseLimits, DEFAULT_MAX_DEPTH
+from bib2glossary.shared.ndjson import (iter_ndjson, write_ndjson,
+                                        is_ndjson_path)
+from bib2glossary.shared.csljson import iter_json_entries, is_json_path
+from bib2glossary.shared.lint import format_lint_report
+from bib2glossary.shared.collation import make_collation_key
+from bib2glossary.shared.progress import Progress, DEFAULT_INTERVAL
+from bib2glossary.shared.normalise import make_normaliser, normalise_entry
+from bib2glossary.shared.depfile import Dependencies
+from bib2glossary.shared.packed import (iter_packed, write_packed,
+                                        is_packed_path)
+from bib2glossary.shared.sorting import (sort_entries, id_sort_key,
+                                         fields_sort_key, BIB_ORDER)
+
 try:
     from distutils.util import strtobool
 except ImportError:
@@ -83,7 +110,296 @@ def read_param2field(options):
     return param2field
 
 
-def run_tex_to_bib_shared(sys_args, glossary_type, convert_func, logger):
+def get_input_format(options, fpath, native_format,
+                     path_formats=(("ndjson", is_ndjson_path),),
+                     magic_formats=()):
+    """get the input format, inferring it if unset from the magic bytes
+    of the file itself, or else from the file extension
+    (ignoring any compression extension)"""
+    input_format = options.get('input_format', None)
+    if input_format:
+        return input_format
+    for path_format, is_format_path in magic_formats:
+        if is_format_path(fpath):
+            return path_format
+    fpath = strip_compression(fpath)
+    for path_format, is_format_path in path_formats:
+        if is_format_path(fpath):
+            return path_format
+    return native_format
+
+
+# input formats inferred from the file extension, for bib to tex
+BIB_PATH_FORMATS = (("ndjson", is_ndjson_path), ("json", is_json_path))
+# input formats inferred from the magic bytes of the file, for bib to tex
+BIB_MAGIC_FORMATS = (("packed", is_packed_path),)
+
+
+def run_verify(tex_path, bib_path, verify_func, logger, **kwargs):
+    """verify tex and bib files are equivalent,
+    logging mismatched keys and exiting non-zero if any are found"""
+    if not os.path.exists(bib_path):
+        logger.critical(
+            IOError('verify path does not exist: {}'.format(bib_path)))
+        sys.exit(2)
+
+    with open_input(tex_path) as file_obj:
+        tex_str = file_obj.read()
+    with open_input(bib_path) as file_obj:
+        bib_str = file_obj.read()
+
+    try:
+        mismatches = verify_func(tex_str, bib_str,
+                                 warning_handler=logger.warn, **kwargs)
+    except ValueError as err:
+        logger.critical(err)
+        sys.exit(2)
+
+    for key in sorted(mismatches):
+        logger.error("Mismatched key '{0}': {1}".format(key, mismatches[key]))
+    if mismatches:
+        sys.exit(1)
+
+    return ''
+
+
+def get_sort_memory(options):
+    """get the memory budget (bytes) for sorting streamed entries"""
+    return int(options.get("sort_buffer") * 1024 * 1024)
+
+
+def make_progress(options, fpath):
+    """create a progress reporter, if progress or metrics are requested"""
+    if not (options.get("progress") or options.get("metrics_file", None)):
+        return None
+    total_bytes = None
+    if fpath != STDIO_PATH and path_compression(fpath) is None:
+        total_bytes = os.path.getsize(fpath)
+    return Progress(stream=sys.stderr if options.get("progress") else None,
+                    total_bytes=total_bytes,
+                    interval=options.get("progress_interval"))
+
+
+def make_dependencies(options):
+    """create a dependency recorder, if a depfile is requested,
+    recording the paths as given on the command line"""
+    if not options.get("depfile", None):
+        return None
+    dependencies = Dependencies(
+        [options.get("output", None)] + (options.get("depfile_target", None)
+                                         or []))
+    dependencies.add_input(options.get("fpath"))
+    dependencies.add_input(options.get("param2field", None))
+    return dependencies
+
+
+def write_depfile(dependencies, options):
+    """write the dependency file (if requested)"""
+    if dependencies is None:
+        return
+    dependencies.add_output(options.get("metrics_file", None))
+    dependencies.write(options.get("depfile"))
+
+
+def iter_counted(entries, progress=None):
+    """iterate over entries, counting them with the progress reporter"""
+    if progress is None:
+        return iter(entries)
+    return (progress.update(entries=1) or entry for entry in entries)
+
+
+def write_file(outpath, out_str, count, logger):
+    """write an output file, only replacing it if its content changed"""
+    if write_output(outpath, out_str):
+        logger.info("Written {0} entries to {1}".format(count, outpath))
+    else:
+        logger.info("Unchanged output {0} ({1} entries)".format(
+            outpath, count))
+
+
+def return_output(out_str, options, logger):
+    """return the output string,
+    or write it to the output path (if given) and return an empty string"""
+    outpath = options.get("output", None)
+    if outpath is None:
+        return out_str
+    if write_output(outpath, out_str):
+        logger.info("Written output to {}".format(outpath))
+    else:
+        logger.info("Unchanged output {}".format(outpath))
+    return ''
+
+
+def get_normaliser(options):
+    """create a field value normaliser, if requested; escaped special
+    characters are only unescaped for NDJSON output
+    (since .bib field values, like definitions, are LaTeX)"""
+    if not options.get("normalise"):
+        return None
+    return make_normaliser(escapes=options.get("output_format") == "ndjson")
+
+
+def iter_normalised(entries, options):
+    """iterate over entries, normalising their field values
+    (if requested)"""
+    normaliser = get_normaliser(options)
+    if normaliser is None:
+        return iter(entries)
+    return (normalise_entry(entry, normaliser) for entry in entries)
+
+
+def iter_tex_definitions(file_obj, fpath, glossary_type, macros, options,
+                         param2field, limits, warning_handler,
+                         progress=None):
+    """iterate over the definitions of a tex (or ndjson) input,
+    yielding (macro name, entry, row)"""
+    if get_input_format(options, fpath, "tex") == "ndjson":
+        return ((glossary_type, entry, None) for entry in iter_normalised(
+            iter_counted(iter_ndjson(file_obj), progress), options))
+    definitions = iter_definitions(
+        iter_chunks(file_obj, progress=progress), macros,
+        entry_type=options.get("entry_type"),
+        param2field=param2field,
+        warning_handler=warning_handler,
+        limits=limits, progress=progress)
+    normaliser = get_normaliser(options)
+    if normaliser is None:
+        return definitions
+    return ((name, normalise_entry(entry, normaliser), row)
+            for name, entry, row in definitions)
+
+
+def iter_unique_entries(definitions, duplicates):
+    """iterate over the entries of definitions, skipping duplicate keys
+    and recording their rows in duplicates {<key>: [row, ...]}"""
+    for _, entry, _ in iter_unique_definitions(definitions, duplicates):
+        yield entry
+
+
+def iter_bib_input(file_obj, fpath, entry_type, entry_filter, options,
+                   warning_handler, progress=None):
+    """iterate over the (filtered) entries of a bib, ndjson or json input,
+    parsing incrementally"""
+    input_format = get_input_format(options, fpath, "bib", BIB_PATH_FORMATS,
+                                    BIB_MAGIC_FORMATS)
+    if input_format == "packed":
+        entries = iter_packed(fpath, progress=progress)
+    elif input_format == "ndjson":
+        entries = iter_ndjson(file_obj)
+    elif input_format == "json":
+        entries = iter_json_entries(iter_chunks(file_obj, progress=progress),
+                                    warning_handler=warning_handler)
+    else:
+        entries = iter_parse_bib(iter_chunks(file_obj, progress=progress))
+    return (entry for entry in iter_normalised(entries, options)
+            if (not entry_type or entry_type == entry.get('ENTRYTYPE'))
+            and entry_filter(entry))
+
+
+def run_lint(entries, lint_func, param2field, logger, duplicates=None,
+             out_stream=None):
+    """lint entries, writing a JSON report
+    and exiting non-zero if any issues are found"""
+    if out_stream is None:
+        out_stream = sys.stdout
+    try:
+        issues, count = lint_func(entries, param2field=param2field,
+                                  duplicates=duplicates)
+    except ValueError as err:
+        logger.critical(err)
+        sys.exit(2)
+
+    out_stream.write(format_lint_report(issues, count))
+    out_stream.flush()
+    if issues:
+        logger.error("{0} lint issues found in {1} entries".format(
+            len(issues), count))
+        sys.exit(1)
+
+    return ''
+
+
+class CheckFailed(Exception):
+    """raised to stop a check at the first error"""
+
+
+def run_check(iter_definitions_func, check_func, param2field, logger,
+              fail_fast=False):
+    """check entries are valid, without converting or writing them,
+    logging each error and exiting non-zero if any are found
+
+    Parameters
+    ----------
+    iter_definitions_func: func
+        function warning_handler -> iterable of (entry, row)
+    check_func: func
+        function (definitions, param2field, warning_handler) -> count
+    param2field: dict
+    logger: logging.Logger
+    fail_fast: bool
+        stop at the first error
+
+    """
+    errors = []
+
+    def error_handler(msg):
+        errors.append(msg)
+        logger.error(msg)
+        if fail_fast:
+            raise CheckFailed(msg)
+
+    try:
+        check_func(iter_definitions_func(error_handler),
+                   param2field=param2field, warning_handler=error_handler)
+    except CheckFailed:
+        pass
+    except ValueError as err:
+        errors.append(err)
+        logger.error(err)
+
+    if errors:
+        sys.exit(1)
+
+    return ''
+
+
+def stream_tex_to_bib(fpath, glossary_type, macros, options,
+                      param2field, limits, logger, out_stream=None,
+                      progress=None):
+    """convert definitions to entries, writing each one as soon as it is
+    read (or, if a sort buffer is set, in sorted order once all are read)"""
+    if out_stream is None:
+        out_stream = sys.stdout
+    output_format = options.get("output_format")
+
+    found = False
+    duplicates = {}
+    with open_input(fpath) as file_obj:
+        entries = iter_unique_entries(
+            iter_tex_definitions(file_obj, fpath, glossary_type, macros,
+                                 options, param2field, limits, logger.warn,
+                                 progress=progress),
+            duplicates)
+        if options.get("sort_buffer", None):
+            entries = sort_entries(entries, fields_sort_key(BIB_ORDER),
+                                   get_sort_memory(options))
+        for entry in entries:
+            found = True
+            if output_format == "ndjson":
+                out_stream.write(write_ndjson([entry]))
+            else:
+                out_stream.write(write_bib([entry]))
+            out_stream.flush()
+
+    if duplicates:
+        logger.warn(create_msg_duplicates(duplicates))
+    if not found:
+        logger.warn("No '{0}' definitions found".format(
+            "', '".join(sorted(macros))))
+
+
+def run_tex_to_bib_shared(sys_args, glossary_type, logger,
+                          verify_func=None, lint_func=None, check_func=None):
     """ glossary type should be newglossaryentry or newacronym """
 
     infile_ext = "tex"
@@ -94,23 +410,154 @@ def run_tex_to_bib_shared(sys_args, glossary_type, convert_func, logger):
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
     parser.add_argument("fpath", type=str,
-                        help='{} file path'.format(infile_ext),
+                        help="{} file path (or '-' for stdin)".format(
+                            infile_ext),
                         metavar='filepath')
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="read the input incrementally, and write each "
+                        "entry to stdout as soon as it is complete "
+                        "(in input order)")
+    parser.add_argument("--sort-buffer", type=float, metavar='MB',
+                        help="with --stream, output entries in sorted order "
+                        "(by entry type, author and year), buffering up to "
+                        "this much memory and spilling sorted runs to "
+                        "temporary files beyond it")
     parser.add_argument("-type", "--entry-type", type=str, metavar='str',
                         default="misc",
                         help="bibtex entry type to use")
+    parser.add_argument("-o", "--output", type=str, metavar='filepath',
+                        help="write the output to this path (instead of "
+                        "stdout), only replacing it if its content changed")
     parser.add_argument("-p2f", "--param2field", type=str, metavar='filepath',
                         help="path to a json file defining mapping of"
                         "glossaries parameters to bibtex fields "
                         "(will override defaults)")
+    parser.add_argument("-if", "--input-format", type=str,
+                        choices=("tex", "ndjson"),
+                        help="input format "
+                        "(default: inferred from the file extension)")
+    parser.add_argument("-of", "--output-format", type=str,
+                        choices=("bib", "ndjson"), default="bib",
+                        help="output format")
+    parser.add_argument("--max-depth", type=int, metavar='int',
+                        default=DEFAULT_MAX_DEPTH,
+                        help="maximum nesting depth of brace groups")
+    parser.add_argument("--max-entry-size", type=int, metavar='int',
+                        help="maximum number of characters "
+                        "in a single definition")
+    parser.add_argument("--max-entries", type=int, metavar='int',
+                        help="maximum number of definitions")
+    parser.add_argument("--timeout", type=float, metavar='float',
+                        help="wall-clock budget for parsing (seconds)")
+    parser.add_argument("--normalise", action="store_true",
+                        help="collapse whitespace, and convert LaTeX accent "
+                        "and escape macros to unicode, in field values")
+    parser.add_argument("-m", "--macros", type=str, nargs="+",
+                        metavar='name[=type]',
+                        help="the definition macros to extract "
+                        "(in a single scan), optionally with a bibtex "
+                        "entry type for each, from: {0} "
+                        "(default: {1})".format(", ".join(sorted(MACROS)),
+                                                glossary_type))
+    parser.add_argument("--partition-output", type=str, metavar='filepath',
+                        help="write the entries of each macro to a "
+                        "separate output file, with '{}' in this path "
+                        "template replaced by the macro name")
+    if verify_func is not None:
+        parser.add_argument("--verify", type=str, metavar='filepath',
+                            help="instead of converting, verify that the "
+                            "definitions are equivalent to those in this "
+                            "bib file, reporting mismatched keys "
+                            "and exiting non-zero if any are found")
+    if lint_func is not None:
+        parser.add_argument("--lint", action="store_true",
+                            help="instead of converting, report duplicate "
+                            "keys, and keys with colliding or conflicting "
+                            "values (as JSON), exiting non-zero if any "
+                            "are found")
+    if check_func is not None:
+        parser.add_argument("--check", action="store_true",
+                            help="instead of converting, only validate the "
+                            "input (parse errors, unknown parameters, "
+                            "missing required fields and duplicate keys), "
+                            "exiting non-zero if any errors are found")
+        parser.add_argument("--fail-fast", action="store_true",
+                            help="with --check, stop at the first error")
+
+    parser.add_argument("--progress", action="store_true",
+                        help="report progress (entries, bytes read, "
+                        "throughput and time remaining) to stderr")
+    parser.add_argument("--progress-interval", type=float, metavar='float',
+                        default=DEFAULT_INTERVAL,
+                        help="minimum time between progress reports "
+                        "(seconds)")
+    parser.add_argument("--metrics-file", type=str, metavar='filepath',
+                        help="write the final conversion metrics "
+                        "(as JSON) to this path")
+    parser.add_argument("--depfile", type=str, metavar='filepath',
+                        help="write a Make/Ninja dependency file, listing "
+                        "the outputs and the inputs they were created from")
+    parser.add_argument("--depfile-target", type=str, metavar='filepath',
+                        action="append",
+                        help="an output path to list in the dependency file "
+                        "(e.g. when stdout is redirected to it)")
 
     args = parser.parse_args(sys_args)
     options = vars(args)
 
+    macros = {}
+    for macro in options.get("macros", None) or [glossary_type]:
+        name, _, macro_type = macro.partition("=")
+        if name not in MACROS:
+            parser.error("macro not registered: {}".format(name))
+        macros[name] = macro_type or None
+    if "{}" not in (options.get("partition_output", None) or "{}"):
+        parser.error("--partition-output must contain '{}'")
+    if options.get("stream") and (options.get("partition_output", None) or
+                                  options.get("verify", None)):
+        parser.error("--stream cannot be used with "
+                     "--partition-output or --verify")
+    if options.get("lint") and (options.get("stream") or
+                                options.get("partition_output", None) or
+                                options.get("verify", None)):
+        parser.error("--lint cannot be used with "
+                     "--stream, --partition-output or --verify")
+    if options.get("check") and (options.get("stream") or
+                                 options.get("partition_output", None) or
+                                 options.get("verify", None) or
+                                 options.get("lint")):
+        parser.error("--check cannot be used with "
+                     "--stream, --partition-output, --verify or --lint")
+    if options.get("fail_fast") and not options.get("check"):
+        parser.error("--fail-fast can only be used with --check")
+    if options.get("sort_buffer", None) and not options.get("stream"):
+        parser.error("--sort-buffer can only be used with --stream")
+    if options.get("output", None) and (
+            options.get("partition_output", None) or
+            options.get("verify", None) or options.get("lint") or
+            options.get("check")):
+        parser.error("--output cannot be used with "
+                     "--partition-output, --verify, --lint or --check")
+    if options.get("depfile", None):
+        if (options.get("verify", None) or options.get("lint") or
+                options.get("check")):
+            parser.error("--depfile cannot be used with "
+                         "--verify, --lint or --check")
+        if not (options.get("output", None) or
+                options.get("partition_output", None) or
+                options.get("depfile_target", None)):
+            parser.error("--depfile requires --output, --partition-output "
+                         "or --depfile-target")
+    elif options.get("depfile_target", None):
+        parser.error("--depfile-target can only be used with --depfile")
+
     setup_logger()
+    dependencies = make_dependencies(options)
 
-    fpath = os.path.abspath(options.pop('fpath'))
-    if not os.path.exists(fpath):
+    fpath = resolve_path(options.pop('fpath'))
+    if options.get("output", None):
+        options["output"] = resolve_path(options["output"])
+    if not input_exists(fpath):
         logger.critical(IOError('input path does not exist: {}'.format(fpath)))
         return ''
 
@@ -121,22 +568,193 @@ def run_tex_to_bib_shared(sys_args, glossary_type, convert_func, logger):
         logger.critical(err)
         return ''
 
-    with open(fpath) as file_obj:
-        in_str = file_obj.read()
+    limits = ParseLimits(max_depth=options.get("max_depth"),
+                         max_entry_size=options.get("max_entry_size"),
+                         max_entries=options.get("max_entries"),
+                         timeout=options.get("timeout"))
 
-    out_str = convert_func(in_str,
-                           entry_type=options.get("entry_type"),
-                           param2field=param2field,
-                           warning_handler=logger.warn)
+    if options.get("verify", None):
+        return run_verify(fpath, os.path.abspath(options.get("verify")),
+                          verify_func, logger,
+                          entry_type=options.get("entry_type"),
+                          param2field=param2field,
+                          limits=limits)
 
-    if not out_str:
-        logger.warn("No '{0}' definitions found".format(glossary_type))
+    if options.get("check"):
+        with open_input(fpath) as file_obj:
+            return run_check(
+                lambda handler: (
+                    (entry, row) for _, entry, row in iter_tex_definitions(
+                        file_obj, fpath, glossary_type, macros, options,
+                        param2field, limits, handler)),
+                check_func, param2field, logger,
+                fail_fast=options.get("fail_fast"))
+
+    if options.get("lint"):
+        duplicates = {}
+        with open_input(fpath) as file_obj:
+            entries = iter_unique_entries(
+                iter_tex_definitions(file_obj, fpath, glossary_type, macros,
+                                     options, param2field, limits,
+                                     logger.warn),
+                duplicates)
+            return run_lint(entries, lint_func, param2field, logger,
+                            duplicates=duplicates)
+
+    progress = make_progress(options, fpath)
+    try:
+        out_str = convert_tex_to_bib(fpath, glossary_type, macros, options,
+                                     param2field, limits, logger,
+                                     progress=progress,
+                                     dependencies=dependencies)
+    finally:
+        if progress is not None:
+            progress.finish(options.get("metrics_file", None))
 
+    write_depfile(dependencies, options)
     return out_str
 
 
-def run_bib_to_tex_shared(sys_args, glossary_type, convert_func, logger):
-    """ glossary type should be newglossaryentry or newacronym """
+def convert_tex_to_bib(fpath, glossary_type, macros, options, param2field,
+                       limits, logger, progress=None, dependencies=None):
+    """convert a tex (or ndjson) input to a bib (or ndjson) string,
+    or stream it to stdout (exiting with status 2 if the input is rejected)"""
+    if options.get("stream"):
+        try:
+            with open_output(options.get("output", None) or STDIO_PATH) \
+                    as out_stream:
+                stream_tex_to_bib(fpath, glossary_type, macros, options,
+                                  param2field, limits, logger,
+                                  out_stream=out_stream, progress=progress)
+        except ValueError as err:
+            # the input was rejected (e.g. a parse limit was exceeded)
+            logger.critical(err)
+            sys.exit(2)
+        except BrokenPipeError:
+            # the reader has exited (e.g. piped to head), so stop quietly
+            discard_stdout()
+            sys.exit(1)
+        return ''
+
+    if get_input_format(options, fpath, "tex") == "ndjson":
+        groups = {glossary_type: []}
+    else:
+        groups = {name: [] for name in
+                  (sorted(MACROS) if macros is None else macros)}
+    duplicates = {}
+    try:
+        # the input is parsed as it is read,
+        # so that progress is reported while parsing
+        with open_input(fpath) as file_obj:
+            for name, entry, _ in iter_unique_definitions(
+                    iter_tex_definitions(file_obj, fpath, glossary_type,
+                                         macros, options, param2field,
+                                         limits, logger.warn,
+                                         progress=progress),
+                    duplicates):
+                groups[name].append(entry)
+    except ValueError as err:
+        logger.critical(err)
+        sys.exit(2)
+    if duplicates:
+        logger.warn(create_msg_duplicates(duplicates))
+
+    def write_entries(entries):
+        if options.get("output_format") == "ndjson":
+            return write_ndjson(entries)
+        return write_bib(entries)
+
+    if options.get("partition_output", None):
+        outpaths = partition_paths(options.get("partition_output"),
+                                   [name for name in groups if groups[name]])
+        for name, entries in sorted(groups.items()):
+            if not entries:
+                continue
+            outpath = outpaths[name]
+            write_file(outpath, write_entries(entries), len(entries), logger)
+            if dependencies is not None:
+                dependencies.add_output(outpath)
+        if not any(groups.values()):
+            logger.warn("No definitions found")
+        return ''
+
+    out_str = write_entries(
+        [entry for name in sorted(groups) for entry in groups[name]])
+
+    if not out_str:
+        logger.warn("No '{0}' definitions found".format(
+            "', '".join(sorted(groups))))
+
+    return return_output(out_str, options, logger)
+
+
+def format_entries(entries, output_format, convert_func, param2field,
+                   logger, collation=None, progress=None, entry_type=None,
+                   entry_filter=None, references=False):
+    """format bib entries as a tex or ndjson string"""
+    if output_format == "ndjson":
+        return write_ndjson(sorted(iter_counted(entries, progress),
+                                   key=lambda entry: entry['ID']))
+
+    out_str_list = convert_func(entries,
+                                entry_type=entry_type,
+                                param2field=param2field,
+                                entry_filter=entry_filter,
+                                collation=collation,
+                                progress=progress,
+                                references=references)
+
+    if not out_str_list:
+        logger.warn("No bib entries found")
+
+    out_str_list.insert(0, "% Created by bib2glossary")
+
+    return "\n".join(out_str_list) + "\n"
+
+
+def stream_bib_to_tex(fpath, entry_type, entry_filter, options,
+                      converter, logger, out_stream=None, progress=None):
+    """convert entries to definitions (with a single converter),
+    writing each one as soon as it is read
+    (or, if a sort buffer is set, in sorted order once all are read),
+    except that children are held back until their parent is written"""
+    if out_stream is None:
+        out_stream = sys.stdout
+    output_format = options.get("output_format")
+
+    if output_format != "ndjson":
+        out_stream.write("% Created by bib2glossary\n")
+        out_stream.flush()
+
+    found = False
+    with open_input(fpath) as file_obj:
+        entries = iter_bib_input(file_obj, fpath, entry_type, entry_filter,
+                                 options, logger.warn, progress=progress)
+        if options.get("sort_buffer", None):
+            entries = sort_entries(entries, id_sort_key,
+                                   get_sort_memory(options))
+        if output_format == "ndjson":
+            out_strs = (write_ndjson([entry])
+                        for entry in iter_counted(entries, progress))
+        else:
+            out_strs = (definition + "\n" for definition in
+                        converter.iter_entries_to_tex(
+                            entries, warning_handler=logger.warn,
+                            progress=progress))
+        for out_str in out_strs:
+            found = True
+            out_stream.write(out_str)
+            out_stream.flush()
+
+    if not found:
+        logger.warn("No bib entries found")
+
+
+def run_bib_to_tex_shared(sys_args, glossary_type, convert_func, logger,
+                          lint_func=None, check_func=None,
+                          converter_class=None):
+    """ glossary type should be newglossaryentry or newacronym
+    (converter_class is instantiated once, to convert streamed entries)"""
 
     infile_ext = "bib"
 
@@ -146,22 +764,166 @@ def run_bib_to_tex_shared(sys_args, glossary_type, convert_func, logger):
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
     parser.add_argument("fpath", type=str,
-                        help='{} file path'.format(infile_ext),
+                        help="{} file path (or '-' for stdin)".format(
+                            infile_ext),
                         metavar='filepath')
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="read the input incrementally, and write each "
+                        "entry to stdout as soon as it is complete "
+                        "(in input order)")
+    parser.add_argument("--sort-buffer", type=float, metavar='MB',
+                        help="with --stream, output entries in sorted order "
+                        "(by key), buffering up to this much memory and "
+                        "spilling sorted runs to temporary files beyond it")
     parser.add_argument("-type", "--entry-type", type=str, metavar='str',
                         help="filter by single bibtex entry type")
+    parser.add_argument("-o", "--output", type=str, metavar='filepath',
+                        help="write the output to this path (instead of "
+                        "stdout), only replacing it if its content changed")
     parser.add_argument("-p2f", "--param2field", type=str, metavar='filepath',
                         help="path to a json file defining mapping of"
                         "glossaries parameters to bibtex fields "
                         "(will override defaults)")
+    parser.add_argument("-if", "--input-format", type=str,
+                        choices=("bib", "ndjson", "json", "packed"),
+                        help="input format, where json is a CSL-JSON or "
+                        "Better BibTeX JSON export, and packed is a library "
+                        "written with --output-format packed "
+                        "(default: inferred from the file)")
+    parser.add_argument("-of", "--output-format", type=str,
+                        choices=("tex", "ndjson", "packed"), default="tex",
+                        help="output format, where packed is a compact "
+                        "library, which can be memory-mapped (and shared) "
+                        "by subsequent conversions, without re-parsing")
+    parser.add_argument("--normalise", action="store_true",
+                        help="collapse whitespace, and convert LaTeX accent "
+                        "and escape macros to unicode, in field values")
+    parser.add_argument("-f", "--filter", type=str, metavar='str',
+                        action="append",
+                        help="filter entries by an expression of "
+                        + FILTER_HELP + " (may be given multiple times)")
+    parser.add_argument("--partition-by", type=str, metavar='str',
+                        help="route entries into separate output files, "
+                        "by " + PARTITION_HELP)
+    parser.add_argument("--partition-output", type=str, metavar='filepath',
+                        help="path template for partitioned output files, "
+                        "with '{}' replaced by the partition name")
+    parser.add_argument("--collate", action="store_true",
+                        help="write definitions in their final glossary "
+                        "order (by their sort, or else name/abbreviation, "
+                        "value), with letter group comments, for use with "
+                        "the glossaries sort=def option and "
+                        "\\makenoidxglossaries")
+    parser.add_argument("--locale", type=str, metavar='str',
+                        help="with --collate, collate by the rules of this "
+                        "locale (default: case and accent insensitive)")
+    parser.add_argument("--with-references", action="store_true",
+                        help="also output the entries (transitively) "
+                        "referenced by the parent and see parameters "
+                        "of the selected entries")
+    if lint_func is not None:
+        parser.add_argument("--lint", action="store_true",
+                            help="instead of converting, report duplicate "
+                            "keys, and keys with colliding or conflicting "
+                            "values (as JSON), exiting non-zero if any "
+                            "are found")
+    if check_func is not None:
+        parser.add_argument("--check", action="store_true",
+                            help="instead of converting, only validate the "
+                            "input (parse errors, unknown parameters, "
+                            "missing required fields and duplicate keys), "
+                            "exiting non-zero if any errors are found")
+        parser.add_argument("--fail-fast", action="store_true",
+                            help="with --check, stop at the first error")
+
+    parser.add_argument("--progress", action="store_true",
+                        help="report progress (entries, bytes read, "
+                        "throughput and time remaining) to stderr")
+    parser.add_argument("--progress-interval", type=float, metavar='float',
+                        default=DEFAULT_INTERVAL,
+                        help="minimum time between progress reports "
+                        "(seconds)")
+    parser.add_argument("--metrics-file", type=str, metavar='filepath',
+                        help="write the final conversion metrics "
+                        "(as JSON) to this path")
+    parser.add_argument("--depfile", type=str, metavar='filepath',
+                        help="write a Make/Ninja dependency file, listing "
+                        "the outputs and the inputs they were created from")
+    parser.add_argument("--depfile-target", type=str, metavar='filepath',
+                        action="append",
+                        help="an output path to list in the dependency file "
+                        "(e.g. when stdout is redirected to it)")
 
     args = parser.parse_args(sys_args)
     options = vars(args)
 
+    if options.get("partition_by", None):
+        try:
+            partition_func(options.get("partition_by"))
+        except ValueError as err:
+            parser.error(str(err))
+        if "{}" not in (options.get("partition_output", None) or ""):
+            parser.error("--partition-output must be given, containing '{}'")
+        if options.get("stream"):
+            parser.error("--stream cannot be used with --partition-by")
+    if options.get("lint") and (options.get("stream") or
+                                options.get("partition_by", None)):
+        parser.error("--lint cannot be used with --stream or --partition-by")
+    if options.get("check") and (options.get("stream") or
+                                 options.get("partition_by", None) or
+                                 options.get("lint")):
+        parser.error("--check cannot be used with "
+                     "--stream, --partition-by or --lint")
+    if options.get("fail_fast") and not options.get("check"):
+        parser.error("--fail-fast can only be used with --check")
+    if options.get("collate") and options.get("stream"):
+        parser.error("--collate cannot be used with --stream")
+    if options.get("with_references") and (
+            options.get("stream") or options.get("partition_by", None) or
+            options.get("output_format") == "ndjson"):
+        parser.error("--with-references cannot be used with --stream, "
+                     "--partition-by or --output-format ndjson")
+    if options.get("locale", None) and not options.get("collate"):
+        parser.error("--locale can only be used with --collate")
+    if options.get("sort_buffer", None) and not options.get("stream"):
+        parser.error("--sort-buffer can only be used with --stream")
+    if options.get("output", None) and (
+            options.get("partition_by", None) or options.get("lint") or
+            options.get("check")):
+        parser.error("--output cannot be used with "
+                     "--partition-by, --lint or --check")
+    if options.get("output_format") == "packed" and (
+            options.get("output", None) in (None, STDIO_PATH) or
+            options.get("stream") or options.get("collate") or
+            options.get("with_references")):
+        parser.error("--output-format packed requires --output (a file), "
+                     "and cannot be used with "
+                     "--stream, --collate or --with-references")
+    if options.get("output_format") == "packed" and path_compression(
+            options.get("output")):
+        parser.error("--output-format packed cannot be compressed "
+                     "(it is memory-mapped when read)")
+    if (options.get("input_format", None) == "packed" and
+            options.get("fpath") == STDIO_PATH):
+        parser.error("--input-format packed cannot be read from stdin")
+    if options.get("depfile", None):
+        if options.get("lint") or options.get("check"):
+            parser.error("--depfile cannot be used with --lint or --check")
+        if not (options.get("output", None) or
+                options.get("partition_by", None) or
+                options.get("depfile_target", None)):
+            parser.error("--depfile requires --output, --partition-by "
+                         "or --depfile-target")
+    elif options.get("depfile_target", None):
+        parser.error("--depfile-target can only be used with --depfile")
+
     setup_logger()
+    dependencies = make_dependencies(options)
 
-    fpath = os.path.abspath(options.pop('fpath'))
-    if not os.path.exists(fpath):
+    fpath = resolve_path(options.pop('fpath'))
+    if options.get("output", None):
+        options["output"] = resolve_path(options["output"])
+    if not input_exists(fpath):
         logger.critical(IOError('input path does not exist: {}'.format(fpath)))
         return ''
 
@@ -171,20 +933,160 @@ def run_bib_to_tex_shared(sys_args, glossary_type, convert_func, logger):
         logger.critical(err)
         return ''
 
-    with open(fpath) as file_obj:
-        in_str = file_obj.read()
+    entry_type = options.get('entry_type', None)
 
     try:
-        out_str_list = convert_func(in_str,
-                                    entry_type=options.get('entry_type', None),
-                                    param2field=param2field)
-    except Exception as err:
+        entry_filter = compile_filter(options.get("filter", None) or [])
+    except ValueError as err:
         logger.critical(err)
         return ''
 
-    if not out_str_list:
-        logger.warn("No bib entries found")
+    collation = None
+    if options.get("collate"):
+        try:
+            collation = make_collation_key(options.get("locale", None))
+        except ValueError as err:
+            logger.critical(err)
+            return ''
 
-    out_str_list.insert(0, "% Created by bib2glossary")
+    if options.get("check"):
+        with open_input(fpath) as file_obj:
+            return run_check(
+                lambda handler: (
+                    (entry, None) for entry in iter_bib_input(
+                        file_obj, fpath, entry_type, entry_filter, options,
+                        handler)),
+                check_func, param2field, logger,
+                fail_fast=options.get("fail_fast"))
 
-    return "\n".join(out_str_list) + "\n"
+    if options.get("lint"):
+        duplicates = {}
+        with open_input(fpath) as file_obj:
+            entries = iter_unique_entries(
+                ((glossary_type, entry, None) for entry in iter_bib_input(
+                    file_obj, fpath, entry_type, entry_filter, options,
+                    logger.warn)),
+                duplicates)
+            return run_lint(entries, lint_func, param2field, logger,
+                            duplicates=duplicates)
+
+    progress = make_progress(options, fpath)
+    try:
+        out_str = convert_bib_to_tex(fpath, entry_type, entry_filter,
+                                     options, convert_func, param2field,
+                                     logger, collation=collation,
+                                     progress=progress,
+                                     dependencies=dependencies,
+                                     converter_class=converter_class)
+    finally:
+        if progress is not None:
+            progress.finish(options.get("metrics_file", None))
+
+    if out_str is None:
+        # the conversion failed, so no dependencies are written
+        return ''
+    write_depfile(dependencies, options)
+    return out_str
+
+
+def convert_bib_to_tex(fpath, entry_type, entry_filter, options,
+                       convert_func, param2field, logger, collation=None,
+                       progress=None, dependencies=None,
+                       converter_class=None):
+    """convert a bib (ndjson or json) input to a tex (or ndjson) string,
+    or stream it to stdout (returning None if the conversion fails)"""
+    output_format = options.get("output_format")
+
+    if options.get("stream"):
+        try:
+            converter = converter_class(param2field, entry_type=None,
+                                        diagnostics=logger.warn)
+            with open_output(options.get("output", None) or STDIO_PATH) \
+                    as out_stream:
+                stream_bib_to_tex(fpath, entry_type, entry_filter, options,
+                                  converter, logger,
+                                  out_stream=out_stream, progress=progress)
+        except ValueError as err:
+            logger.critical(err)
+            return None
+        except BrokenPipeError:
+            # the reader has exited (e.g. piped to head), so stop quietly
+            discard_stdout()
+            sys.exit(1)
+        return ''
+
+    try:
+        with open_input(fpath) as file_obj:
+            input_format = get_input_format(options, fpath, "bib",
+                                            BIB_PATH_FORMATS,
+                                            BIB_MAGIC_FORMATS)
+            # the input is parsed as it is read, and each entry counted,
+            # so that progress is reported while parsing
+            if input_format == "packed":
+                entries = iter_packed(fpath, progress=progress)
+            elif input_format == "ndjson":
+                entries = iter_ndjson(file_obj)
+            elif input_format == "json":
+                entries = iter_json_entries(
+                    iter_chunks(file_obj, progress=progress),
+                    warning_handler=logger.warn)
+            else:
+                entries = iter_parse_bib(
+                    iter_chunks(file_obj, progress=progress))
+            entries = iter_counted(entries, progress)
+            if input_format not in ("packed", "ndjson", "json"):
+                # the last definition of a duplicate key is kept
+                # (as for parse_bib)
+                entries = {entry['ID']: entry for entry in entries}.values()
+            entries = iter_normalised(entries, options)
+            # the entries are already counted
+            progress = None
+            if options.get("with_references"):
+                # the references are selected from the whole input
+                entries = list(entries)
+            else:
+                entries = [entry for entry in entries
+                           if (not entry_type or
+                               entry_type == entry.get('ENTRYTYPE'))
+                           and entry_filter(entry)]
+
+        if output_format == "packed":
+            count = write_packed(entries, options.get("output"))
+            logger.info("Written {0} entries to {1}".format(
+                count, options.get("output")))
+            return ''
+
+        if options.get("partition_by", None):
+            partitions = partition_entries(entries,
+                                           options.get("partition_by"),
+                                           warning_handler=logger.warn)
+            outpaths = partition_paths(options.get("partition_output"),
+                                       list(partitions))
+            for name, part_entries in sorted(partitions.items()):
+                outpath = outpaths[name]
+                out_str = format_entries(part_entries, output_format,
+                                         convert_func, param2field, logger,
+                                         collation=collation,
+                                         progress=progress)
+                write_file(outpath, out_str, len(part_entries), logger)
+                if dependencies is not None:
+                    dependencies.add_output(outpath)
+            if not partitions:
+                logger.warn("No bib entries found")
+            return ''
+
+        if options.get("with_references"):
+            out_str = format_entries(entries, output_format,
+                                     convert_func, param2field, logger,
+                                     collation=collation, progress=progress,
+                                     entry_type=entry_type,
+                                     entry_filter=entry_filter,
+                                     references=True)
+        else:
+            out_str = format_entries(entries, output_format,
+                                     convert_func, param2field, logger,
+                                     collation=collation, progress=progress)
+        return return_output(out_str, options, logger)
+    except Exception as err:
+        logger.critical(err)
+        return None
@@ -0,0 +1,283 @@
+"""reading of inputs and writing of outputs,
+including from stdin, and with transparent (de)compression
+
+Compressed inputs are detected by their file extension or magic bytes,
+and compressed outputs by their file extension.
+Both are (de)compressed incrementally, as the text is read or written.
+
+Outputs are written to a temporary file alongside the target path,
+which only replaces the target (atomically) if its content has changed,
+so that an unchanged output keeps its modification time,
+and does not trigger downstream rebuilds.
+"""
+import bz2
+import codecs
+import contextlib
+import gzip
+import hashlib
+import io
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+
+STDIO_PATH = "-"
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+_OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+_DECOMPRESSORS = {"gzip": lambda binary: gzip.GzipFile(fileobj=binary),
+                  "bz2": bz2.BZ2File,
+                  "xz": lzma.LZMAFile}
+_MAGIC_SIZE = 10
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def resolve_path(path):
+    """return an absolute path, or '-' for stdin/stdout"""
+    if path == STDIO_PATH:
+        return path
+    return os.path.abspath(path)
+
+
+def input_exists(path):
+    """test whether an input path (or stdin) exists"""
+    return path == STDIO_PATH or os.path.exists(path)
+
+
+def strip_compression(path):
+    """remove a compression extension from a path, if present"""
+    root, ext = os.path.splitext(path)
+    if ext.lower() in COMPRESSION_EXTENSIONS:
+        return root
+    return path
+
+
+def path_compression(path):
+    """return the compression implied by a path extension, or None"""
+    ext = os.path.splitext(path)[1].lower()
+    return COMPRESSION_EXTENSIONS.get(ext, None)
+
+
+def detect_compression(header):
+    """return the compression identified by the magic bytes at the start
+    of a file, or None"""
+    if header.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if header.startswith(b"\xfd7zXZ\x00"):
+        return "xz"
+    # 'BZh', a block size digit, then the block magic number
+    if (header[:3] == b"BZh" and header[3:4].isdigit() and
+            header[4:10] == b"1AY&SY"):
+        return "bz2"
+    return None
+
+
+def _peek(binary):
+    """return the leading bytes of a binary stream, without consuming them"""
+    if not hasattr(binary, "peek"):
+        return b""
+    return binary.peek(_MAGIC_SIZE)[:_MAGIC_SIZE]
+
+
+@contextlib.contextmanager
+def open_input(path):
+    """open an input path for reading text, or stdin for '-',
+    decompressing it if it is compressed
+
+    stdin is not closed on exit
+    """
+    if path == STDIO_PATH:
+        binary = getattr(sys.stdin, "buffer", None)
+        compression = None if binary is None else detect_compression(
+            _peek(binary))
+        if compression is None:
+            yield sys.stdin
+            return
+        # closing the decompressor does not close the underlying stream
+        with io.TextIOWrapper(_DECOMPRESSORS[compression](binary),
+                              encoding=sys.stdin.encoding) as file_obj:
+            yield file_obj
+        return
+
+    compression = path_compression(path)
+    if compression is None:
+        with open(path, "rb") as binary:
+            compression = detect_compression(_peek(binary))
+    if compression is None:
+        with open(path) as file_obj:
+            yield file_obj
+    else:
+        with _OPENERS[compression](path, "rt") as file_obj:
+            yield file_obj
+
+
+def _compressor(compression, binary, path):
+    """wrap a binary stream to compress the data written to it
+    (gzip is written with a fixed timestamp and name,
+    so that the same text always gives the same bytes)"""
+    if compression == "gzip":
+        return gzip.GzipFile(filename=os.path.basename(path), mode="wb",
+                             fileobj=binary, mtime=0)
+    if compression == "bz2":
+        return bz2.BZ2File(binary, "wb")
+    return lzma.LZMAFile(binary, "wb")
+
+
+def file_hash(path):
+    """return the sha256 digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as binary:
+        for data in iter(lambda: binary.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(data)
+    return digest.digest()
+
+
+def _default_mode():
+    """return the permissions of a new file, under the current umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def replace_if_changed(temp_path, path):
+    """atomically replace path with temp_path,
+    unless path already exists with the same content
+    (in which case temp_path is removed)
+
+    Returns
+    -------
+    changed: bool
+
+    """
+    if (os.path.isfile(path) and
+            os.path.getsize(path) == os.path.getsize(temp_path) and
+            file_hash(path) == file_hash(temp_path)):
+        os.remove(temp_path)
+        return False
+    if os.path.exists(path):
+        shutil.copymode(path, temp_path)
+    else:
+        os.chmod(temp_path, _default_mode())
+    os.replace(temp_path, path)
+    return True
+
+
+@contextlib.contextmanager
+def _open_temp(path, binary_mode=False):
+    """open a temporary file, alongside an output path, for writing text
+    (compressing it if the path has a compression extension),
+    or bytes (uncompressed) if binary_mode,
+    yielding (file object, temporary path);
+    the temporary file is removed if an exception is raised"""
+    fdesc, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".",
+        prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with io.open(fdesc, "wb") as binary:
+            if binary_mode:
+                yield binary, temp_path
+                return
+            compression = path_compression(path)
+            raw = binary if compression is None \
+                else _compressor(compression, binary, path)
+            with io.TextIOWrapper(raw) as file_obj:
+                yield file_obj, temp_path
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+@contextlib.contextmanager
+def open_output(path):
+    """open an output path for writing text, or stdout for '-',
+    compressing it if it has a compression extension
+
+    The text is written to a temporary file, which replaces the path on exit,
+    only if its content has changed (see replace_if_changed).
+    stdout is not closed on exit
+    """
+    if path == STDIO_PATH:
+        yield sys.stdout
+        return
+    with _open_temp(path) as (file_obj, temp_path):
+        yield file_obj
+    replace_if_changed(temp_path, path)
+
+
+@contextlib.contextmanager
+def open_binary_output(path):
+    """open an output path for writing bytes
+    (replacing it only if its content has changed, see open_output)"""
+    with _open_temp(path, binary_mode=True) as (binary, temp_path):
+        yield binary
+    replace_if_changed(temp_path, path)
+
+
+def write_output(path, text):
+    """write text to an output path, or stdout for '-'
+    (see open_output)
+
+    Returns
+    -------
+    changed: bool
+        whether the path was (re)written
+
+    """
+    if path == STDIO_PATH:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return True
+    with _open_temp(path) as (file_obj, temp_path):
+        file_obj.write(text)
+    return replace_if_changed(temp_path, path)
+
+
+def discard_stdout():
+    """point stdout at the null device,
+    e.g. once the reader of a pipe has exited (raising BrokenPipeError),
+    so that flushing it again (at exit) does not raise a further error"""
+    try:
+        fileno = sys.stdout.fileno()
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        sys.stdout = open(os.devnull, "w")
+        return
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, fileno)
+    os.close(devnull)
+
+
+def iter_chunks(file_obj, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """iterate over consecutive chunks of text from a file object
+
+    Where possible, the underlying binary buffer is read with ``read1``,
+    so that a chunk is yielded as soon as any data is available
+    (e.g. from a pipe), rather than waiting for a full chunk.
+    As when reading the text layer, line endings are translated to ``\n``.
+    If given, the (decompressed) bytes read are counted by the
+    progress reporter (bib2glossary.shared.progress.Progress).
+    """
+    binary = getattr(file_obj, "buffer", None)
+    if binary is None or not hasattr(binary, "read1"):
+        while True:
+            chunk = file_obj.read(chunk_size)
+            if not chunk:
+                return
+            if progress is not None:
+                progress.update(nbytes=len(chunk))
+            yield chunk
+
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(
+            getattr(file_obj, "encoding", None) or "utf8")(),
+        translate=True)
+    while True:
+        data = binary.read1(chunk_size)
+        if progress is not None:
+            progress.update(nbytes=len(data))
+        chunk = decoder.decode(data, final=not data)
+        if chunk:
+            yield chunk
+        if not data:
+            return
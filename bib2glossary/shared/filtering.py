@@ -0,0 +1,90 @@
+"""compiled filter expressions for bib entries
+
+A filter expression is a whitespace separated list of terms,
+all of which must match for an entry to be selected:
+
+- ``type:<type>[,<type>...]``: the entry type is one of the types
+- ``key:<glob>[,<glob>...]``: the key matches one of the glob patterns
+- ``keyre:<regex>``: the key matches the regular expression (anywhere)
+- ``has:<field>[,<field>...]``: the entry has all of the fields
+- ``field:<field>=<value>``: the field is equal to the value
+
+Values containing whitespace may be quoted, e.g. ``field:journal="A name"``.
+"""
+import fnmatch
+import re
+import shlex
+
+FILTER_HELP = ("whitespace separated terms, all of which must match: "
+               "type:<type>[,...], key:<glob>[,...], keyre:<regex>, "
+               "has:<field>[,...], field:<field>=<value>")
+
+
+def _compile_term(term):
+    """compile a single filter term to a predicate function"""
+    kind, sep, value = term.partition(":")
+    if not sep or not value:
+        raise ValueError("filter term must be <kind>:<value>, "
+                         "not: {}".format(term))
+
+    if kind == "type":
+        types = frozenset(value.split(","))
+        return lambda entry: entry.get("ENTRYTYPE", "") in types
+    if kind == "key":
+        regex = re.compile("|".join(
+            fnmatch.translate(pattern) for pattern in value.split(",")))
+        return lambda entry: regex.match(entry["ID"]) is not None
+    if kind == "keyre":
+        try:
+            regex = re.compile(value)
+        except re.error as err:
+            raise ValueError(
+                "invalid filter regex '{0}': {1}".format(value, err))
+        return lambda entry: regex.search(entry["ID"]) is not None
+    if kind == "has":
+        fields = tuple(value.split(","))
+        return lambda entry: all(field in entry for field in fields)
+    if kind == "field":
+        field, sep, field_value = value.partition("=")
+        if not sep:
+            raise ValueError("filter term must be field:<field>=<value>, "
+                             "not: {}".format(term))
+        return lambda entry: entry.get(field, None) == field_value
+
+    raise ValueError("unknown filter kind '{0}' in: {1}".format(kind, term))
+
+
+def compile_filter(expression):
+    """compile a filter expression to a predicate function
+
+    Parameters
+    ----------
+    expression: str or list of str
+        the filter expression (or a list of expressions, all of which must
+        match)
+
+    Returns
+    -------
+    func: entry -> bool
+
+    """
+    if isinstance(expression, str):
+        expression = [expression]
+    terms = [term for expr in expression for term in shlex.split(expr)]
+    predicates = tuple(_compile_term(term) for term in terms)
+
+    def entry_filter(entry):
+        for predicate in predicates:
+            if not predicate(entry):
+                return False
+        return True
+
+    return entry_filter
+
+
+def get_filter(entry_filter):
+    """return a predicate function for a filter expression,
+    predicate function or None"""
+    if entry_filter is None or callable(entry_filter):
+        return entry_filter
+    return compile_filter(entry_filter)
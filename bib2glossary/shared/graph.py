@@ -0,0 +1,228 @@
+"""a reference graph, for the parent and see cross-references of entries
+
+Hierarchical glossaries use the ``parent`` parameter (which must be defined
+before the child) and the ``see`` parameter (a comma separated list of keys,
+optionally preceded by a ``[<tag>]``).
+While reading the entries, each key is indexed with the keys it references,
+so that, in linear time:
+
+- references to keys that are not defined (dangling) can be found
+- cycles of parent references can be found
+  (``see`` references may legitimately be mutual)
+- the transitive closure of a set of keys can be computed,
+  to select a subset of entries along with all the entries they reference
+- entries can be ordered with parents before their children
+  (including as they are streamed)
+"""
+from operator import itemgetter
+
+PARENT_PARAM = "parent"
+SEE_PARAM = "see"
+REFERENCE_PARAMS = (PARENT_PARAM, SEE_PARAM)
+
+
+def parse_references(value):
+    """parse the keys of a reference value,
+    e.g. ``a``, ``a,b``, ``{a, b}`` or ``[see also]{a,b}``"""
+    value = value.strip()
+    if value.startswith("["):
+        value = value.partition("]")[2].strip()
+    if value.startswith("{") and value.endswith("}"):
+        value = value[1:-1]
+    return [key.strip() for key in value.split(",") if key.strip()]
+
+
+class ReferenceGraph(object):
+    """an index of the keys referenced by each entry
+
+    Parameters
+    ----------
+    param2field: dict
+        mapping of glossaries parameter to bib field;
+        only the reference parameters present in it are indexed
+    params: sequence of str
+        the reference parameters
+
+    """
+
+    def __init__(self, param2field, params=REFERENCE_PARAMS):
+        self._fields = tuple((param, param2field[param]) for param in params
+                             if param in param2field)
+        #: the reference parameters which are indexed
+        self.params = tuple(param for param, _ in self._fields)
+        # {key: ((param, target), ...)}, in the order keys were added
+        self.references = {}
+        self.parents = {}
+        self.rows = {}
+
+    def __contains__(self, key):
+        return key in self.references
+
+    def add(self, entry, row=None):
+        """index the references of an entry (the first definition of a key
+        is kept)"""
+        key = entry['ID']
+        if key in self.references:
+            return
+        references = []
+        for param, field in self._fields:
+            if field not in entry:
+                continue
+            targets = parse_references(entry[field])
+            references.extend((param, target) for target in targets)
+            if param == PARENT_PARAM and targets:
+                self.parents[key] = targets[0]
+        self.references[key] = tuple(references)
+        self.rows[key] = row
+
+    def dangling(self, keys=None):
+        """find references to keys that are not defined
+
+        Parameters
+        ----------
+        keys: None or set
+            if given, the keys which are defined
+            (e.g. a selected subset), otherwise all indexed keys
+
+        Returns
+        -------
+        dangling: list of tuple
+            (key, param, target), in the order the keys were added
+
+        """
+        if keys is None:
+            keys = self.references
+        return [(key, param, target)
+                for key, references in self.references.items()
+                if key in keys
+                for param, target in references if target not in keys]
+
+    def cycles(self):
+        """find cycles of parent references
+
+        Returns
+        -------
+        cycles: list of list
+            the keys of each cycle, starting from the first one added
+
+        """
+        # each key has at most one parent, so each walk up the parents
+        # either reaches a visited key, or a key first reached on this walk
+        # (closing a new cycle), and each key is walked at most once
+        visited = {}
+        cycles = []
+        for index, start in enumerate(self.references):
+            key = start
+            path = []
+            while key in self.references and key not in visited:
+                visited[key] = index
+                path.append(key)
+                key = self.parents.get(key, None)
+            if key in visited and visited[key] == index:
+                cycles.append(path[path.index(key):])
+        return cycles
+
+    def closure(self, keys):
+        """return the transitive closure of a set of keys,
+        i.e. the keys along with all the (defined) keys they reference"""
+        closed = set()
+        stack = [key for key in keys if key in self.references]
+        while stack:
+            key = stack.pop()
+            if key in closed:
+                continue
+            closed.add(key)
+            stack.extend(target for _, target in self.references[key]
+                         if target in self.references
+                         and target not in closed)
+        return closed
+
+    def order(self, entries):
+        """order entries so that each parent is before its children,
+        otherwise preserving their order
+
+        A child whose parent is in the entries, but not yet reached,
+        is deferred until directly after its parent.
+        Entries in a parent cycle are placed at the end.
+
+        Parameters
+        ----------
+        entries: iterable of dict
+            {'ID': <key>, ...}
+
+        Returns
+        -------
+        entries: list of dict
+
+        """
+        entries = list(entries)
+        included = set(entry['ID'] for entry in entries)
+        placed = set()
+        waiting = {}
+        emitted = [False] * len(entries)
+        ordered = []
+        for index, entry in enumerate(entries):
+            parent = self.parents.get(entry['ID'], None)
+            if parent in included and parent not in placed:
+                waiting.setdefault(parent, []).append(index)
+                continue
+            stack = [index]
+            while stack:
+                current = stack.pop()
+                key = entries[current]['ID']
+                emitted[current] = True
+                placed.add(key)
+                ordered.append(entries[current])
+                stack.extend(reversed(waiting.pop(key, [])))
+        ordered.extend(entry for entry, done in zip(entries, emitted)
+                       if not done)
+        return ordered
+
+    def iter_order(self, entries):
+        """iterate over entries as they are read (indexing each one),
+        so that each parent is before its children
+
+        A child whose parent has not yet been reached is held back,
+        until directly after its parent (as for order).
+        Children whose parent is never reached (undefined, or in a cycle)
+        are yielded at the end, in the order they were read.
+
+        Parameters
+        ----------
+        entries: iterable of dict
+            {'ID': <key>, ...}
+
+        Yields
+        ------
+        entry: dict
+
+        """
+        placed = set()
+        waiting = {}
+        emitted = set()
+
+        def release(index, entry):
+            stack = [(index, entry)]
+            while stack:
+                index, entry = stack.pop()
+                if index in emitted:
+                    continue
+                emitted.add(index)
+                placed.add(entry['ID'])
+                yield entry
+                stack.extend(reversed(waiting.pop(entry['ID'], [])))
+
+        for index, entry in enumerate(entries):
+            self.add(entry)
+            parent = self.parents.get(entry['ID'], None)
+            if parent is not None and parent not in placed:
+                waiting.setdefault(parent, []).append((index, entry))
+                continue
+            for released in release(index, entry):
+                yield released
+
+        held = sorted((pair for children in waiting.values()
+                       for pair in children), key=itemgetter(0))
+        for index, entry in held:
+            for released in release(index, entry):
+                yield released
@@ -0,0 +1,68 @@
+"""resource limits, to protect against pathological inputs"""
+import time
+
+DEFAULT_MAX_DEPTH = 100
+
+
+class LimitExceeded(ValueError):
+    """raised when an input exceeds a configured resource limit"""
+
+
+class ParseLimits(object):
+    """resource limits for parsing an input
+
+    Parameters
+    ----------
+    max_depth: None or int
+        maximum nesting depth of brace groups
+    max_entry_size: None or int
+        maximum number of characters in a single entry definition
+    max_entries: None or int
+        maximum number of entry definitions
+    timeout: None or float
+        wall-clock budget for the parse (seconds)
+
+    """
+
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, max_entry_size=None,
+                 max_entries=None, timeout=None):
+        self.max_depth = max_depth
+        self.max_entry_size = max_entry_size
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+    def __repr__(self):
+        return ("ParseLimits(max_depth={0}, max_entry_size={1}, "
+                "max_entries={2}, timeout={3})".format(
+                    self.max_depth, self.max_entry_size,
+                    self.max_entries, self.timeout))
+
+    def start_clock(self):
+        """return the deadline for a parse starting now (or None)"""
+        if self.timeout is None:
+            return None
+        return time.monotonic() + self.timeout
+
+    def check_depth(self, depth, row):
+        if self.max_depth is not None and depth > self.max_depth:
+            raise LimitExceeded(
+                "(row {0}) nesting depth exceeds the maximum of {1}".format(
+                    row, self.max_depth))
+
+    def check_entry_size(self, size, row, name):
+        if self.max_entry_size is not None and size > self.max_entry_size:
+            raise LimitExceeded(
+                "(row {0}) \\{1} definition exceeds the maximum size "
+                "of {2} characters".format(row, name, self.max_entry_size))
+
+    def check_entries(self, count, row):
+        if self.max_entries is not None and count > self.max_entries:
+            raise LimitExceeded(
+                "(row {0}) number of entries exceeds "
+                "the maximum of {1}".format(row, self.max_entries))
+
+    def check_deadline(self, deadline, row):
+        if deadline is not None and time.monotonic() > deadline:
+            raise LimitExceeded(
+                "(row {0}) parse exceeded the time budget "
+                "of {1} seconds".format(row, self.timeout))
@@ -0,0 +1,125 @@
+"""linting of entries, for collisions and conflicts between keys
+
+While streaming through the entries, each (mapped) parameter value is
+normalised to a fingerprint, and the entry key is added to a hash index
+of that fingerprint, so collisions are found in linear time,
+without any pairwise comparison of entries.
+The following issues are reported:
+
+- ``duplicate-key``: the same key is defined more than once
+- ``collision``: different keys have the same value for a parameter
+  (e.g. the same long name or description)
+- ``conflict``: different keys have the same value for the primary parameter
+  (e.g. the abbreviation), but different values for the secondary parameter
+  (e.g. the long name)
+"""
+import json
+import re
+
+DUPLICATE_KEY = "duplicate-key"
+COLLISION = "collision"
+CONFLICT = "conflict"
+
+_CONTROL = re.compile(r"\\[A-Za-z@]*")
+_CONTROL_SYMBOL = re.compile(r"\\([^A-Za-z@\s])")
+_BRACES = re.compile(r"[{}]")
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def fingerprint(value, symbols=False):
+    """normalise a value, ignoring case, whitespace, punctuation,
+    braces and latex control sequences
+
+    If symbols is True, punctuation is kept, and escaped symbols
+    (e.g. ``\\#``) are unescaped, so that abbreviations
+    such as ``C++``, ``C\\#`` and ``C`` remain distinct.
+    """
+    if symbols:
+        value = _CONTROL_SYMBOL.sub(r"\1", value)
+    value = _BRACES.sub("", _CONTROL.sub(" ", value))
+    if not symbols:
+        value = _PUNCTUATION.sub(" ", value)
+    return " ".join(value.split()).casefold()
+
+
+def lint_entries(entries, param2field, params, duplicates=None):
+    """find collisions and conflicts between entries
+
+    Parameters
+    ----------
+    entries: iterable of dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+    param2field: dict
+        mapping of glossaries parameter to bib field
+    params: sequence of str
+        the parameters to index; for the first (primary) parameter,
+        keys sharing a value are a conflict if their second (secondary)
+        parameter values differ, and a collision otherwise
+        (punctuation is significant in primary values)
+    duplicates: None or dict
+        {<key>: [row, ...]} of keys defined more than once
+
+    Returns
+    -------
+    issues: list of dict
+        {"kind": <kind>, "param": <param>, "value": <value>,
+         "keys": [<key>, ...]} (conflicts also have "values": [<value>, ...],
+         the distinct secondary values),
+        sorted by kind, parameter and value
+    count: int
+        the number of entries linted
+
+    """
+    fields = [(param, param2field[param]) for param in params
+              if param in param2field]
+    # {param: {fingerprint: [(key, value), ...]}}
+    indexes = {param: {} for param, _ in fields}
+    secondary = {}
+    count = 0
+
+    for entry in entries:
+        count += 1
+        key = entry['ID']
+        for index, (param, field) in enumerate(fields):
+            if field not in entry:
+                continue
+            indexes[param].setdefault(
+                fingerprint(entry[field], symbols=index == 0),
+                []).append((key, entry[field]))
+        if len(fields) > 1 and fields[1][1] in entry:
+            secondary[key] = entry[fields[1][1]]
+
+    issues = []
+    for key, rows in (duplicates or {}).items():
+        issues.append({"kind": DUPLICATE_KEY, "param": "key", "value": key,
+                       "keys": [key],
+                       "rows": [row for row in rows if row is not None]})
+
+    for index, (param, _) in enumerate(fields):
+        for matches in indexes[param].values():
+            keys = sorted(set(key for key, _ in matches))
+            if len(keys) < 2:
+                continue
+            issue = {"kind": COLLISION, "param": param,
+                     "value": matches[0][1], "keys": keys}
+            if index == 0:
+                values = {}
+                for key in keys:
+                    if key in secondary:
+                        values.setdefault(fingerprint(secondary[key]),
+                                          secondary[key])
+                if len(values) > 1:
+                    issue["kind"] = CONFLICT
+                    issue["values"] = sorted(values.values())
+            issues.append(issue)
+
+    issues.sort(key=lambda issue: (issue["kind"], issue["param"],
+                                   issue["value"]))
+    return issues, count
+
+
+def format_lint_report(issues, count):
+    """create a JSON report of lint issues"""
+    report = {"entries": count, "issues": issues}
+    return json.dumps(report, indent=2, sort_keys=True,
+                      ensure_ascii=False) + "\n"
@@ -0,0 +1,342 @@
+"""a table-driven registry of glossary definition macros
+
+Each macro is registered with its argument layout,
+and its default mapping of glossaries parameters to bib fields.
+All registered macros can then be extracted in a single scan of the text.
+"""
+from collections import namedtuple
+
+from TexSoup import TexSoup
+from TexSoup.data import OArg
+
+from bib2glossary.shared.parsing import (raise_IOError,
+                                         extract_required_val,
+                                         extract_parameters,
+                                         create_msg_error)
+from bib2glossary.shared.texscan import iter_macros_stream
+
+ABBREVIATION_P2F = (("abbreviation", "shorttitle"),
+                    ("longname", "journal"),
+                    ("description", "abstract"),
+                    ("plural", "series"),
+                    ("longplural", "isbn"),
+                    ("firstplural", "address"))
+
+GLOSSARY_P2F = (("name", "journal"),
+                ("description", "abstract"),
+                ("plural", "series"),
+                ("symbol", "volume"),
+                ("text", "edition"),
+                ("sort", "publisher"))
+
+MacroSpec = namedtuple("MacroSpec", ["name", "label", "layout", "param2field",
+                                     "nargs"])
+MacroSpec.__doc__ = """specification of a glossary definition macro
+
+Parameters
+----------
+name: str
+    the macro name (without the leading backslash)
+label: str
+    a description of the entry, for error messages
+layout: func
+    function (spec, node, param2field, row, warning_handler) -> fields,
+    returning a dict {'ID': <key>, <field>: <value>, ...}
+    or None if the definition could not be parsed
+param2field: tuple
+    default mapping of glossaries parameter to bib field
+nargs: int
+    the number of required arguments, after which the definition ends
+
+"""
+
+
+def _map_params(params, param2field, fields, key, kind, warning_handler):
+    """map parameters to fields, reporting unknown or duplicate ones"""
+    for param_name, param_value in params.items():
+        if param_name not in param2field:
+            warning_handler(
+                "{0} '{1}' in key '{2}' not recognised".format(
+                    kind, param_name, key))
+            continue
+        if param2field[param_name] in fields:
+            warning_handler(
+                "duplicate parameter '{0}' in key '{1}'".format(
+                    param_name, key))
+            continue
+        fields[param2field[param_name]] = param_value
+
+
+def abbreviation_layout(spec, node, param2field, row, warning_handler):
+    """layout: ``\\macro[<options>]{<key>}{<abbreviation>}{<longname>}``"""
+    arguments = list(node.args)
+
+    if len(arguments) < 3:
+        warning_handler(create_msg_error(
+            "could not parse {} (too few arguments)".format(spec.label),
+            node, row))
+        return None
+    if len(arguments) > 4:
+        warning_handler(create_msg_error(
+            "could not parse {} (too many arguments)".format(spec.label),
+            node, row))
+        return None
+
+    param2field = dict(param2field)
+    assert "abbreviation" in param2field
+    assert "longname" in param2field
+    abbrev_field = param2field.pop("abbreviation")
+    name_field = param2field.pop("longname")
+
+    key = extract_required_val(arguments[-3])
+    fields = {'ID': key,
+              abbrev_field: extract_required_val(arguments[-2]),
+              name_field: extract_required_val(arguments[-1])}
+
+    if len(arguments) == 4:
+        options = arguments[0]
+
+        if not isinstance(options, OArg):
+            warning_handler(create_msg_error(
+                "expected first argument to be 'optional", node, row))
+            return None
+
+        opt_params, errors = extract_parameters(options)
+
+        for error in errors:
+            warning_handler(create_msg_error(
+                "error reading 'optional' block: {}".format(error),
+                node, row))
+
+        _map_params(opt_params, param2field, fields, key, "option",
+                    warning_handler)
+
+    return fields
+
+
+def glossary_layout(spec, node, param2field, row, warning_handler):
+    """layout: ``\\macro{<key>}{<parameters>}``"""
+    arguments = list(node.args)
+
+    if len(arguments) != 2:
+        warning_handler(create_msg_error(
+            "could not parse {} (arguments != 2)".format(spec.label),
+            node, row))
+        return None
+
+    key = extract_required_val(arguments[0])
+    fields = {'ID': key}
+
+    params, errors = extract_parameters(arguments[1])
+
+    for error in errors:
+        warning_handler(create_msg_error(
+            "error reading 'parameter' block: {}".format(error),
+            node, row))
+
+    _map_params(params, param2field, fields, key, "parameter",
+                warning_handler)
+
+    return fields
+
+
+def long_glossary_layout(spec, node, param2field, row, warning_handler):
+    """layout: ``\\macro{<key>}{<parameters>}{<description>}``"""
+    arguments = list(node.args)
+
+    if len(arguments) != 3:
+        warning_handler(create_msg_error(
+            "could not parse {} (arguments != 3)".format(spec.label),
+            node, row))
+        return None
+
+    key = extract_required_val(arguments[0])
+    fields = {'ID': key}
+
+    params, errors = extract_parameters(arguments[1])
+    if "description" in params:
+        errors.append("parameter 'description' already defined")
+        params.pop("description")
+    params["description"] = extract_required_val(arguments[2])
+
+    for error in errors:
+        warning_handler(create_msg_error(
+            "error reading 'parameter' block: {}".format(error),
+            node, row))
+
+    _map_params(params, param2field, fields, key, "parameter",
+                warning_handler)
+
+    return fields
+
+
+MACROS = {}
+
+
+def register_macro(spec):
+    """register a glossary definition macro
+
+    Parameters
+    ----------
+    spec: MacroSpec
+
+    """
+    MACROS[spec.name] = spec
+
+
+register_macro(MacroSpec("newacronym", "acronym",
+                         abbreviation_layout, ABBREVIATION_P2F, 3))
+register_macro(MacroSpec("newabbreviation", "abbreviation",
+                         abbreviation_layout, ABBREVIATION_P2F, 3))
+register_macro(MacroSpec("newglossaryentry", "glossary entry",
+                         glossary_layout, GLOSSARY_P2F, 2))
+register_macro(MacroSpec("longnewglossaryentry", "glossary entry",
+                         long_glossary_layout, GLOSSARY_P2F, 3))
+
+
+def iter_definitions(chunks, macros=None, entry_type='misc',
+                     param2field=None, warning_handler=None, limits=None,
+                     progress=None):
+    """iterate over the definitions of registered macros,
+    in chunks of tex text
+
+    Parameters
+    ----------
+    chunks: iterable of str
+        the .tex file text, in consecutive chunks
+    macros: None or list of str or dict
+        the macro names to extract (default is all registered macros),
+        or a mapping of macro name to the entry type for its bib items
+    entry_type: str
+        the (default) entry type for each bib item
+    param2field: None or dict
+        mapping of glossaries parameter to bib field
+        (will override the defaults of each macro)
+    warning_handler: func
+        function taking a warning message (default is to raise IOError)
+    limits: None or bib2glossary.shared.limits.ParseLimits
+        resource limits for parsing (default is ParseLimits())
+    progress: None or bib2glossary.shared.progress.Progress
+        if given, count the parsed and skipped definitions
+
+    Yields
+    ------
+    name: str
+        the macro name
+    entry: dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+    row: int
+        the row at which the definition starts
+
+    """
+    if warning_handler is None:
+        warning_handler = raise_IOError
+
+    if macros is None:
+        macros = sorted(MACROS)
+    if not isinstance(macros, dict):
+        macros = {name: None for name in macros}
+
+    specs = {}
+    mappings = {}
+    entry_types = {}
+    for name, macro_type in macros.items():
+        if name not in MACROS:
+            raise ValueError("macro not registered: {}".format(name))
+        specs[name] = MACROS[name]
+        mapping = dict(MACROS[name].param2field)
+        if param2field is not None:
+            mapping.update(param2field)
+        mappings[name] = mapping
+        entry_types[name] = macro_type or entry_type
+
+    nargs = {name: spec.nargs for name, spec in specs.items()}
+    for name, definition, row in iter_macros_stream(chunks, nargs,
+                                                    limits=limits):
+
+        spec = specs[name]
+        node = TexSoup(definition).find(name)
+        fields = spec.layout(spec, node, mappings[name], row,
+                             warning_handler)
+        if fields is None:
+            if progress is not None:
+                progress.update(skipped=1)
+            continue
+
+        fields['ENTRYTYPE'] = entry_types[name]
+        if progress is not None:
+            progress.update(entries=1)
+        yield name, fields, row
+
+
+def iter_unique_definitions(definitions, duplicates):
+    """iterate over definitions, skipping those with duplicate keys
+
+    Parameters
+    ----------
+    definitions: iterable of tuple
+        (<macro>, {'ID': <key>, <field>: <value>, ...}, <row>)
+    duplicates: dict
+        updated with the rows of skipped definitions {<key>: [row, ...]}
+
+    Yields
+    ------
+    definition: tuple
+        (<macro>, {'ID': <key>, <field>: <value>, ...}, <row>)
+
+    """
+    keys = set()
+    for definition in definitions:
+        key = definition[1]['ID']
+        if key in keys:
+            duplicates.setdefault(key, []).append(definition[2])
+            continue
+        keys.add(key)
+        yield definition
+
+
+def extract_definitions(text_str, macros=None, entry_type='misc',
+                        param2field=None, warning_handler=None, limits=None,
+                        progress=None):
+    """extract the definitions of registered macros, in a single scan
+
+    Parameters
+    ----------
+    text_str: str
+        the .tex file string
+    macros: None or list of str or dict
+        the macro names to extract (default is all registered macros),
+        or a mapping of macro name to the entry type for its bib items
+    entry_type: str
+        the (default) entry type for each bib item
+    param2field: None or dict
+        mapping of glossaries parameter to bib field
+        (will override the defaults of each macro)
+    warning_handler: func
+        function taking a warning message (default is to raise IOError)
+    limits: None or bib2glossary.shared.limits.ParseLimits
+        resource limits for parsing (default is ParseLimits())
+    progress: None or bib2glossary.shared.progress.Progress
+        if given, count the parsed and skipped definitions
+
+    Returns
+    -------
+    entries: dict {<macro>: [{<field>: <value>, ...}, ...]}
+    duplicates: dict {<key>: [row, ...]}
+
+    """
+    if macros is None:
+        macros = sorted(MACROS)
+
+    entries = {name: [] for name in macros}
+    duplicates = {}
+
+    for name, fields, _ in iter_unique_definitions(
+            iter_definitions(
+                [text_str], macros, entry_type=entry_type,
+                param2field=param2field, warning_handler=warning_handler,
+                limits=limits, progress=progress),
+            duplicates):
+        entries[name].append(fields)
+
+    return entries, duplicates
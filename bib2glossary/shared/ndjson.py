@@ -0,0 +1,102 @@
+"""newline-delimited JSON entry format
+
+Each line holds a single entry, as a JSON object of the form::
+
+    {"key": "thekey", "type": "misc", "fields": {"journal": "name"}}
+
+where the fields are the (mapped) bib fields of the entry.
+Reading and writing both operate one entry at a time,
+so entries can be streamed between conversion stages with constant memory,
+and without any LaTeX/BibTeX parsing.
+"""
+import json
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+def entry_to_json(entry):
+    """convert a bib entry dict to a single line JSON string
+
+    Parameters
+    ----------
+    entry: dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+
+    Returns
+    -------
+    line: str
+
+    """
+    fields = {name: value for name, value in entry.items()
+              if name not in ("ID", "ENTRYTYPE")}
+    data = {"key": entry["ID"],
+            "type": entry.get("ENTRYTYPE", "misc"),
+            "fields": fields}
+    return json.dumps(data, sort_keys=True, ensure_ascii=False)
+
+
+def json_to_entry(line):
+    """convert a single line JSON string to a bib entry dict
+
+    Parameters
+    ----------
+    line: str
+
+    Returns
+    -------
+    entry: dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+
+    """
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    if "key" not in data:
+        raise ValueError("no 'key' found")
+    fields = data.get("fields", {})
+    if not isinstance(fields, dict):
+        raise ValueError("expected 'fields' to be a JSON object")
+    entry = {str(name): str(value) for name, value in fields.items()}
+    entry["ID"] = str(data["key"])
+    entry["ENTRYTYPE"] = str(data.get("type", "misc"))
+    return entry
+
+
+def iter_ndjson(lines):
+    """iterate over the entries of an NDJSON stream
+
+    Parameters
+    ----------
+    lines: iterable of str
+        e.g. an open file object
+
+    Yields
+    ------
+    entry: dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+
+    """
+    for row, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json_to_entry(line)
+        except ValueError as err:
+            raise ValueError(
+                "(row {0}) could not read NDJSON entry: {1}".format(row, err))
+
+
+def iter_ndjson_lines(entries):
+    """iterate over NDJSON lines (including line endings) for entries"""
+    for entry in entries:
+        yield entry_to_json(entry) + "\n"
+
+
+def write_ndjson(entries):
+    """create an NDJSON string from a list of bib entry dicts"""
+    return "".join(iter_ndjson_lines(entries))
+
+
+def is_ndjson_path(path):
+    """test whether a file path has an NDJSON extension"""
+    return path.lower().endswith(NDJSON_EXTENSIONS)
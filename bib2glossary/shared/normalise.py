@@ -0,0 +1,117 @@
+"""fast normalisation of field values
+
+Values are normalised by collapsing whitespace (including line breaks),
+and optionally converting common LaTeX accent and escape macros to unicode,
+e.g. ``{\\'e}cole`` to ``{é}cole`` and ``R\\&D`` to ``R&D``.
+Escaped special characters (``\\&``, ``\\%``, ``\\$``, ``\\#``, ``\\_``)
+must only be unescaped when the values are not written back to LaTeX.
+The conversion uses precompiled patterns and translation tables,
+rather than a full LaTeX parse,
+and results for repeated values are cached in a bounded memo.
+"""
+import functools
+import re
+import unicodedata
+
+DEFAULT_CACHE_SIZE = 65536
+
+# accent macro -> combining character
+ACCENTS = {
+    "'": "\u0301", "`": "\u0300", "^": "\u0302", '"': "\u0308",
+    "~": "\u0303", "=": "\u0304", ".": "\u0307",
+    "c": "\u0327", "v": "\u030c", "u": "\u0306", "H": "\u030b",
+    "k": "\u0328", "r": "\u030a", "d": "\u0323", "b": "\u0331",
+}
+# symbol macro -> unicode
+SYMBOLS = {
+    "ss": "ß", "o": "ø", "O": "Ø", "ae": "æ", "AE": "Æ", "oe": "œ",
+    "OE": "Œ", "aa": "å", "AA": "Å", "l": "ł", "L": "Ł", "i": "ı",
+    "j": "ȷ", "dh": "ð", "DH": "Ð", "th": "þ", "TH": "Þ",
+}
+# escaped character -> character
+ESCAPES = {"&": "&", "%": "%", "$": "$", "#": "#", "_": "_"}
+
+# e.g. \'e, \'{e}, \' e, \c{c}, \c c, \'\i
+_ACCENT = re.compile(
+    r"\\(?:([^A-Za-z\s])|([A-Za-z])(?![A-Za-z]))\s*"
+    r"(?:\{\s*(\\i|\\j|[A-Za-z])\s*\}|(\\[ij](?![A-Za-z])\s*|[A-Za-z]))")
+# e.g. \ss, \ss{}, {\o} (spaces after a control word are ignored)
+_SYMBOL = re.compile(r"\\(" + "|".join(
+    sorted(SYMBOLS, key=len, reverse=True)) + r")(?![A-Za-z])(?:\{\}|\s*)")
+_ESCAPE = re.compile(r"\\([" + re.escape("".join(ESCAPES)) + r"])")
+
+
+def _replace_accent(match):
+    symbol_accent, letter_accent, braced, bare = match.groups()
+    accent = symbol_accent or letter_accent
+    if accent not in ACCENTS:
+        return match.group()
+    base = (braced or bare).strip()
+    if base in ("\\i", "\\j"):
+        base = base[1]
+    return unicodedata.normalize("NFC", base + ACCENTS[accent])
+
+
+def latex_to_unicode(value, escapes=True):
+    """convert common LaTeX accent and symbol macros to unicode,
+    and (if escapes) unescape escaped special characters"""
+    if "\\" not in value:
+        return value
+    value = _ACCENT.sub(_replace_accent, value)
+    value = _SYMBOL.sub(lambda match: SYMBOLS[match.group(1)], value)
+    if not escapes:
+        return value
+    return _ESCAPE.sub(lambda match: ESCAPES[match.group(1)], value)
+
+
+def collapse_whitespace(value):
+    """collapse all whitespace (including line breaks) to single spaces"""
+    return " ".join(value.split())
+
+
+def make_normaliser(latex=True, escapes=True,
+                    cache_size=DEFAULT_CACHE_SIZE):
+    """create a (memoized) function, to normalise a field value
+
+    Parameters
+    ----------
+    latex: bool
+        convert LaTeX accent, symbol and escape macros to unicode
+        (as well as collapsing whitespace)
+    escapes: bool
+        with latex, also unescape escaped special characters
+        (e.g. ``\\&`` to ``&``), which is only valid if the values
+        are not written back to LaTeX
+    cache_size: None or int
+        the maximum number of values to cache (None for unbounded)
+
+    Returns
+    -------
+    func: str -> str
+
+    """
+    if latex:
+        def normalise(value):
+            return latex_to_unicode(collapse_whitespace(value), escapes)
+    else:
+        normalise = collapse_whitespace
+    return functools.lru_cache(maxsize=cache_size)(normalise)
+
+
+def normalise_entry(entry, normaliser):
+    """normalise the field values of an entry (but not its key or type)
+
+    Parameters
+    ----------
+    entry: dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+    normaliser: func
+        function str -> str
+
+    Returns
+    -------
+    entry: dict
+
+    """
+    return {field: value if field in ("ID", "ENTRYTYPE")
+            else normaliser(value) for field, value in entry.items()}
@@ -0,0 +1,141 @@
+"""a compact, read-only, memory-mapped library of parsed entries
+
+A library is parsed once (e.g. from a large .bib file) and packed into
+a single file, which any number of worker processes can then memory-map
+and read without re-parsing.
+The mapping is read-only, so the pages of the file are shared between
+the workers through the operating system's page cache
+(rather than each worker holding its own copy of the library),
+and each entry is only decoded when it is iterated over.
+
+The file is laid out as::
+
+    header:  magic (8 bytes), entry count (uint64), index offset (uint64)
+    records: each entry, as UTF-8 encoded JSON (see shared.ndjson)
+    index:   for each record, its offset (uint64) and length (uint32)
+
+with all integers little-endian.
+Packed files are identified by their leading magic bytes.
+"""
+import mmap
+import struct
+
+from bib2glossary.shared.fileio import open_binary_output
+from bib2glossary.shared.ndjson import entry_to_json, json_to_entry
+
+MAGIC = b"B2GPACK1"
+_HEADER = struct.Struct("<8sQQ")
+_INDEX = struct.Struct("<QI")
+
+
+def is_packed_path(path):
+    """test whether a file starts with the packed library magic bytes"""
+    try:
+        with open(path, "rb") as binary:
+            return binary.read(len(MAGIC)) == MAGIC
+    except (IOError, OSError):
+        return False
+
+
+def write_packed(entries, path):
+    """write entries to a packed library file
+    (only replacing it if its content has changed)
+
+    Parameters
+    ----------
+    entries: iterable of dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+    path: str
+
+    Returns
+    -------
+    count: int
+        the number of entries written
+
+    """
+    index = []
+    with open_binary_output(path) as binary:
+        binary.write(_HEADER.pack(MAGIC, 0, 0))
+        offset = _HEADER.size
+        for entry in entries:
+            record = entry_to_json(entry).encode("utf8")
+            binary.write(record)
+            index.append(_INDEX.pack(offset, len(record)))
+            offset += len(record)
+        binary.write(b"".join(index))
+        binary.seek(0)
+        binary.write(_HEADER.pack(MAGIC, len(index), offset))
+    return len(index)
+
+
+class PackedLibrary(object):
+    """a read-only, memory-mapped, packed library
+
+    Parameters
+    ----------
+    path: str
+
+    Raises
+    ------
+    ValueError
+        if the file is not a (complete) packed library
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as binary:
+            size = binary.seek(0, 2)
+            if size < _HEADER.size:
+                raise ValueError("not a packed library: {}".format(path))
+            self._map = mmap.mmap(binary.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._index_offset = _HEADER.unpack_from(
+            self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("not a packed library: {}".format(path))
+        if self._index_offset + self._count * _INDEX.size != size:
+            self.close()
+            raise ValueError("truncated packed library: {}".format(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        """release the memory map"""
+        self._map.close()
+
+    def record_sizes(self):
+        """iterate over the size (bytes) of each record"""
+        for position in range(self._count):
+            yield _INDEX.unpack_from(
+                self._map, self._index_offset + position * _INDEX.size)[1]
+
+    def __iter__(self):
+        for position in range(self._count):
+            offset, length = _INDEX.unpack_from(
+                self._map, self._index_offset + position * _INDEX.size)
+            yield json_to_entry(
+                self._map[offset:offset + length].decode("utf8"))
+
+
+def iter_packed(path, progress=None):
+    """iterate over the entries of a packed library file
+
+    If given, the record bytes read are counted by the
+    progress reporter (bib2glossary.shared.progress.Progress).
+    """
+    with PackedLibrary(path) as library:
+        if progress is None:
+            for entry in library:
+                yield entry
+            return
+        for entry, size in zip(library, library.record_sizes()):
+            progress.update(nbytes=size)
+            yield entry
@@ -1,9 +1,20 @@
+import re
 from collections import deque
 
 import bibtexparser
 from TexSoup.utils import TokenWithPosition
 from TexSoup.data import RArg, OArg, TexNode
 
+# the start of a bib entry, e.g. '@misc{'
+_BIB_START = re.compile(r"@\s*([A-Za-z]+)\s*([{(])")
+_BIB_START_MAX = 256
+_BIB_DELIMITER = re.compile(r"[{}()]")
+
+# attributes of the BibTexWriter
+WRITER_CONFIG = (('contents', ('comments', 'entries')),
+                 ('indent', '  '),
+                 ('order_entries_by', ('ENTRYTYPE', 'author', 'year')))
+
 
 def raise_IOError(msg):
     raise IOError
@@ -44,26 +55,133 @@ def create_msg_duplicates(duplicates):
     return msg
 
 
-def write_bib(entries):
+def write_bib(entries, writer_config=None):
     bib_database = bibtexparser.bibdatabase.BibDatabase()
     bib_database.entries = entries
 
     writer = bibtexparser.bwriter.BibTexWriter()
-    writer.contents = ['comments', 'entries']
-    writer.indent = '  '
-    writer.order_entries_by = ('ENTRYTYPE', 'author', 'year')
+    for name, value in (writer_config or WRITER_CONFIG):
+        setattr(writer, name, value)
     bibtex_str = bibtexparser.dumps(bib_database, writer)
     return bibtex_str
 
 
-def parse_bib(text_str):
-    parser = bibtexparser.bparser.BibTexParser()
+def parse_bib(text_str, parser_config=None):
+    parser = bibtexparser.bparser.BibTexParser(**dict(parser_config or ()))
     bib = parser.parse(text_str)
     # TODO doesn't appear to check for key duplication
     entries = bib.get_entry_dict()
     return entries
 
 
+def _find_bib_entry_end(text_str, pos, opening, level=0):
+    """scan a bib entry from pos (after its opening delimiter,
+    at brace level), returning (end, level) where end is the end position
+    of the entry, or None if the end of the text is reached first
+    (in which case the scan can be resumed on the following text)"""
+    for match in _BIB_DELIMITER.finditer(text_str, pos):
+        value = match.group()
+        if value == "{":
+            level += 1
+        elif value == "}":
+            level -= 1
+            if level < 0 and opening == "{":
+                return match.end(), level
+        elif level == 0 and opening == "(" and value == ")":
+            return match.end(), level
+    return None, level
+
+
+def iter_bib_entries(chunks):
+    """iterate over the (unparsed) entries in chunks of bib text
+
+    An incomplete entry is scanned only once: its text is buffered,
+    and the scan resumed (with its brace level) on the next chunk.
+
+    Parameters
+    ----------
+    chunks: iterable of str
+        the .bib file text, in consecutive chunks
+
+    Yields
+    ------
+    entry_str: str
+        the text of a single entry, from its '@' to its closing delimiter,
+        yielded as soon as the closing delimiter is read
+
+    """
+    chunks = iter(chunks)
+    text_str = ""
+    final = False
+    pos = 0
+
+    while True:
+        match = _BIB_START.search(text_str, pos)
+
+        if match is None:
+            if final:
+                return
+            # keep a trailing '@' that may start an (incomplete) entry
+            keep = text_str.rfind("@", pos)
+            if keep == -1 or len(text_str) - keep > _BIB_START_MAX:
+                keep = len(text_str)
+            chunk = next(chunks, "")
+            final = not chunk
+            text_str = text_str[keep:] + chunk
+            pos = 0
+            continue
+
+        opening = match.group(2)
+        start = match.start()
+        header_size = match.end() - start
+        end, level = _find_bib_entry_end(text_str, match.end(), opening)
+        pieces = []
+        while end is None:
+            if final:
+                raise ValueError(
+                    "unbalanced bib entry: {}".format(
+                        ("".join(pieces) +
+                         text_str[start:])[:header_size + 40]))
+            pieces.append(text_str[start:])
+            chunk = next(chunks, "")
+            final = not chunk
+            text_str = chunk
+            start = 0
+            end, level = _find_bib_entry_end(text_str, 0, opening, level)
+        pieces.append(text_str[start:end])
+        yield "".join(pieces)
+        pos = end
+
+
+def iter_parse_bib(chunks, parser_config=None):
+    """iterate over the parsed entries in chunks of bib text
+
+    A single parser is used for all entries,
+    so that @string definitions apply to subsequent entries.
+
+    Parameters
+    ----------
+    chunks: iterable of str
+        the .bib file text, in consecutive chunks
+    parser_config: None or tuple
+        keyword arguments for the BibTexParser
+
+    Yields
+    ------
+    entry: dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+
+    """
+    parser = bibtexparser.bparser.BibTexParser(**dict(parser_config or ()))
+    database = parser.bib_database
+    for entry_str in iter_bib_entries(chunks):
+        parser.parse(entry_str)
+        entries = database.entries
+        database.entries = []
+        for entry in entries:
+            yield entry
+
+
 def extract_required_val(rarg):
     """extract the value of a TexSoup RArg"""
     if not isinstance(rarg, RArg):
@@ -119,4 +237,3 @@ def extract_parameters(argument):
     opt_params, errors = _extract_parameters(argument.exprs)
 
     return opt_params, errors
-
@@ -0,0 +1,115 @@
+"""routing of entries into partitions, in a single pass"""
+import hashlib
+import re
+from collections import Counter
+
+PARTITION_HELP = ("'type' (the bibtex entry type), "
+                  "'prefix[:<sep>]' (the part of the key before the "
+                  "first separator, default ':') "
+                  "or 'field:<name>' (the value of a bibtex field)")
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def partition_func(partition_by):
+    """create a function returning the partition name of an entry
+
+    Parameters
+    ----------
+    partition_by: str
+        'type', 'prefix[:<sep>]' or 'field:<name>'
+
+    Returns
+    -------
+    func: entry -> str or None
+        returns None if the entry cannot be assigned a partition
+
+    """
+    kind, _, arg = partition_by.partition(":")
+    if kind == "type" and not arg:
+        return lambda entry: entry.get("ENTRYTYPE", None)
+    if kind == "prefix":
+        sep = arg or ":"
+
+        def get_prefix(entry):
+            prefix, found, _ = entry["ID"].partition(sep)
+            return prefix if found else None
+        return get_prefix
+    if kind == "field" and arg:
+        return lambda entry: entry.get(arg, None)
+    raise ValueError(
+        "partition must be one of {0}, not: {1}".format(
+            PARTITION_HELP, partition_by))
+
+
+def partition_entries(entries, partition_by, warning_handler=None):
+    """route each entry into a partition
+
+    Parameters
+    ----------
+    entries: iterable of dict
+        bib entries {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+    partition_by: str
+        'type', 'prefix[:<sep>]' or 'field:<name>'
+    warning_handler: None or func
+        function taking a warning message,
+        called for entries which cannot be assigned a partition
+
+    Returns
+    -------
+    partitions: dict {<partition>: [entry, ...]}
+
+    """
+    get_partition = partition_func(partition_by)
+    partitions = {}
+    for entry in entries:
+        name = get_partition(entry)
+        if name is None:
+            if warning_handler is not None:
+                warning_handler(
+                    "Skipping {0}: No partition found for '{1}'".format(
+                        entry["ID"], partition_by))
+            continue
+        partitions.setdefault(name, []).append(entry)
+    return partitions
+
+
+def _safe_name(name):
+    """replace characters which are unsafe in a file name"""
+    return _UNSAFE_CHARS.sub("_", name) or "_"
+
+
+def partition_path(template, name):
+    """create a file path for a partition, from a template containing '{}'"""
+    return template.format(_safe_name(name))
+
+
+def partition_paths(template, names):
+    """create a unique file path for each partition,
+    from a template containing '{}'
+
+    Names which are the same once unsafe characters are replaced
+    (e.g. 'a b' and 'a_b') have a short hash of the name appended.
+
+    Returns
+    -------
+    paths: dict {<name>: <path>}
+
+    Raises
+    ------
+    ValueError
+        if the paths are still not unique
+
+    """
+    safe_names = {name: _safe_name(name) for name in names}
+    counts = Counter(safe_names.values())
+    paths = {}
+    for name, safe_name in safe_names.items():
+        if counts[safe_name] > 1:
+            safe_name += "-" + hashlib.sha1(
+                name.encode("utf8")).hexdigest()[:8]
+        paths[name] = template.format(safe_name)
+    if len(set(paths.values())) < len(paths):
+        raise ValueError("partition names do not give unique paths: "
+                         "{}".format(", ".join(sorted(names))))
+    return paths
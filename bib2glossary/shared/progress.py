@@ -0,0 +1,119 @@
+"""progress and throughput telemetry for long conversions
+
+Counts are incremented from the reading, parsing and emitting loops,
+but a progress line is only written (to stderr) at most once per interval,
+so that reporting does not slow the conversion.
+A final summary of the metrics can also be written as JSON.
+"""
+import json
+import time
+
+DEFAULT_INTERVAL = 1.0
+
+
+def _format_bytes(nbytes):
+    """format a number of bytes, in human readable units"""
+    for unit in ("B", "KB", "MB"):
+        if nbytes < 1024:
+            return "{0:.1f} {1}".format(nbytes, unit)
+        nbytes /= 1024.
+    return "{0:.1f} GB".format(nbytes)
+
+
+class Progress(object):
+    """a rate-limited progress reporter
+
+    Parameters
+    ----------
+    stream: None or file
+        the stream to write progress to (if None, only metrics are recorded)
+    total_bytes: None or int
+        the total size of the input, to estimate the time remaining
+    interval: float
+        the minimum time between progress reports (seconds)
+    clock: func
+        function returning the current time (seconds)
+
+    """
+
+    def __init__(self, stream=None, total_bytes=None,
+                 interval=DEFAULT_INTERVAL, clock=time.monotonic):
+        self.stream = stream
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.clock = clock
+        self.entries = 0
+        self.skipped = 0
+        self.nbytes = 0
+        self.start = clock()
+        self._next_report = self.start + interval
+
+    def update(self, entries=0, nbytes=0, skipped=0):
+        """increment the counts, reporting progress if the interval
+        has passed"""
+        self.entries += entries
+        self.nbytes += nbytes
+        self.skipped += skipped
+        if self.stream is None:
+            return
+        now = self.clock()
+        if now >= self._next_report:
+            self._next_report = now + self.interval
+            self.report(now)
+
+    def metrics(self, now=None):
+        """return the current metrics
+
+        Returns
+        -------
+        metrics: dict
+            {"entries": int, "skipped": int, "bytes": int,
+             "elapsed_seconds": float, "entries_per_second": float,
+             "bytes_per_second": float, "eta_seconds": None or float}
+
+        """
+        if now is None:
+            now = self.clock()
+        elapsed = now - self.start
+        eta = None
+        if self.total_bytes and self.nbytes and elapsed > 0:
+            remaining = max(self.total_bytes - self.nbytes, 0)
+            eta = remaining / (self.nbytes / elapsed)
+        return {
+            "entries": self.entries,
+            "skipped": self.skipped,
+            "bytes": self.nbytes,
+            "elapsed_seconds": elapsed,
+            "entries_per_second": self.entries / elapsed if elapsed else 0.,
+            "bytes_per_second": self.nbytes / elapsed if elapsed else 0.,
+            "eta_seconds": eta,
+        }
+
+    def format(self, now=None):
+        """format the current metrics as a single line"""
+        metrics = self.metrics(now)
+        line = "{0} entries ({1} skipped), {2}".format(
+            metrics["entries"], metrics["skipped"],
+            _format_bytes(metrics["bytes"]))
+        if self.total_bytes:
+            line += " of {0}".format(_format_bytes(self.total_bytes))
+        line += ", {0:.0f} entries/s".format(metrics["entries_per_second"])
+        if metrics["eta_seconds"] is not None:
+            line += ", ETA {0:.0f}s".format(metrics["eta_seconds"])
+        return line
+
+    def report(self, now=None):
+        """write a progress line"""
+        self.stream.write("progress: " + self.format(now) + "\n")
+        self.stream.flush()
+
+    def finish(self, metrics_path=None):
+        """write the final progress line,
+        and optionally the metrics as a JSON file"""
+        now = self.clock()
+        if self.stream is not None:
+            self.report(now)
+        if metrics_path is not None:
+            with open(metrics_path, "w") as file_obj:
+                json.dump(self.metrics(now), file_obj, indent=2,
+                          sort_keys=True)
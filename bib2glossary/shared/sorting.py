@@ -0,0 +1,118 @@
+"""external-memory sorting of bib entries
+
+Each entry is paired with a compact sort key, computed once,
+and buffered until a memory budget is exceeded.
+The buffer is then sorted and spilled to a temporary file as a run,
+and finally all runs are k-way merged, so that deterministically ordered
+output can be produced for libraries larger than the available memory.
+The sort is stable, i.e. entries with equal keys retain their input order.
+"""
+import heapq
+import json
+import tempfile
+from operator import itemgetter
+
+# the sort order of bibtexparser.bwriter.BibTexWriter.order_entries_by
+BIB_ORDER = ('ENTRYTYPE', 'author', 'year')
+# an estimate of the memory overhead of each buffered entry (bytes)
+_ENTRY_OVERHEAD = 256
+
+
+def id_sort_key(entry):
+    """sort by entry key"""
+    return entry['ID']
+
+
+def fields_sort_key(fields):
+    """create a function to sort by a sequence of fields,
+    in the same way as the bibtexparser writer (case insensitive strings)
+
+    Parameters
+    ----------
+    fields: tuple of str
+
+    Returns
+    -------
+    func: entry -> list of str
+
+    """
+    fields = tuple(fields)
+
+    def sort_key(entry):
+        return [str(entry.get(field, '')).lower() for field in fields]
+
+    return sort_key
+
+
+def entry_size(entry):
+    """an estimate of the memory used by an entry (bytes)"""
+    return _ENTRY_OVERHEAD + sum(
+        len(field) + len(value) for field, value in entry.items())
+
+
+def _write_run(records):
+    """sort records and spill them to a temporary file"""
+    records.sort(key=itemgetter(0, 1))
+    run = tempfile.TemporaryFile(mode="w+", encoding="utf8")
+    for record in records:
+        run.write(json.dumps(record, ensure_ascii=False))
+        run.write("\n")
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    """iterate over the records of a spilled run"""
+    for line in run:
+        yield json.loads(line)
+
+
+def sort_entries(entries, sort_key=id_sort_key, max_memory=None):
+    """iterate over entries in sorted order,
+    spilling sorted runs to temporary files if a memory budget is exceeded
+
+    Parameters
+    ----------
+    entries: iterable of dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+    sort_key: func
+        function entry -> key, where the key must be a (JSON serialisable)
+        string, number or list of these
+    max_memory: None or int
+        the (estimated) memory budget for buffered entries (bytes),
+        if None all entries are sorted in memory
+
+    Yields
+    ------
+    entry: dict
+
+    """
+    runs = []
+    records = []
+    buffered = 0
+    try:
+        for index, entry in enumerate(entries):
+            records.append((sort_key(entry), index, entry))
+            if max_memory is None:
+                continue
+            buffered += entry_size(entry)
+            if buffered > max_memory:
+                runs.append(_write_run(records))
+                records = []
+                buffered = 0
+
+        if not runs:
+            records.sort(key=itemgetter(0, 1))
+            for record in records:
+                yield record[2]
+            return
+
+        if records:
+            runs.append(_write_run(records))
+            records = []
+        for record in heapq.merge(*[_read_run(run) for run in runs],
+                                  key=itemgetter(0, 1)):
+            yield record[2]
+    finally:
+        for run in runs:
+            run.close()
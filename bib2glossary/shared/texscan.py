@@ -0,0 +1,290 @@
+"""a linear pre-scan of tex text, to locate macro definitions
+
+Rather than building a TexSoup tree of a whole document,
+the text is scanned (iteratively, without recursion) for the macros of
+interest, and each definition (the macro and its arguments)
+is extracted separately.
+This bounds the work TexSoup has to do for any single definition,
+and allows resource limits to be enforced before any parsing takes place.
+
+The text can also be supplied incrementally, as an iterable of chunks,
+in which case only the current (incomplete) definition is buffered,
+and each definition is yielded as soon as its arguments are complete.
+"""
+import re
+
+from bib2glossary.shared.limits import ParseLimits
+
+# control sequences, comments and brace groups
+_TOKEN = re.compile(r"\\(?:[A-Za-z@]+|.)|%[^\n]*|[{}]", re.DOTALL)
+# tokens of interest within an argument
+_ARG_TOKEN = re.compile(r"\\.|%[^\n]*|[{}\]]", re.DOTALL)
+# the start of a (required or optional) argument
+_ARG_START = re.compile(r"\s*([\[{])")
+# only whitespace remains
+_WHITESPACE = re.compile(r"\s*\Z")
+# how often (in tokens) to check the wall-clock budget
+_CLOCK_INTERVAL = 1024
+
+
+class _ArgumentScan(object):
+    """the state of scanning the arguments following a macro,
+    which can be resumed when the next chunk of text is read,
+    so that each character of a definition is only scanned once"""
+
+    def __init__(self, name, start, depth, row, nargs, limits, deadline):
+        self.name = name
+        self.depth = depth
+        self.row = row
+        self.nargs = nargs
+        self.limits = limits
+        self.deadline = deadline
+        # the start of the unconsumed definition text, in the current text
+        self.offset = start
+        # the definition text consumed from previous chunks
+        self.pieces = []
+        self.size = 0
+        self.required = 0
+        # the opening bracket of the current argument (or None)
+        self.opening = None
+        self.level = 0
+        self.in_comment = False
+        self.ntokens = 0
+        # whitespace consumed after the last argument
+        self.trailing = 0
+
+    def _unbalanced(self):
+        return ValueError(
+            "(row {0}) unbalanced '{1}' in \\{2} "
+            "(end of text reached)".format(self.row, self.opening, self.name))
+
+    def _check_size(self, pos):
+        self.limits.check_entry_size(self.size + pos - self.offset,
+                                     self.row, self.name)
+
+    def suspend(self, text_str, keep):
+        """consume the text up to keep, before the next chunk is read"""
+        self.pieces.append(text_str[self.offset:keep])
+        self.size += keep - self.offset
+        self.offset = 0
+        return keep
+
+    def definition(self, text_str, end):
+        """return the full text of the definition, ending at end"""
+        definition = "".join(self.pieces) + text_str[self.offset:end]
+        if self.trailing and self.opening is None:
+            definition = definition[:len(definition) - self.trailing]
+        return definition
+
+    def scan(self, text_str, pos, final):
+        """scan the arguments from pos,
+        returning the end position of the arguments,
+        or None if the end of the (non-final) text is reached first
+        (after which ``keep`` is the position consumed up to)"""
+        self.limits.check_deadline(self.deadline, self.row)
+        while True:
+            if self.in_comment:
+                newline = text_str.find("\n", pos)
+                if newline < 0:
+                    self._check_size(len(text_str))
+                    if final:
+                        raise self._unbalanced()
+                    self.keep = self.suspend(text_str, len(text_str))
+                    return None
+                pos = newline + 1
+                self.in_comment = False
+
+            if self.opening is None:
+                if self.nargs is not None and self.required >= self.nargs:
+                    return pos
+                match = _ARG_START.match(text_str, pos)
+                if match is None:
+                    if not final and _WHITESPACE.match(text_str, pos):
+                        # a further argument may follow
+                        self.trailing += len(text_str) - pos
+                        self.keep = self.suspend(text_str, len(text_str))
+                        return None
+                    return pos
+                self.trailing = 0
+                self.opening = match.group(1)
+                self.level = 1 if self.opening == "{" else 0
+                self.limits.check_depth(self.depth + self.level, self.row)
+                pos = match.end()
+
+            while self.opening is not None:
+                token = _ARG_TOKEN.search(text_str, pos)
+                if token is None:
+                    self._check_size(len(text_str))
+                    if final:
+                        raise self._unbalanced()
+                    keep = len(text_str)
+                    if text_str.endswith("\\") and keep > pos:
+                        # an incomplete escape
+                        keep -= 1
+                    self.keep = self.suspend(text_str, keep)
+                    return None
+                pos = token.end()
+                self._check_size(pos)
+                self.ntokens += 1
+                if self.ntokens % _CLOCK_INTERVAL == 0:
+                    self.limits.check_deadline(self.deadline, self.row)
+                value = token.group()
+                if value[0] == "%":
+                    if not final and pos == len(text_str):
+                        # the comment may continue in the next chunk
+                        self.in_comment = True
+                        break
+                elif value == "{":
+                    self.level += 1
+                    self.limits.check_depth(self.depth + self.level,
+                                            self.row)
+                elif value == "}":
+                    self.level -= 1
+                    if self.level == 0 and self.opening == "{":
+                        self.required += 1
+                        self.opening = None
+                    elif self.level < 0:
+                        raise ValueError(
+                            "(row {0}) unbalanced '}}' in \\{1}".format(
+                                self.row, self.name))
+                elif (value == "]" and self.level == 0 and
+                      self.opening == "["):
+                    self.opening = None
+
+
+def iter_macros_stream(chunks, names, limits=None):
+    """iterate over the definitions of a set of macros in chunks of tex text
+
+    Parameters
+    ----------
+    chunks: iterable of str
+        the .tex file text, in consecutive chunks
+    names: iterable of str or dict
+        the macro names to find (without the leading backslash),
+        or a mapping of macro name to its number of required arguments
+        (after which the definition ends, otherwise all following
+        arguments are consumed)
+    limits: None or bib2glossary.shared.limits.ParseLimits
+        resource limits (default is ParseLimits())
+
+    Yields
+    ------
+    name: str
+        the macro name
+    definition: str
+        the macro and its arguments
+    row: int
+        the row at which the definition starts
+
+    Raises
+    ------
+    bib2glossary.shared.limits.LimitExceeded
+        if a resource limit is exceeded
+    ValueError
+        if the braces of a definition are unbalanced
+
+    """
+    if limits is None:
+        limits = ParseLimits()
+    if not isinstance(names, dict):
+        names = {name: None for name in names}
+    deadline = limits.start_clock()
+    chunks = iter(chunks)
+
+    text_str = ""
+    final = False
+    depth = 0
+    count = 0
+    row = 1
+    row_pos = 0
+    pos = 0
+    ntokens = 0
+
+    while True:
+        match = _TOKEN.search(text_str, pos)
+
+        if match is None or (not final and match.end() == len(text_str)):
+            # the token may be incomplete, so read the next chunk
+            if final:
+                return
+            if match is not None:
+                keep = match.start()
+            elif text_str.endswith("\\") and len(text_str) > pos:
+                # an incomplete control sequence
+                keep = len(text_str) - 1
+            else:
+                keep = len(text_str)
+            row += text_str.count("\n", row_pos, keep)
+            chunk = next(chunks, "")
+            final = not chunk
+            text_str = text_str[keep:] + chunk
+            row_pos = pos = 0
+            continue
+
+        token = match.group()
+        pos = match.end()
+
+        ntokens += 1
+        if ntokens % _CLOCK_INTERVAL == 0:
+            row += text_str.count("\n", row_pos, pos)
+            row_pos = pos
+            limits.check_deadline(deadline, row)
+
+        if token == "{":
+            depth += 1
+            if limits.max_depth is not None and depth > limits.max_depth:
+                row += text_str.count("\n", row_pos, pos)
+                row_pos = pos
+                limits.check_depth(depth, row)
+        elif token == "}":
+            depth = max(depth - 1, 0)
+        elif token[1:] in names:
+            name = token[1:]
+            start = match.start()
+            row += text_str.count("\n", row_pos, start)
+            row_pos = start
+            scan = _ArgumentScan(name, start, depth, row, names[name],
+                                 limits, deadline)
+            end = scan.scan(text_str, pos, final)
+            while end is None:
+                # read the next chunk, and resume the scan
+                row += text_str.count("\n", row_pos, scan.keep)
+                chunk = next(chunks, "")
+                final = not chunk
+                text_str = text_str[scan.keep:] + chunk
+                row_pos = 0
+                end = scan.scan(text_str, 0, final)
+            count += 1
+            limits.check_entries(count, scan.row)
+            limits.check_deadline(deadline, scan.row)
+            yield name, scan.definition(text_str, end), scan.row
+            limits.check_deadline(deadline, scan.row)
+            pos = end
+
+
+def iter_macros(text_str, names, limits=None):
+    """iterate over the definitions of a set of macros in a tex string
+
+    Parameters
+    ----------
+    text_str: str
+        the .tex file string
+    names: iterable of str or dict
+        the macro names to find (without the leading backslash),
+        or a mapping of macro name to its number of required arguments
+        (after which the definition ends, otherwise all following
+        arguments are consumed)
+    limits: None or bib2glossary.shared.limits.ParseLimits
+        resource limits (default is ParseLimits())
+
+    Yields
+    ------
+    name: str
+        the macro name
+    definition: str
+        the macro and its arguments
+    row: int
+        the row at which the definition starts
+
+    """
+    return iter_macros_stream([text_str], names, limits=limits)
@@ -0,0 +1,88 @@
+"""verification that tex definitions and bib entries are equivalent
+
+Rather than converting one side and diffing the text,
+each entry is normalised through the param2field mapping and hashed,
+and only the per-key hashes are compared.
+"""
+import hashlib
+import json
+
+MISSING_IN_BIB = "missing from bib"
+MISSING_IN_TEX = "missing from tex"
+DIFFERENT = "different"
+DUPLICATE = "duplicate definition"
+
+
+def entry_digest(entry, field2param):
+    """create a hash of the normalised parameters of an entry
+
+    Parameters
+    ----------
+    entry: dict
+        {'ID': <key>, 'ENTRYTYPE': <type>, <field>: <value>, ...}
+    field2param: dict
+        mapping of bib field to glossaries parameter,
+        only fields in the mapping are considered
+
+    Returns
+    -------
+    digest: str
+
+    """
+    params = sorted(
+        (field2param[field], " ".join(value.split()))
+        for field, value in entry.items() if field in field2param)
+    data = json.dumps(params, ensure_ascii=False).encode("utf8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def index_digests(entries, field2param):
+    """create a mapping of entry key to entry digest"""
+    return {entry["ID"]: entry_digest(entry, field2param)
+            for entry in entries}
+
+
+def verify_entries(tex_entries, bib_entries, param2field,
+                   duplicates=None, entry_type=None):
+    """compare tex and bib entries
+
+    Parameters
+    ----------
+    tex_entries: iterable of dict
+        entries extracted from the tex file
+    bib_entries: iterable of dict
+        entries extracted from the bib file
+    param2field: dict
+        mapping of glossaries parameter to bib field
+    duplicates: None or dict
+        duplicate keys found in the tex file {<key>: [row, ...]}
+    entry_type: None or str
+        if given, only consider bib entries of this entry type
+
+    Returns
+    -------
+    mismatches: dict {<key>: <reason>}
+
+    """
+    field2param = {field: param for param, field in param2field.items()}
+
+    if entry_type:
+        bib_entries = (entry for entry in bib_entries
+                       if entry.get("ENTRYTYPE", "") == entry_type)
+
+    tex_digests = index_digests(tex_entries, field2param)
+    bib_digests = index_digests(bib_entries, field2param)
+
+    mismatches = {}
+    for key, digest in tex_digests.items():
+        if key not in bib_digests:
+            mismatches[key] = MISSING_IN_BIB
+        elif bib_digests[key] != digest:
+            mismatches[key] = DIFFERENT
+    for key in bib_digests:
+        if key not in tex_digests:
+            mismatches[key] = MISSING_IN_TEX
+    for key in (duplicates or {}):
+        mismatches[key] = DUPLICATE
+
+    return mismatches
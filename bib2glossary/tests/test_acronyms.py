@@ -1,6 +1,13 @@
+import gzip
+import io
+import json
 import os
+import sys
+import pytest
 from bib2glossary.tests import TEST_DIR
-from bib2glossary.acronyms import (bib_to_tex, tex_to_dict, tex_to_bib,
+from bib2glossary.acronyms import (AcronymConverter,
+                                   bib_to_tex, tex_to_dict, tex_to_bib,
+                                   verify_tex_bib,
                                    run_tex_to_bib, run_bib_to_tex)
 
 
@@ -49,6 +56,36 @@ def test_bib_to_tex_with_options():
     ]
 
 
+def test_bib_to_tex_with_filter():
+
+    text_str = """
+@misc{thekey,
+  shorttitle = {ABRV},
+  journal = {Abbreviation},
+  abstract = {a description}
+}
+@misc{otherkey,
+  shorttitle = {OTHER},
+  journal = {Abbreviation of other}
+}
+@misc{thirdkey,
+  journal = {Not an acronym}
+}
+    """
+    acronyms = bib_to_tex(text_str, entry_filter="key:*key has:abstract")
+
+    assert acronyms == [
+        "\\newacronym[description={a description}]{thekey}{ABRV}{Abbreviation}"
+    ]
+
+    acronyms = bib_to_tex(text_str,
+                          entry_filter=lambda entry: entry['ID'] != 'thekey')
+
+    assert acronyms == [
+        "\\newacronym{otherkey}{OTHER}{Abbreviation of other}"
+    ]
+
+
 def test_tex_to_dict():
 
     text_str = """
@@ -196,3 +233,454 @@ def test_run_bib_to_tex_missing_type():
     expected = """% Created by bib2glossary
 """
     assert outstr == expected
+
+
+def test_run_bib_to_tex_ndjson_input():
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.ndjson')
+    outstr = run_bib_to_tex([filepath])
+    expected = """% Created by bib2glossary
+\\newacronym{aa}{AA}{An Acronym}
+\\newacronym{asa}{ASA}{A Second Acronym}
+\\newacronym[description={a description},plural={AWOs}]{awo}{AWO}{Acronym With Options}
+"""
+    assert outstr == expected
+
+
+def test_run_bib_to_tex_ndjson_output():
+
+    bibpath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    ndjsonpath = os.path.join(TEST_DIR, 'examples', 'acronym.ndjson')
+    outstr = run_bib_to_tex([bibpath, "--output-format", "ndjson"])
+    with open(ndjsonpath) as file_obj:
+        expected = file_obj.read()
+    assert outstr == expected
+
+
+def test_run_tex_to_bib_ndjson_output():
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.tex')
+    outstr = run_tex_to_bib([filepath, "--output-format", "ndjson"])
+    expected = (
+        '{"fields": {"journal": "An Acronyms", "shorttitle": "AA"}, '
+        '"key": "aa", "type": "misc"}\n'
+        '{"fields": {"journal": "A Second Acronym", "shorttitle": "ASA"}, '
+        '"key": "asa", "type": "misc"}\n'
+        '{"fields": {"abstract": "a description \\\\tesxtrm{abc}", '
+        '"journal": "Acronym With Options", "series": "AWOs", '
+        '"shorttitle": "AWO"}, "key": "awo", "type": "misc"}\n')
+    assert outstr == expected
+
+
+def test_run_tex_to_bib_ndjson_input():
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.ndjson')
+    bibpath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    outstr = run_tex_to_bib([filepath])
+    with open(bibpath) as file_obj:
+        expected = file_obj.read()
+    assert outstr == expected
+
+
+def test_run_tex_to_bib_ndjson_input_duplicates(tmp_path, capsys):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.ndjson')
+    bibpath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    with open(filepath) as file_obj:
+        in_str = file_obj.read()
+    duplicate = ('{"fields": {"journal": "Duplicate", "shorttitle": "AA"}, '
+                 '"key": "aa", "type": "misc"}\n')
+    dupepath = str(tmp_path / "duplicates.ndjson")
+    with open(dupepath, "w") as file_obj:
+        file_obj.write(in_str + duplicate)
+    outstr = run_tex_to_bib([dupepath])
+    with open(bibpath) as file_obj:
+        expected = file_obj.read()
+    assert outstr == expected
+    assert "Duplicate keys found: aa" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_run_tex_to_bib_limits(capsys, stream):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.tex')
+    args = [filepath] + (["--stream"] if stream else [])
+    run_tex_to_bib(args + ["--max-entries", "3"])
+    assert "CRITICAL" not in capsys.readouterr().err
+    for limit in (["--max-entries", "2"], ["--max-depth", "1"]):
+        with pytest.raises(SystemExit) as exc_info:
+            run_tex_to_bib(args + limit)
+        assert exc_info.value.code == 2
+        assert "CRITICAL" in capsys.readouterr().err
+
+
+def test_verify_tex_bib():
+
+    tex_str = """
+    \\newacronym[description={a
+        description}]{otherkey}{OTHER}{Abbreviation of other}
+    \\newacronym{thekey}{ABRV}{Abbreviation}
+    \\newacronym{texkey}{TEX}{Only in tex}
+    \\newacronym{thekey}{ABRV}{Duplicate}
+    """
+    bib_str = """
+@misc{otherkey,
+  title = {Not a mapped field},
+  shorttitle = {OTHER},
+  journal = {Abbreviation of other},
+  abstract = {a description}
+}
+@misc{thekey,
+  shorttitle = {ABRV},
+  journal = {Different abbreviation}
+}
+@misc{bibkey,
+  shorttitle = {BIB},
+  journal = {Only in bib}
+}
+@other{otherkey2,
+  shorttitle = {OTHER},
+  journal = {Other entry type}
+}
+"""
+    mismatches = verify_tex_bib(tex_str, bib_str, warning_handler=print)
+
+    assert mismatches == {
+        'thekey': 'duplicate definition',
+        'texkey': 'missing from bib',
+        'bibkey': 'missing from tex'
+    }
+
+
+def test_run_tex_to_bib_verify(capsys):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.tex')
+    bibpath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    with pytest.raises(SystemExit) as exc_info:
+        run_tex_to_bib([filepath, "--verify", bibpath])
+
+    assert exc_info.value.code == 1
+    errors = capsys.readouterr().err
+    assert "Mismatched key 'aa': different" in errors
+    assert "Mismatched key 'asa'" not in errors
+    assert "Mismatched key 'awo': different" in errors
+
+
+def test_run_bib_to_tex_filter():
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    outstr = run_bib_to_tex([filepath, "--filter", "key:a*",
+                             "--filter", "field:shorttitle=ASA"])
+    expected = """% Created by bib2glossary
+\\newacronym{asa}{ASA}{A Second Acronym}
+"""
+    assert outstr == expected
+
+
+def test_run_tex_to_bib_stream(monkeypatch, capsys):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.tex')
+    with open(filepath) as file_obj:
+        monkeypatch.setattr('sys.stdin', io.StringIO(file_obj.read()))
+    outstr = run_tex_to_bib(["-", "--stream", "-of", "ndjson"])
+
+    assert outstr == ''
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["key"] for line in lines] == ['aa', 'asa', 'awo']
+
+
+class ClosedPipe(io.StringIO):
+    """stdout, after its reader has exited"""
+
+    def write(self, text):
+        raise BrokenPipeError(32, "Broken pipe")
+
+
+@pytest.mark.parametrize("run_func,filename", [
+    (run_tex_to_bib, "acronym.tex"), (run_bib_to_tex, "acronym.bib")])
+def test_run_stream_broken_pipe(monkeypatch, capsys, run_func, filename):
+
+    filepath = os.path.join(TEST_DIR, 'examples', filename)
+    stdout = ClosedPipe()
+    monkeypatch.setattr('sys.stdout', stdout)
+    with pytest.raises(SystemExit):
+        run_func([filepath, "--stream"])
+    assert sys.stdout is not stdout
+    assert capsys.readouterr().err == ''
+
+
+def test_run_bib_to_tex_stream(capsys):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    outstr = run_bib_to_tex([filepath, "--stream"])
+
+    assert outstr == ''
+    assert capsys.readouterr().out == """% Created by bib2glossary
+\\newacronym{aa}{AA}{An Acronym}
+\\newacronym{asa}{ASA}{A Second Acronym}
+\\newacronym[description={a description},plural={AWOs}]{awo}{AWO}{Acronym With Options}
+"""
+
+
+def test_run_bib_to_tex_stream_single_converter(monkeypatch, capsys):
+
+    created = []
+    init = AcronymConverter.__init__
+
+    def counting_init(self, *args, **kwargs):
+        created.append(self)
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(AcronymConverter, "__init__", counting_init)
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    run_bib_to_tex([filepath, "--stream"])
+
+    assert len(capsys.readouterr().out.splitlines()) == 4
+    assert len(created) == 1
+
+
+def test_run_bib_to_tex_stdin(monkeypatch):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    with open(filepath) as file_obj:
+        monkeypatch.setattr('sys.stdin', io.StringIO(file_obj.read()))
+    outstr = run_bib_to_tex(["-", "--filter", "key:aa"])
+
+    assert outstr == """% Created by bib2glossary
+\\newacronym{aa}{AA}{An Acronym}
+"""
+
+
+def test_run_bib_to_tex_stream_sorted(monkeypatch, capsys):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    with open(filepath) as file_obj:
+        entries = file_obj.read().split("\n\n")
+    monkeypatch.setattr('sys.stdin', io.StringIO("\n\n".join(entries[::-1])))
+    outstr = run_bib_to_tex(["-", "--stream", "--sort-buffer", "0.0001"])
+
+    assert outstr == ''
+    assert capsys.readouterr().out == """% Created by bib2glossary
+\\newacronym{aa}{AA}{An Acronym}
+\\newacronym{asa}{ASA}{A Second Acronym}
+\\newacronym[description={a description},plural={AWOs}]{awo}{AWO}{Acronym With Options}
+"""
+
+
+def test_run_tex_to_bib_normalise(monkeypatch):
+
+    monkeypatch.setattr('sys.stdin', io.StringIO(
+        "\\newacronym{ecole}{\\'EN}{\\'Ecole\n  Normale}"))
+    outstr = run_tex_to_bib(["-", "--normalise", "-of", "ndjson"])
+
+    assert json.loads(outstr)["fields"] == {
+        "journal": "École Normale", "shorttitle": "ÉN"}
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_run_bib_to_tex_output(tmp_path, stream):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    outpath = str(tmp_path / "acronyms.tex")
+    args = [filepath, "--output", outpath] + (["--stream"] if stream else [])
+    assert run_bib_to_tex(args) == ''
+    with open(outpath) as file_obj:
+        assert "\\newacronym{aa}{AA}{An Acronym}" in file_obj.read()
+
+    os.utime(outpath, (0, 0))
+    run_bib_to_tex(args)
+    assert os.stat(outpath).st_mtime == 0
+    run_bib_to_tex(args + ["--filter", "key:aa"])
+    assert os.stat(outpath).st_mtime != 0
+
+
+def test_run_bib_to_tex_packed(tmp_path):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    packpath = str(tmp_path / "acronyms.pack")
+    assert run_bib_to_tex([filepath, "-of", "packed",
+                           "--output", packpath]) == ''
+
+    outstr = run_bib_to_tex([packpath, "--filter", "key:a*"])
+    assert outstr == run_bib_to_tex([filepath, "--filter", "key:a*"])
+    assert "\\newacronym{aa}{AA}{An Acronym}" in outstr
+
+
+def test_run_bib_to_tex_packed_compressed(tmp_path, capsys):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    # a packed sibling does not change the format of the compressed input
+    assert run_bib_to_tex([filepath, "-of", "packed",
+                           "--output", str(tmp_path / "acronyms.bib")]) == ''
+    gzpath = str(tmp_path / "acronyms.bib.gz")
+    with open(filepath, "rb") as file_obj:
+        with gzip.open(gzpath, "wb") as gz_obj:
+            gz_obj.write(file_obj.read())
+    assert run_bib_to_tex([gzpath]) == run_bib_to_tex([filepath])
+
+    with pytest.raises(SystemExit) as exc_info:
+        run_bib_to_tex([filepath, "-of", "packed",
+                        "--output", str(tmp_path / "acronyms.pack.gz")])
+    assert exc_info.value.code == 2
+    assert "cannot be compressed" in capsys.readouterr().err
+    assert not os.path.exists(str(tmp_path / "acronyms.pack.gz"))
+
+
+def test_run_bib_to_tex_normalise_escapes(monkeypatch):
+
+    monkeypatch.setattr('sys.stdin', io.StringIO(
+        "@misc{rd,\n  journal = {Research \\& Development at\n"
+        "  50\\% cost},\n  shorttitle = {R\\&D},\n"
+        "  abstract = {uses \\$ and \\_ chars in \\'ecoles}\n}\n"))
+    outstr = run_bib_to_tex(["-", "--normalise"])
+
+    assert outstr == """% Created by bib2glossary
+\\newacronym[description={uses \\$ and \\_ chars in écoles}]{rd}{R\\&D}{Research \\& Development at 50\\% cost}
+"""
+
+
+def test_run_normalise_escapes_roundtrip(tmp_path, monkeypatch):
+
+    definition = "\\newacronym{rd}{R\\&D}{Research \\& Development}"
+    monkeypatch.setattr('sys.stdin', io.StringIO(definition))
+    bibpath = str(tmp_path / "normalised.bib")
+    assert run_tex_to_bib(["-", "--normalise", "-o", bibpath]) == ''
+    outstr = run_bib_to_tex([bibpath])
+
+    assert outstr == "% Created by bib2glossary\n" + definition + "\n"
+
+    monkeypatch.setattr('sys.stdin', io.StringIO(definition))
+    outstr = run_tex_to_bib(["-", "--normalise", "-of", "ndjson"])
+    assert json.loads(outstr)["fields"]["shorttitle"] == "R&D"
+
+
+def test_run_bib_to_tex_csl_json():
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym_csl.json')
+    outstr = run_bib_to_tex([filepath])
+
+    assert outstr == """% Created by bib2glossary
+\\newacronym{aa}{AA}{An Acronym}
+\\newacronym{asa}{ASA}{A Second Acronym}
+\\newacronym[description={a description},plural={AWOs}]{awo}{AWO}{Acronym With Options}
+"""
+
+
+def test_run_bib_to_tex_compressed(tmp_path):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.ndjson')
+    gzpath = str(tmp_path / 'acronym.ndjson.gz')
+    with open(filepath, 'rb') as file_obj:
+        with gzip.open(gzpath, 'wb') as gz_obj:
+            gz_obj.write(file_obj.read())
+    outstr = run_bib_to_tex([gzpath, "--filter", "key:aa"])
+
+    assert outstr == """% Created by bib2glossary
+\\newacronym{aa}{AA}{An Acronym}
+"""
+
+
+def test_run_tex_to_bib_lint(monkeypatch, capsys):
+
+    monkeypatch.setattr('sys.stdin', io.StringIO(
+        "\\newacronym{aa}{AA}{An Acronym}\n"
+        "\\newacronym{ab}{AA}{Another Acronym}\n"
+        "\\newacronym{aa}{AA}{An Acronym}\n"))
+    with pytest.raises(SystemExit) as exc_info:
+        run_tex_to_bib(["-", "--lint"])
+
+    assert exc_info.value.code == 1
+    report = json.loads(capsys.readouterr().out)
+    assert report["entries"] == 2
+    assert [(issue["kind"], issue["keys"]) for issue in report["issues"]] == [
+        ("conflict", ["aa", "ab"]), ("duplicate-key", ["aa"])]
+
+
+def test_run_bib_to_tex_lint(capsys):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    outstr = run_bib_to_tex([filepath, "--lint"])
+
+    assert outstr == ''
+    assert json.loads(capsys.readouterr().out) == {"entries": 3,
+                                                   "issues": []}
+
+
+def test_run_tex_to_bib_check(capsys):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.tex')
+    assert run_tex_to_bib([filepath, "--check"]) == ''
+    captured = capsys.readouterr()
+    assert captured.out == captured.err == ''
+
+
+@pytest.mark.parametrize("fail_fast,nerrors", [(False, 2), (True, 1)])
+def test_run_tex_to_bib_check_errors(monkeypatch, capsys, fail_fast,
+                                     nerrors):
+
+    monkeypatch.setattr('sys.stdin', io.StringIO(
+        "\\newacronym[other={x}]{aa}{AA}{An Acronym}\n"
+        "\\newacronym{aa}{AA}{An Acronym}\n"))
+    with pytest.raises(SystemExit) as exc_info:
+        run_tex_to_bib(["-", "--check"] + (["--fail-fast"] if fail_fast
+                                          else []))
+
+    assert exc_info.value.code == 1
+    errors = capsys.readouterr().err.splitlines()
+    assert len(errors) == nerrors
+    assert "option 'other' in key 'aa' not recognised" in errors[0]
+    if not fail_fast:
+        assert "(row 2) duplicate key 'aa'" in errors[1]
+
+
+def test_run_bib_to_tex_progress(tmp_path, capsys):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.bib')
+    metrics_path = str(tmp_path / "metrics.json")
+    outstr = run_bib_to_tex([filepath, "--progress",
+                             "--metrics-file", metrics_path])
+
+    assert outstr.startswith("% Created by bib2glossary")
+    assert capsys.readouterr().err.startswith("progress: 3 entries")
+    with open(metrics_path) as file_obj:
+        metrics = json.load(file_obj)
+    assert metrics["entries"] == 3
+    assert metrics["bytes"] == os.path.getsize(filepath)
+
+
+@pytest.mark.parametrize("direction", ["tex2bib", "bib2tex"])
+def test_run_progress_incremental(tmp_path, capsys, direction):
+    """entries are counted while the input is read, not after"""
+    if direction == "tex2bib":
+        filepath = str(tmp_path / "acronyms.tex")
+        template = "\\newacronym{{k{0}}}{{K{0}}}{{Key number {0}}}\n"
+        run_func = run_tex_to_bib
+    else:
+        filepath = str(tmp_path / "acronyms.bib")
+        template = ("@misc{{k{0},\n    abbreviation = {{K{0}}},\n"
+                    "    longname = {{Key number {0}}}\n}}\n")
+        run_func = run_bib_to_tex
+    with open(filepath, "w") as file_obj:
+        file_obj.write("".join(template.format(i) for i in range(5000)))
+    total = os.path.getsize(filepath)
+    assert total > 2 * 64 * 1024
+
+    run_func([filepath, "--progress", "--progress-interval", "0"])
+
+    lines = capsys.readouterr().err.splitlines()
+    size = "of {0:.1f} KB".format(total / 1024.)
+    partial = [line for line in lines if line.startswith("progress: ")
+               and not line.startswith("progress: 0 entries")
+               and "{0:.1f} KB {1}".format(total / 1024., size) not in line]
+    assert partial, lines
+    assert lines[-1].startswith("progress: 5000 entries")
+
+
+def test_run_tex_to_bib_stream_metrics(tmp_path):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'acronym.tex')
+    metrics_path = str(tmp_path / "metrics.json")
+    run_tex_to_bib([filepath, "--stream", "--metrics-file", metrics_path])
+
+    with open(metrics_path) as file_obj:
+        assert json.load(file_obj)["entries"] == 3
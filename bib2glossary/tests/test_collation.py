@@ -0,0 +1,57 @@
+import locale
+
+import pytest
+
+from bib2glossary.shared.collation import (plain_text, letter_group,
+                                           make_collation_key,
+                                           collation_locale)
+
+
+def test_plain_text():
+    assert plain_text("\\'{E}cole \\textbf{Normale}") == "Ecole Normale"
+
+
+def test_letter_group():
+    assert letter_group("\\'{e}cole") == "E"
+    assert letter_group("émigré") == "E"
+    assert letter_group("2nd") == "glsnumbers"
+    assert letter_group("$x$") == "glssymbols"
+    assert letter_group("") == "glssymbols"
+
+
+def test_collation_key():
+    collation_key = make_collation_key()
+    values = ["beta", "Émile", "alpha", "\\emph{Delta}", "emu"]
+    assert sorted(values, key=collation_key) == [
+        "alpha", "beta", "\\emph{Delta}", "Émile", "emu"]
+    collation_key("alpha")
+    assert collation_key.cache_info().hits == 1
+
+
+def test_collation_key_locale():
+    previous = locale.setlocale(locale.LC_COLLATE)
+    try:
+        collation_key = make_collation_key("C")
+        assert collation_key("a") > collation_key("B")
+        with pytest.raises(ValueError):
+            make_collation_key("xx_NOT_A_LOCALE")
+        # the process-wide locale is left unchanged
+        assert locale.setlocale(locale.LC_COLLATE) == previous
+    finally:
+        locale.setlocale(locale.LC_COLLATE, previous)
+
+
+def test_collation_locale_restored():
+    previous = locale.setlocale(locale.LC_COLLATE)
+    try:
+        with collation_locale("C.UTF-8"):
+            assert locale.strxfrm("a") > locale.strxfrm("B")
+    except ValueError:
+        pytest.skip("C.UTF-8 locale not available")
+    finally:
+        locale.setlocale(locale.LC_COLLATE, previous)
+    assert locale.setlocale(locale.LC_COLLATE) == previous
+
+    collation_key = make_collation_key("C.UTF-8")
+    assert collation_key("a") > collation_key("B")
+    assert locale.setlocale(locale.LC_COLLATE) == previous
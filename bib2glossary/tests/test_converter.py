@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+from textwrap import dedent
+
+from bib2glossary.acronyms import AcronymConverter
+from bib2glossary.glossaries import GlossaryConverter
+from bib2glossary.shared.converter import Diagnostics
+
+
+def test_diagnostics():
+    diagnostics = Diagnostics(maxlen=2)
+    diagnostics("a")
+    diagnostics.warn("b")
+    diagnostics.warn("c")
+    assert diagnostics.messages == ["b", "c"]
+    assert diagnostics.clear() == ["b", "c"]
+    assert diagnostics.messages == []
+
+
+def test_acronym_converter_reuse():
+    converter = AcronymConverter(param2field={"plural": "note"})
+    tex = converter.bib_to_tex(dedent("""\
+        @misc{otherkey,
+          journal = {Another Name},
+          note = {OTHERs},
+          shorttitle = {OTHER}
+        }
+        @misc{thekey,
+          journal = {The Name},
+          shorttitle = {THE}
+        }
+        """))
+    assert tex == [
+        "\\newacronym[plural={OTHERs}]{otherkey}{OTHER}{Another Name}",
+        "\\newacronym{thekey}{THE}{The Name}"]
+    entries, duplicates = converter.tex_to_dict("\n".join(tex))
+    assert duplicates == {}
+    assert [entry["ID"] for entry in entries] == ["otherkey", "thekey"]
+    assert converter.verify_tex_bib("\n".join(tex), dedent("""\
+        @misc{thekey,
+          journal = {The Name},
+          shorttitle = {THE}
+        }
+        """)) == {"otherkey": "missing from bib"}
+    # the mapping is not shared with callers
+    converter.param2field["plural"] = "series"
+    assert converter.param2field["plural"] == "note"
+
+
+def test_converter_diagnostics():
+    diagnostics = Diagnostics()
+    converter = GlossaryConverter(diagnostics=diagnostics)
+    tex = converter.bib_to_tex(dedent("""\
+        @misc{thekey,
+          journal = {The Name}
+        }
+        """))
+    assert tex == []
+    converter.tex_to_bib("\\newglossaryentry{thekey}{name={a},other={b}}")
+    assert diagnostics.messages == [
+        "Skipping thekey: No abstract key found",
+        "parameter 'other' in key 'thekey' not recognised"]
+
+
+def test_converter_writer_config():
+    converter = AcronymConverter(writer_config={"indent": "\t"})
+    bib = converter.tex_to_bib("\\newacronym{thekey}{THE}{The Name}")
+    assert "\tjournal = {The Name}" in bib
+
+
+def test_converter_threads():
+    converter = AcronymConverter()
+    texts = ["\\newacronym{{key{0}}}{{ABRV{0}}}{{Name {0}}}".format(i)
+             for i in range(20)]
+    expected = [converter.tex_to_bib(text) for text in texts]
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(converter.tex_to_bib, texts))
+    assert results == expected
+    assert converter.diagnostics.messages == []
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from bib2glossary.shared.csljson import (iter_json_items, iter_json_entries,
+                                         item_to_entry)
+
+
+def chunked(text_str, size):
+    return [text_str[i:i + size] for i in range(0, len(text_str), size)]
+
+
+CSL_ITEMS = [
+    {"id": "key1", "type": "entry-dictionary", "container-title": "Name 1",
+     "title-short": "N1", "author": [{"family": "Smith", "given": "J"},
+                                     {"literal": "The Org"}],
+     "issued": {"date-parts": [[2019, 1, 2]]}},
+    {"citation-key": "key2", "id": 12345, "type": "book",
+     "container-title": "Name 2", "volume": 3},
+]
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+def test_iter_json_items_csl(size):
+    text_str = json.dumps(CSL_ITEMS, indent=2)
+    assert list(iter_json_items(chunked(text_str, size))) == CSL_ITEMS
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+def test_iter_json_items_better_bibtex(size):
+    data = {"config": {"id": "x", "options": {"a": [1, 2]}},
+            "version": {"zotero": "6.0"},
+            "items": [{"itemType": "book", "citationKey": "key1"}],
+            "collections": {}}
+    text_str = json.dumps(data, indent=2)
+    assert list(iter_json_items(chunked(text_str, size))) == [
+        {"itemType": "book", "citationKey": "key1"}]
+
+
+def test_iter_json_items_empty():
+    assert list(iter_json_items(["[ ]"])) == []
+    assert list(iter_json_items(['{"items": []}'])) == []
+    assert list(iter_json_items(["{}"])) == []
+
+
+def test_iter_json_items_invalid():
+    with pytest.raises(ValueError):
+        list(iter_json_items(['"a"']))
+    with pytest.raises(ValueError):
+        list(iter_json_items(['[{"id": "a"}', ' {"id": "b"}]']))
+    with pytest.raises(ValueError):
+        list(iter_json_items(['[{"id": "a"']))
+
+
+def test_item_to_entry_csl():
+    assert item_to_entry(CSL_ITEMS[0]) == {
+        "ID": "key1", "ENTRYTYPE": "misc", "journal": "Name 1",
+        "shorttitle": "N1", "author": "Smith, J and The Org", "year": "2019"}
+    assert item_to_entry(CSL_ITEMS[1]) == {
+        "ID": "key2", "ENTRYTYPE": "book", "journal": "Name 2",
+        "volume": "3"}
+
+
+def test_item_to_entry_better_bibtex():
+    item = {"itemType": "dictionaryEntry", "citationKey": "key1",
+            "dictionaryTitle": "Name 1", "shortTitle": "N1",
+            "abstractNote": "a description", "series": "N1s",
+            "place": "Somewhere", "date": "March 2018",
+            "creators": [{"creatorType": "author", "lastName": "Smith",
+                          "firstName": "J"},
+                         {"creatorType": "editor", "name": "An Editor"}],
+            "tags": [{"tag": "a"}]}
+    assert item_to_entry(item) == {
+        "ID": "key1", "ENTRYTYPE": "misc", "journal": "Name 1",
+        "shorttitle": "N1", "abstract": "a description", "series": "N1s",
+        "address": "Somewhere", "author": "Smith, J", "year": "2018"}
+
+
+def test_iter_json_entries_missing_key():
+    warnings = []
+    entries = list(iter_json_entries(
+        ['[{"itemType": "book"}, {"itemType": "book", "citekey": "a"}]'],
+        warning_handler=warnings.append))
+    assert entries == [{"ID": "a", "ENTRYTYPE": "book"}]
+    assert warnings == ["Skipping item 1: No citation key found"]
@@ -0,0 +1,22 @@
+from bib2glossary.shared.depfile import (escape_path, format_depfile,
+                                         Dependencies)
+
+
+def test_escape_path():
+    assert escape_path("my dir/a#b$c.tex") == "my\\ dir/a\\#b$$c.tex"
+
+
+def test_format_depfile():
+    assert format_depfile(["a.tex", "b.tex"], ["a.bib", "p2f.json"]) == (
+        "a.tex b.tex: a.bib p2f.json\n")
+    assert format_depfile(["a.tex"], []) == "a.tex:\n"
+
+
+def test_dependencies():
+    dependencies = Dependencies(["out.tex", None])
+    dependencies.add_input("-")
+    dependencies.add_input("in.bib")
+    dependencies.add_input("in.bib")
+    dependencies.add_output("-")
+    dependencies.add_output("other.tex")
+    assert dependencies.format() == "out.tex other.tex: in.bib\n"
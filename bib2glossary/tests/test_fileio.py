@@ -0,0 +1,92 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+
+import pytest
+
+from bib2glossary.shared.fileio import (open_input, open_output, iter_chunks,
+                                        detect_compression, strip_compression,
+                                        write_output)
+
+TEXT = "\\newacronym{aa}{AA}{An ácronym}\n" * 100
+
+
+@pytest.mark.parametrize("ext", ["", ".gz", ".bz2", ".xz"])
+def test_roundtrip(tmp_path, ext):
+    path = str(tmp_path / ("file.tex" + ext))
+    with open_output(path) as file_obj:
+        file_obj.write(TEXT)
+    with open_input(path) as file_obj:
+        assert "".join(iter_chunks(file_obj, chunk_size=16)) == TEXT
+
+
+@pytest.mark.parametrize("compress,compression", [
+    (gzip.compress, "gzip"), (bz2.compress, "bz2"), (lzma.compress, "xz")])
+def test_detect_by_magic_bytes(tmp_path, compress, compression):
+    data = compress(TEXT.encode("utf8"))
+    assert detect_compression(data[:10]) == compression
+    path = tmp_path / "file.tex"
+    path.write_bytes(data)
+    with open_input(str(path)) as file_obj:
+        assert file_obj.read() == TEXT
+
+
+@pytest.mark.parametrize("ext", ["", ".gz"])
+def test_crlf_line_endings(tmp_path, ext):
+    path = str(tmp_path / ("file.tex" + ext))
+    data = TEXT.replace("\n", "\r\n").encode("utf8")
+    if ext:
+        data = gzip.compress(data)
+    with open(path, "wb") as binary:
+        binary.write(data)
+    # chunk boundaries fall between the \r and \n of some line endings
+    for chunk_size in (16, 17):
+        with open_input(path) as file_obj:
+            assert "".join(iter_chunks(file_obj, chunk_size)) == TEXT
+
+
+def test_detect_uncompressed():
+    assert detect_compression(b"BZh is not bzip2") is None
+    assert detect_compression(TEXT.encode("utf8")) is None
+
+
+def test_compressed_stdin(monkeypatch):
+    stdin = io.TextIOWrapper(io.BufferedReader(
+        io.BytesIO(gzip.compress(TEXT.encode("utf8")))), encoding="utf8")
+    monkeypatch.setattr('sys.stdin', stdin)
+    with open_input("-") as file_obj:
+        assert "".join(iter_chunks(file_obj)) == TEXT
+    assert not stdin.closed
+
+
+def test_strip_compression():
+    assert strip_compression("a/file.ndjson.GZ") == "a/file.ndjson"
+    assert strip_compression("a/file.ndjson") == "a/file.ndjson"
+
+
+@pytest.mark.parametrize("ext", ["", ".gz", ".bz2", ".xz"])
+def test_write_output_unchanged(tmp_path, ext):
+    path = str(tmp_path / ("file.tex" + ext))
+    assert write_output(path, TEXT)
+    os.chmod(path, 0o640)
+    os.utime(path, (0, 0))
+    assert not write_output(path, TEXT)
+    assert os.stat(path).st_mtime == 0
+    assert write_output(path, TEXT + "%")
+    assert os.stat(path).st_mtime != 0
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(str(tmp_path)) == ["file.tex" + ext]
+
+
+def test_open_output_error(tmp_path):
+    path = str(tmp_path / "file.tex")
+    write_output(path, TEXT)
+    with pytest.raises(ValueError):
+        with open_output(path) as file_obj:
+            file_obj.write("partial")
+            raise ValueError
+    with open_input(path) as file_obj:
+        assert file_obj.read() == TEXT
+    assert os.listdir(str(tmp_path)) == ["file.tex"]
@@ -0,0 +1,38 @@
+import pytest
+from bib2glossary.shared.filtering import compile_filter
+
+ENTRIES = [
+    {'ENTRYTYPE': 'misc', 'ID': 'chem:aa', 'journal': 'An Acronym'},
+    {'ENTRYTYPE': 'other', 'ID': 'phys:bb', 'abstract': 'a description'},
+    {'ENTRYTYPE': 'misc', 'ID': 'chem:cc', 'abstract': 'a description'},
+    {'ENTRYTYPE': 'article', 'ID': 'dd'},
+]
+
+
+def select(expression):
+    entry_filter = compile_filter(expression)
+    return [entry['ID'] for entry in ENTRIES if entry_filter(entry)]
+
+
+def test_filter_terms():
+
+    assert select("") == ['chem:aa', 'phys:bb', 'chem:cc', 'dd']
+    assert select("type:misc,other") == ['chem:aa', 'phys:bb', 'chem:cc']
+    assert select("key:chem:*,d?") == ['chem:aa', 'chem:cc', 'dd']
+    assert select("keyre:[ab]{2}$") == ['chem:aa', 'phys:bb']
+    assert select("has:abstract") == ['phys:bb', 'chem:cc']
+    assert select('field:journal="An Acronym"') == ['chem:aa']
+
+
+def test_filter_combined():
+
+    assert select("type:misc,other has:abstract") == ['phys:bb', 'chem:cc']
+    assert select(["type:misc,other", "key:chem:*"]) == ['chem:aa', 'chem:cc']
+
+
+@pytest.mark.parametrize("expression", [
+    "type", "unknown:value", "keyre:(", "field:journal"])
+def test_filter_invalid(expression):
+
+    with pytest.raises(ValueError):
+        compile_filter(expression)
@@ -1,7 +1,9 @@
 import os
+import pytest
 from bib2glossary.tests import TEST_DIR
 from bib2glossary.glossaries import (bib_to_tex, tex_to_dict, tex_to_bib,
                                    run_tex_to_bib, run_bib_to_tex)
+from bib2glossary.shared.collation import make_collation_key
 
 
 def test_bib_to_tex():
@@ -149,3 +151,299 @@ def test_run_bib_to_tex_missing_type():
     expected = """% Created by bib2glossary
 """
     assert outstr == expected
+
+
+def test_run_tex_to_bib_verify():
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'glossary.tex')
+    bibpath = os.path.join(TEST_DIR, 'examples', 'glossary.bib')
+    outstr = run_tex_to_bib([filepath, "--verify", bibpath])
+    assert outstr == ''
+
+
+def test_run_bib_to_tex_partition(tmp_path):
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'glossary.bib')
+    template = str(tmp_path / "glossary-{}.tex")
+    outstr = run_bib_to_tex([filepath, "--partition-by", "field:publisher",
+                             "--partition-output", template])
+    assert outstr == ''
+    assert sorted(os.listdir(str(tmp_path))) == ["glossary-sortid.tex"]
+    with open(template.format("sortid")) as file_obj:
+        assert file_obj.read() == """% Created by bib2glossary
+\\newglossaryentry{thekey}{
+    description={the description},
+    name={name},
+    sort={sortid}
+}
+"""
+
+
+def test_run_bib_to_tex_partition_collisions(tmp_path):
+
+    filepath = str(tmp_path / "glossary.bib")
+    with open(filepath, "w") as file_obj:
+        for key, value in [("k1", "日本"), ("k2", "中国"), ("k3", "a b"),
+                           ("k4", "a_b"), ("k5", "en")]:
+            file_obj.write("@misc{{{0},\n  journal = {{{0}}},\n"
+                           "  abstract = {{{1}}}\n}}\n".format(key, value))
+    template = str(tmp_path / "out_{}.tex")
+    run_bib_to_tex([filepath, "--partition-by", "field:abstract",
+                    "--partition-output", template])
+
+    outputs = sorted(name for name in os.listdir(str(tmp_path))
+                     if name.startswith("out_"))
+    assert len(outputs) == 5
+    contents = ""
+    for name in outputs:
+        with open(str(tmp_path / name)) as file_obj:
+            contents += file_obj.read()
+    for key in ("k1", "k2", "k3", "k4", "k5"):
+        assert "\\newglossaryentry{%s}" % key in contents
+
+
+def test_run_tex_to_bib_macros(tmp_path):
+
+    filepath = str(tmp_path / "preamble.tex")
+    with open(filepath, "w") as file_obj:
+        file_obj.write("""
+\\newacronym{aa}{AA}{An Acronym}
+\\newglossaryentry{thekey}{name={name},description={the description}}
+""")
+    template = str(tmp_path / "{}.bib")
+    outstr = run_tex_to_bib([filepath,
+                             "--macros", "newglossaryentry", "newacronym=acronym",
+                             "--partition-output", template])
+
+    assert outstr == ''
+    with open(template.format("newacronym")) as file_obj:
+        assert file_obj.read() == """@acronym{aa,
+  journal = {An Acronym},
+  shorttitle = {AA}
+}
+
+"""
+    with open(template.format("newglossaryentry")) as file_obj:
+        assert file_obj.read() == """@misc{thekey,
+  abstract = {the description},
+  journal = {name}
+}
+
+"""
+
+
+def test_bib_to_tex_collated():
+
+    text_str = """@misc{key1,
+  abstract = {d},
+  journal = {zeta}
+}
+@misc{key2,
+  abstract = {d},
+  journal = {\\'{E}cole}
+}
+@misc{key3,
+  abstract = {d},
+  journal = {alpha},
+  publisher = {epsilon}
+}
+@misc{key4,
+  abstract = {d},
+  journal = {2nd}
+}
+"""
+    result = bib_to_tex(text_str, collation=make_collation_key())
+    assert [line.splitlines()[0] for line in result] == [
+        "% group: glsnumbers",
+        "\\newglossaryentry{key4}{",
+        "% group: E",
+        "\\newglossaryentry{key2}{",
+        "\\newglossaryentry{key3}{",
+        "% group: Z",
+        "\\newglossaryentry{key1}{"]
+
+
+def test_run_bib_to_tex_collate():
+
+    filepath = os.path.join(TEST_DIR, 'examples', 'glossary.bib')
+    outstr = run_bib_to_tex([filepath, "--collate"])
+    assert outstr.splitlines()[:2] == ["% Created by bib2glossary",
+                                       "% group: O"]
+    assert "% group: S" in outstr.splitlines()
+
+
+def test_run_bib_to_tex_check(tmp_path, capsys):
+
+    filepath = str(tmp_path / "glossary.bib")
+    with open(filepath, "w") as file_obj:
+        file_obj.write("@misc{thekey,\n  journal = {name}\n}\n")
+    with pytest.raises(SystemExit) as exc_info:
+        run_bib_to_tex([filepath, "--check"])
+
+    assert exc_info.value.code == 1
+    assert ("no abstract field found for key 'thekey'"
+            in capsys.readouterr().err)
+
+
+HIERARCHY_BIB = """
+@misc{bird,
+  abstract = {a bird},
+  journal = {bird},
+  note = {animal}
+}
+@misc{animal,
+  abstract = {an animal},
+  journal = {animal}
+}
+@misc{swan,
+  abstract = {a swan},
+  journal = {swan},
+  note = {bird}
+}
+@misc{tree,
+  abstract = {a tree},
+  journal = {tree},
+  number = {swan}
+}
+"""
+
+
+def test_bib_to_tex_parents_first():
+
+    result = bib_to_tex(HIERARCHY_BIB, param2field={"parent": "note"},
+                        entry_filter="key:swan,bird,animal")
+    assert [line.splitlines()[0] for line in result] == [
+        "\\newglossaryentry{animal}{",
+        "\\newglossaryentry{bird}{",
+        "\\newglossaryentry{swan}{"]
+
+
+def test_bib_to_tex_references():
+
+    result = bib_to_tex(HIERARCHY_BIB,
+                        param2field={"parent": "note", "see": "number"},
+                        entry_filter="key:tree", references=True)
+    assert [line.splitlines()[0] for line in result] == [
+        "\\newglossaryentry{animal}{",
+        "\\newglossaryentry{bird}{",
+        "\\newglossaryentry{swan}{",
+        "\\newglossaryentry{tree}{"]
+    assert "    see={swan}" in result[-1]
+
+
+def test_bib_to_tex_collated_parents():
+
+    text_str = HIERARCHY_BIB.replace("journal = {animal}",
+                                     "journal = {zoo animal}")
+    result = bib_to_tex(text_str, param2field={"parent": "note"},
+                        collation=make_collation_key())
+    assert [line.splitlines()[0] for line in result] == [
+        "% group: T",
+        "\\newglossaryentry{tree}{",
+        "% group: Z",
+        "\\newglossaryentry{animal}{",
+        "\\newglossaryentry{bird}{",
+        "\\newglossaryentry{swan}{"]
+
+
+def test_run_bib_to_tex_with_references(tmp_path):
+
+    filepath = str(tmp_path / "glossary.bib")
+    with open(filepath, "w") as file_obj:
+        file_obj.write(HIERARCHY_BIB)
+    p2f_path = str(tmp_path / "p2f.json")
+    with open(p2f_path, "w") as file_obj:
+        file_obj.write('{"parent": "note"}')
+    outstr = run_bib_to_tex([filepath, "-p2f", p2f_path,
+                             "--filter", "key:swan", "--with-references"])
+
+    assert [line for line in outstr.splitlines()
+            if line.startswith("\\newglossaryentry")] == [
+        "\\newglossaryentry{animal}{",
+        "\\newglossaryentry{bird}{",
+        "\\newglossaryentry{swan}{"]
+
+
+@pytest.mark.parametrize("sort_buffer", [[], ["--sort-buffer", "1"]])
+def test_run_bib_to_tex_stream_parents(tmp_path, capsys, sort_buffer):
+
+    filepath = str(tmp_path / "glossary.bib")
+    with open(filepath, "w") as file_obj:
+        file_obj.write(HIERARCHY_BIB.replace("number = {swan}",
+                                             "note = {plant}"))
+    p2f_path = str(tmp_path / "p2f.json")
+    with open(p2f_path, "w") as file_obj:
+        file_obj.write('{"parent": "note"}')
+    run_bib_to_tex([filepath, "-p2f", p2f_path, "--stream"] + sort_buffer)
+
+    captured = capsys.readouterr()
+    assert [line for line in captured.out.splitlines()
+            if line.startswith("\\newglossaryentry")] == [
+        "\\newglossaryentry{animal}{",
+        "\\newglossaryentry{bird}{",
+        "\\newglossaryentry{swan}{",
+        "\\newglossaryentry{tree}{"]
+    assert "refers to undefined parent: plant" in captured.err
+    assert "undefined parent: animal" not in captured.err
+    assert "undefined parent: bird" not in captured.err
+
+
+def test_run_tex_to_bib_check_references(tmp_path, capsys):
+
+    filepath = str(tmp_path / "glossary.tex")
+    with open(filepath, "w") as file_obj:
+        file_obj.write("""
+\\newglossaryentry{a}{name={a},description={a},parent={b}}
+\\newglossaryentry{b}{name={b},description={b},parent={a}}
+\\newglossaryentry{c}{name={c},description={c},see={[see also]{x}}}
+""")
+    p2f_path = str(tmp_path / "p2f.json")
+    with open(p2f_path, "w") as file_obj:
+        file_obj.write('{"parent": "note", "see": "number"}')
+    with pytest.raises(SystemExit) as exc_info:
+        run_tex_to_bib([filepath, "-p2f", p2f_path, "--check"])
+
+    assert exc_info.value.code == 1
+    errors = capsys.readouterr().err
+    assert "undefined see 'x' referenced by key 'c'" in errors
+    assert "parent cycle: a -> b -> a" in errors
+
+
+def test_run_bib_to_tex_depfile(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(str(tmp_path))
+    with open("glossary.bib", "w") as file_obj:
+        file_obj.write(HIERARCHY_BIB)
+    with open("p2f.json", "w") as file_obj:
+        file_obj.write('{"parent": "note"}')
+    run_bib_to_tex(["glossary.bib", "-p2f", "p2f.json",
+                    "--partition-by", "field:note",
+                    "--partition-output", "out-{}.tex",
+                    "--depfile", "glossary.d"])
+
+    with open("glossary.d") as file_obj:
+        assert file_obj.read() == (
+            "out-animal.tex out-bird.tex: glossary.bib p2f.json\n")
+
+    with pytest.raises(SystemExit):
+        run_bib_to_tex(["glossary.bib", "--depfile", "glossary.d"])
+
+
+def test_run_depfile_failed_conversion(tmp_path, monkeypatch):
+
+    monkeypatch.chdir(str(tmp_path))
+    with open("glossary.tex", "w") as file_obj:
+        file_obj.write("\\newglossaryentry{a}{name={a},description={a}}\n"
+                       * 3)
+    with pytest.raises(SystemExit):
+        run_tex_to_bib(["glossary.tex", "--max-entries", "2",
+                        "-o", "glossary.bib", "--depfile", "glossary.d"])
+    assert not os.path.exists("glossary.bib")
+    assert not os.path.exists("glossary.d")
+
+    with open("glossary.bib", "w") as file_obj:
+        file_obj.write(HIERARCHY_BIB)
+    assert run_bib_to_tex(["glossary.bib", "--input-format", "packed",
+                           "-o", "glossary.tex",
+                           "--depfile", "glossary.d"]) == ''
+    assert not os.path.exists("glossary.d")
@@ -0,0 +1,80 @@
+from bib2glossary.shared.graph import parse_references, ReferenceGraph
+
+PARAM2FIELD = {"parent": "parentfield", "see": "seefield"}
+
+
+def make_graph(entries):
+    graph = ReferenceGraph(PARAM2FIELD)
+    for row, entry in enumerate(entries):
+        graph.add(entry, row)
+    return graph
+
+
+def test_parse_references():
+    assert parse_references("a") == ["a"]
+    assert parse_references(" a, b ") == ["a", "b"]
+    assert parse_references("{a,b}") == ["a", "b"]
+    assert parse_references("[see also]{a, b}") == ["a", "b"]
+    assert parse_references("") == []
+
+
+def test_unmapped():
+    graph = ReferenceGraph({"name": "journal"})
+    graph.add({"ID": "a", "parentfield": "b"})
+    assert graph.params == ()
+    assert graph.dangling() == []
+
+
+def test_dangling():
+    graph = make_graph([
+        {"ID": "a", "parentfield": "b"},
+        {"ID": "b", "seefield": "[see also]{a,x}"}])
+    assert graph.dangling() == [("b", "see", "x")]
+    assert graph.dangling({"a"}) == [("a", "parent", "b")]
+
+
+def test_cycles():
+    graph = make_graph([
+        {"ID": "a", "parentfield": "b"},
+        {"ID": "b", "parentfield": "c"},
+        {"ID": "c", "parentfield": "b"},
+        {"ID": "d", "parentfield": "d"},
+        {"ID": "e", "seefield": "f"},
+        {"ID": "f", "seefield": "e"}])
+    assert graph.cycles() == [["b", "c"], ["d"]]
+
+
+def test_closure():
+    graph = make_graph([
+        {"ID": "a"},
+        {"ID": "b", "parentfield": "a"},
+        {"ID": "c", "parentfield": "b", "seefield": "d,x"},
+        {"ID": "d"},
+        {"ID": "e"}])
+    assert graph.closure(["c"]) == {"a", "b", "c", "d"}
+    assert graph.closure(["x"]) == set()
+
+
+def test_order():
+    entries = [{"ID": "a", "parentfield": "c"},
+               {"ID": "b", "parentfield": "a"},
+               {"ID": "c"},
+               {"ID": "d"},
+               {"ID": "e", "parentfield": "e"}]
+    graph = make_graph(entries)
+    assert [entry["ID"] for entry in graph.order(entries)] == [
+        "c", "a", "b", "d", "e"]
+
+
+def test_iter_order():
+    entries = [{"ID": "a", "parentfield": "c"},
+               {"ID": "b", "parentfield": "a"},
+               {"ID": "x", "parentfield": "undefined"},
+               {"ID": "c"},
+               {"ID": "d"},
+               {"ID": "e", "parentfield": "f"},
+               {"ID": "f", "parentfield": "e"}]
+    graph = ReferenceGraph(PARAM2FIELD)
+    assert [entry["ID"] for entry in graph.iter_order(iter(entries))] == [
+        "c", "a", "b", "d", "x", "e", "f"]
+    assert graph.dangling() == [("x", "parent", "undefined")]
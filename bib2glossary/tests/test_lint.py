@@ -0,0 +1,54 @@
+from bib2glossary.shared.lint import lint_entries, fingerprint
+from bib2glossary.shared.macros import ABBREVIATION_P2F
+
+PARAMS = ("abbreviation", "longname", "description")
+
+
+def test_fingerprint():
+    assert fingerprint("  The {\\emph{Long}}\n Name. ") == "the long name"
+    assert fingerprint("A-B") == fingerprint("a b")
+    assert fingerprint("C\\#", symbols=True) == "c#"
+    assert fingerprint(" {C}++ ", symbols=True) == "c++"
+    assert fingerprint("A-B", symbols=True) != fingerprint("a b",
+                                                           symbols=True)
+
+
+def test_lint_entries():
+    entries = [
+        {"ID": "a1", "shorttitle": "AB", "journal": "A B"},
+        {"ID": "a2", "shorttitle": "A{B}", "journal": "A  b"},
+        {"ID": "b1", "shorttitle": "CD", "journal": "C D"},
+        {"ID": "b2", "shorttitle": "cd", "journal": "Cee Dee"},
+        {"ID": "c1", "shorttitle": "EF", "journal": "E F",
+         "abstract": "same"},
+        {"ID": "c2", "shorttitle": "GH", "journal": "G H",
+         "abstract": "Same"},
+    ]
+    issues, count = lint_entries(iter(entries), dict(ABBREVIATION_P2F),
+                                 PARAMS, duplicates={"a1": [3, None]})
+    assert count == 6
+    assert issues == [
+        {"kind": "collision", "param": "abbreviation", "value": "AB",
+         "keys": ["a1", "a2"]},
+        {"kind": "collision", "param": "description", "value": "same",
+         "keys": ["c1", "c2"]},
+        {"kind": "collision", "param": "longname", "value": "A B",
+         "keys": ["a1", "a2"]},
+        {"kind": "conflict", "param": "abbreviation", "value": "CD",
+         "keys": ["b1", "b2"], "values": ["C D", "Cee Dee"]},
+        {"kind": "duplicate-key", "param": "key", "value": "a1",
+         "keys": ["a1"], "rows": [3]},
+    ]
+
+
+def test_lint_entries_clean():
+    entries = [{"ID": "a", "shorttitle": "A", "journal": "A"},
+               {"ID": "b", "shorttitle": "B", "journal": "B"}]
+    assert lint_entries(entries, dict(ABBREVIATION_P2F), PARAMS) == ([], 2)
+
+
+def test_lint_entries_symbols():
+    entries = [{"ID": "cpp", "shorttitle": "C++", "journal": "C Plus Plus"},
+               {"ID": "csharp", "shorttitle": "C\\#", "journal": "C Sharp"},
+               {"ID": "c", "shorttitle": "C", "journal": "C Language"}]
+    assert lint_entries(entries, dict(ABBREVIATION_P2F), PARAMS) == ([], 3)
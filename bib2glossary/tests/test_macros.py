@@ -0,0 +1,79 @@
+import pytest
+from bib2glossary.shared.macros import (extract_definitions, register_macro,
+                                        MacroSpec, MACROS, glossary_layout,
+                                        GLOSSARY_P2F)
+
+TEXT_STR = """
+\\newacronym{aa}{AA}{An Acronym}
+\\newglossaryentry{gg}{
+    name={glossary name},
+    description={glossary description}
+}
+\\longnewglossaryentry{ll}{name={long name}}{
+    a long description
+}
+\\newabbreviation[description={a description}]{ab}{AB}{An Abbreviation}
+\\newacronym{gg}{GG}{Duplicate key}
+"""
+
+
+def test_extract_definitions():
+
+    entries, duplicates = extract_definitions(TEXT_STR)
+
+    assert entries == {
+        'newacronym': [
+            {'ENTRYTYPE': 'misc', 'ID': 'aa',
+             'shorttitle': 'AA', 'journal': 'An Acronym'}],
+        'newabbreviation': [
+            {'ENTRYTYPE': 'misc', 'ID': 'ab',
+             'shorttitle': 'AB', 'journal': 'An Abbreviation',
+             'abstract': 'a description'}],
+        'newglossaryentry': [
+            {'ENTRYTYPE': 'misc', 'ID': 'gg',
+             'journal': 'glossary name', 'abstract': 'glossary description'}],
+        'longnewglossaryentry': [
+            {'ENTRYTYPE': 'misc', 'ID': 'll',
+             'journal': 'long name',
+             'abstract': '\n    a long description\n'}],
+    }
+    assert duplicates == {'gg': [11]}
+
+
+def test_extract_definitions_subset():
+
+    entries, _ = extract_definitions(
+        TEXT_STR, {'newacronym': 'acronym', 'newabbreviation': None},
+        entry_type='other')
+
+    assert entries == {
+        'newacronym': [
+            {'ENTRYTYPE': 'acronym', 'ID': 'aa',
+             'shorttitle': 'AA', 'journal': 'An Acronym'},
+            {'ENTRYTYPE': 'acronym', 'ID': 'gg',
+             'shorttitle': 'GG', 'journal': 'Duplicate key'}],
+        'newabbreviation': [
+            {'ENTRYTYPE': 'other', 'ID': 'ab',
+             'shorttitle': 'AB', 'journal': 'An Abbreviation',
+             'abstract': 'a description'}],
+    }
+
+
+def test_extract_definitions_unknown():
+
+    with pytest.raises(ValueError):
+        extract_definitions(TEXT_STR, ['newunknown'])
+
+
+def test_register_macro():
+
+    register_macro(MacroSpec("newdualentry", "dual entry",
+                             glossary_layout, GLOSSARY_P2F, 2))
+    try:
+        entries, _ = extract_definitions(
+            "\\newdualentry{dd}{name={dual}}", ['newdualentry'])
+    finally:
+        MACROS.pop("newdualentry")
+
+    assert entries == {'newdualentry': [
+        {'ENTRYTYPE': 'misc', 'ID': 'dd', 'journal': 'dual'}]}
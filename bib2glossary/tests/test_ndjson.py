@@ -0,0 +1,43 @@
+import io
+import pytest
+from bib2glossary.shared.ndjson import (entry_to_json, json_to_entry,
+                                        iter_ndjson, write_ndjson)
+
+
+def test_round_trip():
+
+    entries = [
+        {'ENTRYTYPE': 'misc', 'ID': 'thekey',
+         'journal': 'Abbreviation', 'shorttitle': 'ABRV'},
+        {'ENTRYTYPE': 'other', 'ID': 'otherkey',
+         'journal': 'Abbreviation of other', 'abstract': 'a {\\bf} "quote"'}
+    ]
+
+    ndjson_str = write_ndjson(entries)
+
+    assert ndjson_str.count("\n") == 2
+    assert list(iter_ndjson(io.StringIO(ndjson_str))) == entries
+
+
+def test_entry_to_json():
+
+    entry = {'ENTRYTYPE': 'misc', 'ID': 'thekey', 'shorttitle': 'ABRV'}
+
+    assert entry_to_json(entry) == (
+        '{"fields": {"shorttitle": "ABRV"}, "key": "thekey", "type": "misc"}')
+    assert json_to_entry(entry_to_json(entry)) == entry
+
+
+def test_iter_ndjson_is_lazy():
+
+    def lines():
+        yield '{"key": "a"}\n'
+        raise RuntimeError("read too far")
+
+    assert next(iter_ndjson(lines())) == {'ENTRYTYPE': 'misc', 'ID': 'a'}
+
+
+def test_iter_ndjson_error():
+
+    with pytest.raises(ValueError, match="row 2"):
+        list(iter_ndjson(['{"key": "a"}', '{"fields": {}}']))
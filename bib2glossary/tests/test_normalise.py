@@ -0,0 +1,39 @@
+from bib2glossary.shared.normalise import (latex_to_unicode,
+                                           collapse_whitespace,
+                                           make_normaliser, normalise_entry)
+
+
+def test_latex_to_unicode_accents():
+    assert latex_to_unicode("\\'ecole {\\'e}t\\'{e}") == "école {é}té"
+    assert latex_to_unicode('\\"o \\c{c}a \\c ca \\v{S}koda') == (
+        "ö ça ça Škoda")
+    assert latex_to_unicode("na\\\"\\i ve") == "naïve"
+
+
+def test_latex_to_unicode_symbols_escapes():
+    assert latex_to_unicode("Stra\\ss e \\o{} {\\AE}") == "Straße ø {Æ}"
+    assert latex_to_unicode("R\\&D 50\\% \\$1") == "R&D 50% $1"
+    assert latex_to_unicode("\\'e R\\&D 50\\% \\$1 \\_", escapes=False) == (
+        "é R\\&D 50\\% \\$1 \\_")
+
+
+def test_latex_to_unicode_unknown():
+    assert latex_to_unicode("\\emph{x} \\cite{y}") == "\\emph{x} \\cite{y}"
+
+
+def test_collapse_whitespace():
+    assert collapse_whitespace("  a\n  b\t c ") == "a b c"
+
+
+def test_make_normaliser():
+    normaliser = make_normaliser()
+    assert normaliser("caf\\'e\n  au lait") == "café au lait"
+    normaliser("caf\\'e\n  au lait")
+    assert normaliser.cache_info().hits == 1
+    assert make_normaliser(latex=False)("caf\\'e\n au") == "caf\\'e au"
+
+
+def test_normalise_entry():
+    entry = {"ID": "a\\'b", "ENTRYTYPE": "misc", "journal": "\\'A  b"}
+    assert normalise_entry(entry, make_normaliser()) == {
+        "ID": "a\\'b", "ENTRYTYPE": "misc", "journal": "Á b"}
@@ -0,0 +1,44 @@
+import pytest
+
+from bib2glossary.shared.packed import (write_packed, PackedLibrary,
+                                        iter_packed, is_packed_path)
+from bib2glossary.shared.progress import Progress
+
+ENTRIES = [
+    {"ID": "aa", "ENTRYTYPE": "misc", "journal": "An ácronym"},
+    {"ID": "bb", "ENTRYTYPE": "book", "journal": "B", "abstract": "b"}]
+
+
+def test_roundtrip(tmp_path):
+    path = str(tmp_path / "library.pack")
+    assert write_packed(ENTRIES, path) == 2
+    assert is_packed_path(path)
+    with PackedLibrary(path) as library:
+        assert len(library) == 2
+        assert list(library) == ENTRIES
+
+
+def test_empty(tmp_path):
+    path = str(tmp_path / "library.pack")
+    write_packed([], path)
+    assert list(iter_packed(path)) == []
+
+
+def test_progress(tmp_path):
+    path = str(tmp_path / "library.pack")
+    write_packed(ENTRIES, path)
+    progress = Progress()
+    assert list(iter_packed(path, progress=progress)) == ENTRIES
+    assert progress.nbytes > 0
+
+
+def test_invalid(tmp_path):
+    path = tmp_path / "library.pack"
+    path.write_bytes(b"@misc{aa,\n  journal = {A}\n}\n")
+    assert not is_packed_path(str(path))
+    with pytest.raises(ValueError):
+        PackedLibrary(str(path))
+    write_packed(ENTRIES, str(path))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        PackedLibrary(str(path))
@@ -0,0 +1,58 @@
+import pytest
+from bib2glossary.shared.parsing import (parse_bib, iter_bib_entries,
+                                         iter_parse_bib)
+
+TEXT_STR = """
+@string{abbrv = "Abbreviation"}
+comment text @ not an entry
+@misc{thekey,
+  shorttitle = {ABRV},
+  journal = abbrv # { (with braces {})}
+}
+@misc(otherkey,
+  shorttitle = {OTHER},
+  journal = {Abbreviation of other}
+)
+"""
+
+
+def test_iter_bib_entries():
+
+    entries = list(iter_bib_entries([TEXT_STR]))
+
+    assert entries == [
+        '@string{abbrv = "Abbreviation"}',
+        '@misc{thekey,\n  shorttitle = {ABRV},\n'
+        '  journal = abbrv # { (with braces {})}\n}',
+        '@misc(otherkey,\n  shorttitle = {OTHER},\n'
+        '  journal = {Abbreviation of other}\n)'
+    ]
+
+
+def test_iter_bib_entries_chunks():
+
+    expected = list(iter_bib_entries([TEXT_STR]))
+    for size in range(1, 20):
+        chunks = [TEXT_STR[i:i + size]
+                  for i in range(0, len(TEXT_STR), size)]
+        assert list(iter_bib_entries(chunks)) == expected
+
+
+def test_iter_parse_bib():
+
+    expected = sorted(parse_bib(TEXT_STR).values(),
+                      key=lambda entry: entry['ID'])
+
+    assert expected[1]['journal'] == 'Abbreviation (with braces {})'
+    for size in (1, 7, 100):
+        chunks = [TEXT_STR[i:i + size]
+                  for i in range(0, len(TEXT_STR), size)]
+        entries = sorted(iter_parse_bib(chunks),
+                         key=lambda entry: entry['ID'])
+        assert entries == expected
+
+
+def test_iter_bib_entries_unbalanced():
+
+    with pytest.raises(ValueError, match="unbalanced"):
+        list(iter_bib_entries(["@misc{thekey,\n  shorttitle = {ABRV}\n"]))
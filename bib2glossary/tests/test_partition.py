@@ -0,0 +1,62 @@
+import pytest
+from bib2glossary.shared.partition import (partition_entries,
+                                           partition_path, partition_paths)
+
+ENTRIES = [
+    {'ENTRYTYPE': 'misc', 'ID': 'chem:aa', 'language': 'en'},
+    {'ENTRYTYPE': 'other', 'ID': 'phys:bb', 'language': 'de'},
+    {'ENTRYTYPE': 'misc', 'ID': 'chem:cc'},
+    {'ENTRYTYPE': 'misc', 'ID': 'dd'},
+]
+
+
+def test_partition_by_type():
+
+    partitions = partition_entries(ENTRIES, "type")
+
+    assert partitions == {
+        'misc': [ENTRIES[0], ENTRIES[2], ENTRIES[3]],
+        'other': [ENTRIES[1]]}
+
+
+def test_partition_by_prefix():
+
+    warnings = []
+    partitions = partition_entries(ENTRIES, "prefix",
+                                   warning_handler=warnings.append)
+
+    assert partitions == {
+        'chem': [ENTRIES[0], ENTRIES[2]],
+        'phys': [ENTRIES[1]]}
+    assert warnings == ["Skipping dd: No partition found for 'prefix'"]
+
+
+def test_partition_by_field():
+
+    partitions = partition_entries(ENTRIES, "field:language")
+
+    assert partitions == {
+        'en': [ENTRIES[0]],
+        'de': [ENTRIES[1]]}
+
+
+def test_partition_invalid():
+
+    with pytest.raises(ValueError):
+        partition_entries(ENTRIES, "field")
+
+
+def test_partition_path():
+
+    assert partition_path("out/{}.tex", "a b/c") == "out/a_b_c.tex"
+
+
+def test_partition_paths_unique():
+
+    paths = partition_paths("out_{}.tex", ["a b", "a_b", "日本", "中国", "en"])
+    assert paths["en"] == "out_en.tex"
+    assert len(set(paths.values())) == 5
+    assert paths["a b"].startswith("out_a_b-")
+    assert paths["日本"].startswith("out__-")
+    assert paths == partition_paths("out_{}.tex",
+                                    ["中国", "日本", "en", "a_b", "a b"])
@@ -0,0 +1,334 @@
+"""performance regression gates
+
+Each conversion direction is run on generated inputs of a fixed size (n)
+and of four times that size (4n). A linear implementation should take
+roughly four times as long on the larger input, whereas a quadratic
+regression would take roughly sixteen times as long,
+so the ratio is bounded well in between the two.
+Duplicate detection is timed in isolation (on pre-parsed definitions),
+at sizes where a quadratic regression would dominate the time.
+"""
+import gc
+import logging
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bib2glossary import acronyms, glossaries
+from bib2glossary.acronyms import AcronymConverter
+from bib2glossary.shared.limits import ParseLimits, LimitExceeded
+from bib2glossary.shared.macros import (iter_definitions,
+                                        iter_unique_definitions)
+from bib2glossary.shared.normalise import make_normaliser
+from bib2glossary.shared.packed import write_packed, iter_packed
+from bib2glossary.shared.parsing import parse_bib, iter_bib_entries
+
+SMALL_SIZE = 250
+LARGE_SIZE = 4 * SMALL_SIZE
+DUPLICATE_SIZE = 20000
+# time(4n) / time(n): ~4 if linear, ~16 if quadratic
+MAX_TIME_RATIO = 8.0
+# peak traced memory allowed per entry, plus a fixed overhead (bytes),
+# from measured peaks of ~0.5 KiB (tex to bib) and ~3.2 KiB (bib to tex)
+# per entry, plus ~0.7 MiB
+TEX_MEMORY_PER_ENTRY = 1024
+BIB_MEMORY_PER_ENTRY = 4 * 1024
+MEMORY_OVERHEAD = 1024 * 1024
+# wall-clock time allowed to reject a pathological input (seconds)
+MAX_REJECT_TIME = 2.0
+WORST_CASE_SIZE = 100000
+# size of an unterminated definition, supplied in chunks (characters)
+WORST_CASE_STREAM_SIZE = 4 * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+# documents converted per thread count, and the minimum throughput
+# with several threads relative to one (CPU-bound work is serialised
+# by the GIL, so this only guards against contention between threads)
+CONCURRENT_DOCUMENTS = 16
+CONCURRENT_SIZE = 50
+MIN_THREAD_EFFICIENCY = 0.5
+# field values normalised, and the time allowed per million (seconds)
+NORMALISE_FIELDS = 100000
+MAX_NORMALISE_TIME = 30.0
+# minimum speed-up of reading a packed library, over parsing the .bib file
+MIN_PACKED_SPEEDUP = 5.0
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    """the CLI tests leave the root logger at DEBUG (see setup_logger),
+    so that the debug records of the parsers, as captured by pytest,
+    would otherwise be included in the timings and memory peaks"""
+    root = logging.getLogger()
+    level = root.level
+    root.setLevel(logging.WARNING)
+    yield
+    root.setLevel(level)
+
+
+def generate_acronym_tex(size):
+    return "\n".join(
+        "\\newacronym[description={{description {0}}}]"
+        "{{key{0}}}{{ABRV{0}}}{{Abbreviation {0}}}".format(i)
+        for i in range(size))
+
+
+def generate_acronym_bib(size):
+    return "\n".join(
+        "@misc{{key{0},\n  abstract = {{description {0}}},\n"
+        "  journal = {{Abbreviation {0}}},\n  shorttitle = {{ABRV{0}}}\n}}\n"
+        .format(i) for i in range(size))
+
+
+def generate_glossary_tex(size):
+    return "\n".join(
+        "\\newglossaryentry{{key{0}}}{{\n    name={{name {0}}},\n"
+        "    description={{description {0}}}\n}}".format(i)
+        for i in range(size))
+
+
+def generate_glossary_bib(size):
+    return "\n".join(
+        "@misc{{key{0},\n  abstract = {{description {0}}},\n"
+        "  journal = {{name {0}}}\n}}\n".format(i) for i in range(size))
+
+
+def best_time(func, text_str, repeats=2):
+    """return the minimum wall-clock time of ``func(text_str)``
+    (with garbage collection disabled, as for timeit,
+    so that collections of objects left by other tests are not timed)"""
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func(text_str)
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(timings)
+
+
+def peak_memory(func, text_str):
+    """return the peak traced memory (bytes) of ``func(text_str)``"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(text_str)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def assert_scaling(func, generator, size=SMALL_SIZE):
+    small = best_time(func, generator(size))
+    large = best_time(func, generator(4 * size))
+    ratio = large / small
+    assert ratio < MAX_TIME_RATIO, (
+        "time ratio for 4x entries was {0:.1f} "
+        "(expected < {1})".format(ratio, MAX_TIME_RATIO))
+
+
+def assert_memory(func, generator, per_entry):
+    # warm up first, so that one-off allocations (e.g. caches) are excluded
+    func(generator(SMALL_SIZE))
+    peak = peak_memory(func, generator(LARGE_SIZE))
+    budget = MEMORY_OVERHEAD + per_entry * LARGE_SIZE
+    assert peak < budget, (
+        "peak memory {0} bytes exceeded budget of {1} bytes".format(
+            peak, budget))
+
+
+def test_acronym_tex_to_bib_scaling():
+    assert_scaling(acronyms.tex_to_bib, generate_acronym_tex)
+
+
+def test_acronym_bib_to_tex_scaling():
+    assert_scaling(acronyms.bib_to_tex, generate_acronym_bib)
+
+
+def test_glossary_tex_to_bib_scaling():
+    assert_scaling(glossaries.tex_to_bib, generate_glossary_tex)
+
+
+def test_glossary_bib_to_tex_scaling():
+    assert_scaling(glossaries.bib_to_tex, generate_glossary_bib)
+
+
+def test_acronym_tex_to_bib_memory():
+    assert_memory(acronyms.tex_to_bib, generate_acronym_tex,
+                  TEX_MEMORY_PER_ENTRY)
+
+
+def test_acronym_bib_to_tex_memory():
+    assert_memory(acronyms.bib_to_tex, generate_acronym_bib,
+                  BIB_MEMORY_PER_ENTRY)
+
+
+def test_glossary_tex_to_bib_memory():
+    assert_memory(glossaries.tex_to_bib, generate_glossary_tex,
+                  TEX_MEMORY_PER_ENTRY)
+
+
+def test_glossary_bib_to_tex_memory():
+    assert_memory(glossaries.bib_to_tex, generate_glossary_bib,
+                  BIB_MEMORY_PER_ENTRY)
+
+
+def test_duplicate_keys():
+    entries, duplicates = acronyms.tex_to_dict(
+        "\n".join([generate_acronym_tex(SMALL_SIZE)] * 2))
+    assert len(entries) == len(duplicates) == SMALL_SIZE
+
+
+def test_duplicate_keys_scaling():
+    """duplicate detection must not compare each key to all previous keys,
+    or copy the rows already recorded for a key"""
+    def generator(size):
+        # every key defined twice, and one key defined size times
+        return ([("newacronym", {"ID": "key{}".format(i % size)}, i)
+                 for i in range(2 * size)] +
+                [("newacronym", {"ID": "same"}, i) for i in range(size)])
+
+    def detect(definitions):
+        duplicates = {}
+        unique = list(iter_unique_definitions(definitions, duplicates))
+        assert len(unique) == len(duplicates) == len(definitions) // 3 + 1
+
+    assert_scaling(detect, generator, DUPLICATE_SIZE)
+
+
+def assert_rejected(text_str, limits, exception=LimitExceeded):
+    """assert a pathological input is rejected, within a bounded time"""
+    start = time.perf_counter()
+    with pytest.raises(exception):
+        acronyms.tex_to_dict(text_str, limits=limits)
+    elapsed = time.perf_counter() - start
+    assert elapsed < MAX_REJECT_TIME, (
+        "rejecting input took {0:.2f} seconds".format(elapsed))
+
+
+def assert_rejected_stream(chunks, limits, exception=LimitExceeded):
+    """assert a pathological input, supplied in chunks, is rejected
+    within a bounded time"""
+    start = time.perf_counter()
+    with pytest.raises(exception):
+        list(iter_definitions(chunks, limits=limits))
+    elapsed = time.perf_counter() - start
+    assert elapsed < MAX_REJECT_TIME, (
+        "rejecting input took {0:.2f} seconds".format(elapsed))
+
+
+def test_worst_case_nested_groups():
+    text_str = "{" * WORST_CASE_SIZE + "}" * WORST_CASE_SIZE
+    assert_rejected(text_str, ParseLimits())
+
+
+def test_worst_case_nested_argument():
+    text_str = ("\\newacronym{a}{A}{" + "{" * WORST_CASE_SIZE +
+                "}" * WORST_CASE_SIZE + "}")
+    assert_rejected(text_str, ParseLimits())
+
+
+def test_worst_case_unbalanced_brace():
+    text_str = ("\\newacronym{a}{A}{An Acronym\n" +
+                generate_acronym_tex(WORST_CASE_SIZE // 10))
+    assert_rejected(text_str, ParseLimits(), ValueError)
+    assert_rejected(text_str, ParseLimits(max_entry_size=1000))
+
+
+def test_worst_case_entry_count():
+    text_str = "\\newacronym{a}{A}{An Acronym}\n" * WORST_CASE_SIZE
+    assert_rejected(text_str, ParseLimits(max_entries=100))
+
+
+def test_worst_case_timeout():
+    text_str = generate_acronym_tex(WORST_CASE_SIZE)
+    assert_rejected(text_str, ParseLimits(timeout=0.5))
+
+
+def test_worst_case_unterminated_stream():
+    """an unterminated definition supplied in chunks must be scanned
+    once (not re-scanned for every chunk), and within the time budget"""
+    text_str = ("\\newacronym{a}{A}{" +
+                "An {Acronym} \\& " * (WORST_CASE_STREAM_SIZE // 16))
+    chunks = (text_str[i:i + STREAM_CHUNK_SIZE]
+              for i in range(0, len(text_str), STREAM_CHUNK_SIZE))
+    assert_rejected_stream(chunks, ParseLimits(timeout=0.5))
+
+    chunks = (text_str[i:i + STREAM_CHUNK_SIZE]
+              for i in range(0, len(text_str), STREAM_CHUNK_SIZE))
+    assert_rejected_stream(chunks, ParseLimits(), ValueError)
+
+
+def test_worst_case_unterminated_bib_stream():
+    """an unterminated bib entry supplied in chunks must be scanned once
+    (not re-scanned for every chunk)"""
+    text_str = ("@misc{key,\n  abstract = {" +
+                "A {Bib} entry \\& " * (WORST_CASE_STREAM_SIZE // 16))
+    chunks = (text_str[i:i + STREAM_CHUNK_SIZE]
+              for i in range(0, len(text_str), STREAM_CHUNK_SIZE))
+    start = time.perf_counter()
+    with pytest.raises(ValueError):
+        list(iter_bib_entries(chunks))
+    elapsed = time.perf_counter() - start
+    assert elapsed < MAX_REJECT_TIME, (
+        "rejecting input took {0:.2f} seconds".format(elapsed))
+
+
+def test_converter_concurrency():
+    """a shared converter must give identical results,
+    without contention, across thread counts"""
+    converter = AcronymConverter()
+    texts = [generate_acronym_tex(CONCURRENT_SIZE)] * CONCURRENT_DOCUMENTS
+    throughputs = {}
+    results = {}
+    for nthreads in (1, 2, 4):
+        with ThreadPoolExecutor(nthreads) as executor:
+            start = time.perf_counter()
+            results[nthreads] = list(executor.map(converter.tex_to_bib, texts))
+            elapsed = time.perf_counter() - start
+        throughputs[nthreads] = CONCURRENT_DOCUMENTS / elapsed
+
+    assert results[2] == results[4] == results[1]
+    for nthreads in (2, 4):
+        efficiency = throughputs[nthreads] / throughputs[1]
+        assert efficiency > MIN_THREAD_EFFICIENCY, (
+            "throughput with {0} threads was {1:.2f} of 1 thread".format(
+                nthreads, efficiency))
+
+
+def test_normalise_cost():
+    """the cost of normalising a million fields must be bounded,
+    with distinct (uncached) and repeated (cached) values"""
+    values = ["Caf\\'e {{\\\"o}}  R\\&D\n  number {}".format(i)
+              for i in range(NORMALISE_FIELDS)]
+    normaliser = make_normaliser(cache_size=NORMALISE_FIELDS)
+    distinct = best_time(lambda vals: [normaliser(val) for val in vals],
+                         values, repeats=1)
+    repeated = best_time(lambda vals: [normaliser(val) for val in vals],
+                         values, repeats=1)
+    scale = 1000000 / NORMALISE_FIELDS
+    cost = ("normalise per million fields: {0:.2f}s distinct, "
+            "{1:.2f}s repeated".format(distinct * scale, repeated * scale))
+
+    assert normaliser(values[0]) == "Café {ö} R&D number 0"
+    assert distinct * scale < MAX_NORMALISE_TIME, cost
+    assert repeated < distinct, cost
+
+
+def test_packed_library_speedup(tmp_path):
+    """reading a packed library must be much cheaper than parsing the bib,
+    so that workers sharing it do not each pay the parse cost"""
+    text_str = generate_acronym_bib(LARGE_SIZE)
+    path = str(tmp_path / "library.pack")
+    write_packed(parse_bib(text_str).values(), path)
+
+    parse_time = best_time(parse_bib, text_str)
+    packed_time = best_time(lambda path: list(iter_packed(path)), path)
+    assert parse_time / packed_time > MIN_PACKED_SPEEDUP, (
+        "packed library was only {0:.1f}x faster than parsing".format(
+            parse_time / packed_time))
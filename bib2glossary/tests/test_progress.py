@@ -0,0 +1,45 @@
+import io
+import json
+
+from bib2glossary.shared.progress import Progress
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.time = 0.
+
+    def __call__(self):
+        return self.time
+
+
+def test_progress_rate_limited():
+    clock = FakeClock()
+    stream = io.StringIO()
+    progress = Progress(stream=stream, total_bytes=1000, interval=1.,
+                        clock=clock)
+    for _ in range(100):
+        clock.time += 0.05
+        progress.update(entries=1, nbytes=5)
+    # 5 seconds passed, so 4 or 5 reports (not one per update)
+    lines = stream.getvalue().splitlines()
+    assert 4 <= len(lines) <= 5
+    assert lines[0].startswith("progress: ")
+
+
+def test_progress_metrics(tmp_path):
+    clock = FakeClock()
+    progress = Progress(total_bytes=1000, clock=clock)
+    clock.time = 2.
+    progress.update(entries=10, nbytes=250, skipped=2)
+    assert progress.metrics() == {
+        "entries": 10, "skipped": 2, "bytes": 250, "elapsed_seconds": 2.,
+        "entries_per_second": 5., "bytes_per_second": 125.,
+        "eta_seconds": 6.}
+    assert progress.format() == ("10 entries (2 skipped), 250.0 B of "
+                                 "1000.0 B, 5 entries/s, ETA 6s")
+
+    path = str(tmp_path / "metrics.json")
+    progress.finish(path)
+    with open(path) as file_obj:
+        assert json.load(file_obj)["entries"] == 10
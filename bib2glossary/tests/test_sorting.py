@@ -0,0 +1,35 @@
+import random
+
+from bib2glossary.shared.parsing import write_bib, WRITER_CONFIG
+from bib2glossary.shared.sorting import (sort_entries, fields_sort_key,
+                                         id_sort_key, BIB_ORDER)
+
+
+def generate_entries(size):
+    rng = random.Random(0)
+    return [{'ID': 'key{}'.format(rng.randrange(size // 2)),
+             'ENTRYTYPE': rng.choice(['misc', 'book']),
+             'author': rng.choice(['A', 'b', 'C']),
+             'note': str(index)}
+            for index in range(size)]
+
+
+def test_sort_entries_in_memory():
+    entries = generate_entries(100)
+    assert list(sort_entries(entries)) == sorted(entries, key=id_sort_key)
+
+
+def test_sort_entries_spilled():
+    entries = generate_entries(500)
+    # a budget of ~2 entries, so that many runs are merged
+    result = list(sort_entries(entries, max_memory=600))
+    # the sort is stable
+    assert result == sorted(entries, key=id_sort_key)
+
+
+def test_sort_entries_bib_order():
+    entries = generate_entries(200)
+    sort_key = fields_sort_key(BIB_ORDER)
+    result = list(sort_entries(entries, sort_key, max_memory=2000))
+    unsorted = dict(WRITER_CONFIG, order_entries_by=None).items()
+    assert write_bib(result, unsorted) == write_bib(entries)
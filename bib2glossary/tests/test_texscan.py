@@ -0,0 +1,142 @@
+import pytest
+from bib2glossary.shared.limits import ParseLimits, LimitExceeded
+from bib2glossary.shared.texscan import iter_macros, iter_macros_stream
+
+
+def test_iter_macros():
+
+    text_str = """% \\newacronym{ca}{CA}{Commented}
+\\newacronym{aa}{AA}{An Acronym} text {not an argument}
+\\newacronymstyle{style}
+\\newacronym[
+    description={a {nested} description}
+    ]{awo} {AWO}{Acronym With Options}"""
+
+    macros = list(iter_macros(text_str, ["newacronym"]))
+
+    assert macros == [
+        ("newacronym", "\\newacronym{aa}{AA}{An Acronym}", 2),
+        ("newacronym", "\\newacronym[\n    description={a {nested} "
+         "description}\n    ]{awo} {AWO}{Acronym With Options}", 4)
+    ]
+
+
+def test_escaped_braces():
+
+    text_str = "\\newacronym{a}{\\{A}{An \\} Acronym % comment }\n}"
+
+    macros = list(iter_macros(text_str, ["newacronym"]))
+
+    assert macros == [("newacronym", text_str, 1)]
+
+
+def test_unbalanced():
+
+    text_str = "\\newacronym{aa}{AA}{An Acronym\n\\newacronym{b}{B}{Bb}\n"
+
+    with pytest.raises(ValueError, match="row 1.*unbalanced"):
+        list(iter_macros(text_str, ["newacronym"]))
+
+
+def test_max_depth():
+
+    text_str = "text\n" + "{" * 20 + "}" * 20
+
+    assert list(iter_macros(text_str, ["newacronym"])) == []
+    with pytest.raises(LimitExceeded, match="row 2.*depth"):
+        list(iter_macros(text_str, ["newacronym"],
+                         ParseLimits(max_depth=10)))
+
+
+def test_max_entry_size():
+
+    text_str = "\\newacronym{aa}{AA}{" + "a" * 100 + "}"
+
+    with pytest.raises(LimitExceeded, match="maximum size of 50"):
+        list(iter_macros(text_str, ["newacronym"],
+                         ParseLimits(max_entry_size=50)))
+
+
+def test_max_entries():
+
+    text_str = "\\newacronym{aa}{AA}{An Acronym}\n" * 3
+
+    macros = iter_macros(text_str, ["newacronym"],
+                         ParseLimits(max_entries=2))
+    next(macros)
+    next(macros)
+    with pytest.raises(LimitExceeded, match="row 3.*maximum of 2"):
+        next(macros)
+
+
+def test_timeout():
+
+    text_str = "\\newacronym{aa}{AA}{An Acronym}\n" * 3
+
+    with pytest.raises(LimitExceeded, match="time budget"):
+        list(iter_macros(text_str, ["newacronym"], ParseLimits(timeout=-1)))
+
+
+def test_required_arguments():
+
+    text_str = "\\newacronym[opt]{aa}{AA}{An Acronym}{not an argument}"
+
+    macros = list(iter_macros(text_str, {"newacronym": 3}))
+
+    assert macros == [
+        ("newacronym", "\\newacronym[opt]{aa}{AA}{An Acronym}", 1)]
+
+
+def test_iter_macros_stream():
+
+    text_str = """% \\newacronym{ca}{CA}{Commented}
+\\newacronym{aa}{AA}{An Acronym} % comment {
+\\newacronym[
+    description={a {nested} description}
+    ]{awo} {AWO}{Acronym With Options % comment }
+}""" * 3
+    expected = list(iter_macros(text_str, ["newacronym"]))
+
+    assert len(expected) == 6
+    for size in range(1, 20):
+        chunks = [text_str[i:i + size]
+                  for i in range(0, len(text_str), size)]
+        assert list(iter_macros_stream(chunks, ["newacronym"])) == expected
+
+
+def test_iter_macros_stream_is_incremental():
+
+    def chunks():
+        yield "\\newacronym{aa}{AA}"
+        yield "{An Acronym}\n"
+        raise RuntimeError("read too far")
+
+    macros = iter_macros_stream(chunks(), {"newacronym": 3})
+
+    assert next(macros) == (
+        "newacronym", "\\newacronym{aa}{AA}{An Acronym}", 1)
+
+
+def test_iter_macros_stream_max_entry_size():
+
+    def chunks():
+        yield "\\newacronym{aa}{AA}{"
+        while True:
+            yield "a" * 10
+
+    with pytest.raises(LimitExceeded):
+        list(iter_macros_stream(chunks(), ["newacronym"],
+                                ParseLimits(max_entry_size=100)))
+
+
+def test_iter_macros_stream_escapes():
+
+    text_str = ("\\newacronym{aa}{A\\}A}{An \\{ Acronym % comment }\n}  \n"
+                "\\newacronym{bb}  {BB}\n  {Another \\\\}") * 2
+    expected = list(iter_macros(text_str, ["newacronym"]))
+
+    assert len(expected) == 4
+    for size in range(1, 12):
+        chunks = [text_str[i:i + size]
+                  for i in range(0, len(text_str), size)]
+        assert list(iter_macros_stream(chunks, ["newacronym"])) == expected